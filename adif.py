@@ -0,0 +1,263 @@
+"""
+adif.py
+
+Purpose:
+- Bulk import ADIF (.adi) files into the QSO log, and export the log back
+  out as ADIF.
+- The log is read and written through qso_repository, so it can be the
+  JSONL file or a SQLite database.
+- Both directions stream: one record is in memory at a time, so archives
+  with hundreds of thousands of QSOs use constant memory.
+
+Field mapping (ADIF -> QSO dict):
+- CALL -> call_sign
+- RST_RCVD -> their_signal_report (the report they gave you)
+- RST_SENT -> my_signal_report (the report you gave them)
+- BAND -> band (normalized with qso_normalize)
+- MODE -> mode (normalized with qso_normalize)
+- COMMENT -> comments
+- QSO_DATE + TIME_ON -> timestamp (UTC, "YYYY-MM-DDTHH:MM:SSZ")
+
+Other ADIF fields are not kept.
+
+Usage (from repo root):
+    python adif.py import archive.adi [--log qsolog.jsonl|qsolog.sqlite3]
+    python adif.py export archive.adi [--log qsolog.jsonl|qsolog.sqlite3]
+"""
+
+import time
+
+import qso_normalize
+import qso_repository
+
+CHUNK_SIZE = 64 * 1024
+PROGRAM_ID = "ham-radio-logger"
+ADIF_VERSION = "3.1.4"
+
+# ADIF field name -> QSO dict key, in the order handle_log_new_qso builds a QSO.
+FIELD_MAP = [
+    ("CALL", "call_sign"),
+    ("RST_RCVD", "their_signal_report"),
+    ("RST_SENT", "my_signal_report"),
+    ("BAND", "band"),
+    ("MODE", "mode"),
+    ("COMMENT", "comments"),
+]
+UPPERCASE_KEYS = {"call_sign", "band", "mode"}
+
+
+class ADIFError(Exception):
+    """Raised when an ADIF file can't be parsed."""
+
+
+# -----------------------------
+# Reading
+# -----------------------------
+def iter_adif_records(file, chunk_size: int = CHUNK_SIZE):
+    """
+    Yield each ADIF record from an open text file as a dict of FIELD -> value.
+
+    Field names are uppercased. The header (anything up to <EOH>) is skipped.
+    """
+    reader = _ChunkReader(file, chunk_size)
+    record = {}
+    while reader.skip_to("<"):
+        tag = reader.read_until(">")
+        if tag is None:
+            break
+
+        name, _, spec = tag.partition(":")
+        name = name.strip().upper()
+        if name == "EOH":
+            record = {}
+            continue
+        if name == "EOR":
+            if record:
+                yield record
+            record = {}
+            continue
+
+        length_text = spec.split(":")[0].strip()
+        if length_text == "":
+            continue
+        try:
+            length = int(length_text)
+        except ValueError:
+            raise ADIFError(f"Bad field length in ADIF tag <{tag}>.") from None
+        record[name] = reader.read(length)
+
+
+def adif_to_qso(record: dict) -> dict:
+    """Convert one ADIF record into a QSO dict in the log's format."""
+    qso = {}
+    for adif_name, key in FIELD_MAP:
+        value = record.get(adif_name, "").strip()
+        if key in UPPERCASE_KEYS:
+            value = value.upper()
+        qso[key] = value
+
+    timestamp = _adif_timestamp(record.get("QSO_DATE", ""), record.get("TIME_ON", ""))
+    if timestamp:
+        qso["timestamp"] = timestamp
+    return qso_normalize.normalize_qso(qso)
+
+
+def import_adif(adif_filename: str, log_filename: str) -> dict:
+    """
+    Append every record of an ADIF file to the log.
+
+    Returns {"records": count, "seconds": elapsed, "records_per_second": rate}.
+    """
+    start = time.perf_counter()
+    with open(adif_filename, "r", encoding="utf-8", errors="replace") as file:
+        with qso_repository.open_repository(log_filename) as log:
+            qsos = (adif_to_qso(record) for record in iter_adif_records(file))
+            count = log.append_many(qsos)
+    return _rate(count, time.perf_counter() - start)
+
+
+# -----------------------------
+# Writing
+# -----------------------------
+def qso_to_adif(qso: dict) -> str:
+    """Convert one QSO dict into an ADIF record string ending in <EOR>."""
+    fields = []
+    for adif_name, key in FIELD_MAP:
+        value = qso.get(key)
+        if isinstance(value, str) and value != "":
+            fields.append(_adif_field(adif_name, value))
+
+    timestamp = qso.get("timestamp")
+    if isinstance(timestamp, str) and len(timestamp) >= 19:
+        fields.append(_adif_field("QSO_DATE", timestamp[0:10].replace("-", "")))
+        fields.append(_adif_field("TIME_ON", timestamp[11:19].replace(":", "")))
+
+    return " ".join(fields) + " <EOR>\n"
+
+
+def export_adif(log_filename: str, adif_filename: str) -> dict:
+    """
+    Write every QSO in the log to an ADIF file (overwriting it).
+
+    Returns {"records": count, "seconds": elapsed, "records_per_second": rate}.
+    """
+    start = time.perf_counter()
+    count = 0
+    with open(adif_filename, "w", encoding="utf-8", newline="\n") as file:
+        file.write(f"Exported by {PROGRAM_ID}\n")
+        file.write(_adif_field("ADIF_VER", ADIF_VERSION) + "\n")
+        file.write(_adif_field("PROGRAMID", PROGRAM_ID) + "\n")
+        file.write("<EOH>\n")
+        with qso_repository.open_repository(log_filename) as log:
+            for qso in log.iter_qsos():
+                file.write(qso_to_adif(qso))
+                count += 1
+    return _rate(count, time.perf_counter() - start)
+
+
+# -----------------------------
+# Internal helpers (private)
+# -----------------------------
+class _ChunkReader:
+    """Reads a text file in chunks and hands out pieces of it, dropping what was used."""
+
+    def __init__(self, file, chunk_size: int):
+        self.file = file
+        self.chunk_size = chunk_size
+        self.text = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self) -> bool:
+        """Read another chunk. Returns False at end of file."""
+        if self.eof:
+            return False
+        chunk = self.file.read(self.chunk_size)
+        if chunk == "":
+            self.eof = True
+            return False
+        self.text = self.text[self.pos :] + chunk
+        self.pos = 0
+        return True
+
+    def skip_to(self, char: str) -> bool:
+        """Move just past the next char. Returns False if there is none."""
+        while True:
+            found = self.text.find(char, self.pos)
+            if found != -1:
+                self.pos = found + 1
+                return True
+            self.pos = len(self.text)
+            if not self._fill():
+                return False
+
+    def read_until(self, char: str) -> str | None:
+        """Return the text up to the next char and move past it. None at end of file."""
+        while True:
+            found = self.text.find(char, self.pos)
+            if found != -1:
+                value = self.text[self.pos : found]
+                self.pos = found + 1
+                return value
+            if not self._fill():
+                return None
+
+    def read(self, length: int) -> str:
+        """Return the next length characters (fewer at end of file)."""
+        while len(self.text) - self.pos < length:
+            if not self._fill():
+                break
+        value = self.text[self.pos : self.pos + length]
+        self.pos += len(value)
+        return value
+
+
+def _adif_field(name: str, value: str) -> str:
+    return f"<{name}:{len(value)}>{value}"
+
+
+def _adif_timestamp(qso_date: str, time_on: str) -> str | None:
+    """Turn ADIF QSO_DATE (YYYYMMDD) and TIME_ON (HHMM or HHMMSS) into our timestamp."""
+    qso_date = qso_date.strip()
+    time_on = time_on.strip()
+    if len(qso_date) != 8 or not qso_date.isdigit():
+        return None
+    if len(time_on) == 4:
+        time_on += "00"
+    if len(time_on) != 6 or not time_on.isdigit():
+        time_on = "000000"
+    return (
+        f"{qso_date[0:4]}-{qso_date[4:6]}-{qso_date[6:8]}"
+        f"T{time_on[0:2]}:{time_on[2:4]}:{time_on[4:6]}Z"
+    )
+
+
+def _rate(count: int, seconds: float) -> dict:
+    per_second = count / seconds if seconds > 0 else 0.0
+    return {"records": count, "seconds": seconds, "records_per_second": per_second}
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Import or export ADIF files.")
+    parser.add_argument("action", choices=["import", "export"])
+    parser.add_argument("adif_file")
+    parser.add_argument(
+        "--log", default="qsolog.jsonl", help="QSO log (JSONL or SQLite)"
+    )
+    args = parser.parse_args()
+
+    if args.action == "import":
+        result = import_adif(args.adif_file, args.log)
+    else:
+        result = export_adif(args.log, args.adif_file)
+
+    print(
+        f"{args.action.title()}ed {result['records']} QSOs in "
+        f"{result['seconds']:.2f} s ({result['records_per_second']:.0f} QSOs/s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
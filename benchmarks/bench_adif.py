@@ -0,0 +1,43 @@
+"""
+bench_adif.py
+
+Measure streaming ADIF export and import speed over a large synthetic log.
+
+Usage (from repo root):
+    python benchmarks/bench_adif.py [number_of_qsos]
+"""
+
+import os
+import sys
+import tempfile
+
+from bench_utils import measure
+from synthetic_log import write_log
+
+import adif
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        source_log = os.path.join(temp_dir, "source.jsonl")
+        adif_file = os.path.join(temp_dir, "archive.adi")
+        imported_log = os.path.join(temp_dir, "imported.jsonl")
+        write_log(source_log, count)
+
+        export_run = measure(adif.export_adif, source_log, adif_file)
+        print(f"ADIF file: {os.path.getsize(adif_file)} bytes")
+        import_run = measure(adif.import_adif, adif_file, imported_log)
+
+    for label, run in [("export", export_run), ("import", import_run)]:
+        result = run["result"]
+        print(
+            f"{label:>6}: {result['records']} QSOs, "
+            f"{result['records_per_second']:.0f} QSOs/s, "
+            f"peak {run['peak_bytes'] / 1_000_000:.1f} MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+bench_callbook_many.py
+
+Compare one-at-a-time callbook_lookup() with callbook_lookup_many() against
+the local fake HamQTH server, with latency added to every response.
+
+Usage (from repo root):
+    python benchmarks/bench_callbook_many.py [number_of_calls] [latency_seconds]
+"""
+
+import os
+import random
+import sys
+import time
+
+import bench_utils  # noqa: F401  (puts the repo root on sys.path)
+from synthetic_log import random_call_sign
+
+import hamqth_api
+from tests.fake_hamqth_server import FakeHamQTHServer
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.05
+
+    rng = random.Random(73)
+    calls = [random_call_sign(rng) for _ in range(count)]
+    records = {call: {"callsign": call.lower(), "nick": "Op " + call} for call in calls}
+
+    server = FakeHamQTHServer(records=records, latency=latency).start()
+    os.environ["HAMQTH_USER"] = server.user
+    os.environ["HAMQTH_PASS"] = server.password
+    hamqth_api.HAMQTH_XML_URL = server.url
+    print(f"{count} calls, {latency * 1000:.0f} ms per response")
+
+    try:
+        start = time.perf_counter()
+        for call in calls:
+            hamqth_api.callbook_lookup(call)
+        report("serial", count, time.perf_counter() - start)
+
+        for workers in [4, 8, 16]:
+            start = time.perf_counter()
+            hamqth_api.callbook_lookup_many(
+                calls, max_workers=workers, rate_per_second=None
+            )
+            report(f"{workers} workers", count, time.perf_counter() - start)
+
+        start = time.perf_counter()
+        hamqth_api.callbook_lookup_many(calls, max_workers=8, rate_per_second=20)
+        report("8 workers, 20/s", count, time.perf_counter() - start)
+    finally:
+        server.stop()
+    print(f"Logins: {server.logins}, TCP connections: {server.connections}")
+
+
+def report(label: str, count: int, seconds: float) -> None:
+    print(f"{label:>16}: {seconds:.2f} s ({count / seconds:.0f} lookups/s)")
+
+
+if __name__ == "__main__":
+    main()
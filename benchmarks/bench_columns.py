@@ -0,0 +1,67 @@
+"""
+bench_columns.py
+
+Compare stats and a band search done on a list[dict] of the whole log
+(load_all_qsos) with the same work done on the memory-mapped column store.
+
+tracemalloc only sees Python allocations, so the column store's peak does
+not include the mapped file pages (those belong to the OS page cache).
+
+Usage (from repo root):
+    python benchmarks/bench_columns.py [number_of_qsos]
+"""
+
+import os
+import sys
+import tempfile
+
+from bench_utils import load_logger, measure
+from synthetic_log import write_log
+
+import qso_columns
+import qso_stats
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    logger = load_logger()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        filename = os.path.join(temp_dir, "qsolog.jsonl")
+        write_log(filename, count)
+        print(f"Synthetic log: {count} QSOs, {os.path.getsize(filename)} bytes")
+
+        sync_run = measure(qso_columns.sync_columns, filename)
+        dirname = qso_columns.columns_dirname(filename)
+        column_bytes = sum(
+            os.path.getsize(os.path.join(dirname, name)) for name in os.listdir(dirname)
+        )
+        print(
+            f"Column store: {column_bytes} bytes, built in {sync_run['seconds']:.2f} s"
+        )
+
+        def with_list():
+            qsos = logger.load_all_qsos(filename)
+            stats = qso_stats.QSOStats().update(qsos)
+            hits = [qso for qso in qsos if qso.get("band") == "20M"]
+            return stats.to_dict(), len(hits)
+
+        def with_columns():
+            with qso_columns.ColumnStore(dirname) as store:
+                stats = store.stats()
+                hits = store.lookup("band", "20M")
+                return stats.to_dict(), len(hits)
+
+        list_run = measure(with_list)
+        column_run = measure(with_columns)
+
+    assert list_run["result"] == column_run["result"]
+    for label, run in [("list[dict]", list_run), ("columns", column_run)]:
+        print(
+            f"{label:>10}: {run['seconds']:.3f} s, "
+            f"peak {run['peak_bytes'] / 1_000_000:.1f} MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+bench_iter_qsos.py
+
+Compare counting a field with load_all_qsos() (whole log in a list) against
+streaming the log with qso_log.iter_qsos().
+
+Usage (from repo root):
+    python benchmarks/bench_iter_qsos.py [number_of_qsos]
+"""
+
+import os
+import sys
+import tempfile
+
+from bench_utils import load_logger, measure
+from synthetic_log import write_log
+
+import qso_log
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    logger = load_logger()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        filename = os.path.join(temp_dir, "qsolog.jsonl")
+        write_log(filename, count)
+        print(f"Synthetic log: {count} QSOs, {os.path.getsize(filename)} bytes")
+
+        list_run = measure(
+            lambda: logger.count_qso_field(logger.load_all_qsos(filename), "band")
+        )
+        stream_run = measure(
+            lambda: logger.count_qso_field(
+                qso_log.iter_qsos(filename, fields=["band"]), "band"
+            )
+        )
+
+    assert list_run["result"] == stream_run["result"]
+    for label, run in [("load_all_qsos", list_run), ("iter_qsos", stream_run)]:
+        print(
+            f"{label:>14}: {run['seconds']:.3f} s, "
+            f"peak {run['peak_bytes'] / 1_000_000:.1f} MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
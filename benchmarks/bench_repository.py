@@ -0,0 +1,88 @@
+"""
+bench_repository.py
+
+Query latency of the JSONL and SQLite log backends (qso_repository) on
+synthetic logs of several sizes.
+
+For each size the JSONL log is written, then migrated into SQLite. Each query
+runs once to warm up (that first run builds the JSONL sidecar index and stats
+snapshot), then the median of a few more runs is reported.
+
+Usage (from repo root):
+    python benchmarks/bench_repository.py [size ...]     (default 10000 100000 1000000)
+"""
+
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import bench_utils  # noqa: F401  (puts the repo root on sys.path)
+from synthetic_log import write_log
+
+import qso_repository
+
+REPEATS = 5
+
+
+def queries(repo, call_sign: str) -> dict:
+    """Name -> zero-argument function running one query against repo."""
+    return {
+        "search call": lambda: sum(
+            1 for _ in repo.search("call_sign", call_sign, partial=True)
+        ),
+        "search band": lambda: sum(1 for _ in repo.search("band", "20M")),
+        "recent 10": lambda: len(repo.recent(10)),
+        "count mode": lambda: len(repo.count("mode")),
+        "stats": lambda: repo.stats().total,
+    }
+
+
+def time_query(func) -> tuple[float, float]:
+    """Return (first run seconds, median seconds of the next REPEATS runs)."""
+    start = time.perf_counter()
+    func()
+    first = time.perf_counter() - start
+    runs = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        func()
+        runs.append(time.perf_counter() - start)
+    return first, statistics.median(runs)
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            jsonl = os.path.join(temp_dir, "qsolog.jsonl")
+            sqlite = os.path.join(temp_dir, "qsolog.sqlite3")
+            write_log(jsonl, size)
+
+            start = time.perf_counter()
+            qso_repository.migrate(jsonl, sqlite)
+            print(
+                f"\n{size} QSOs (migrated to SQLite in {time.perf_counter() - start:.1f} s)"
+            )
+            print(f"{'query':>12} {'backend':>8} {'first':>10} {'median':>10}")
+
+            with qso_repository.open_repository(jsonl) as jsonl_repo:
+                call_sign = jsonl_repo.recent(1)[0]["call_sign"]
+                with qso_repository.open_repository(sqlite) as sqlite_repo:
+                    backends = {
+                        "jsonl": queries(jsonl_repo, call_sign),
+                        "sqlite": queries(sqlite_repo, call_sign),
+                    }
+                    for name in backends["jsonl"]:
+                        for backend, funcs in backends.items():
+                            first, median = time_query(funcs[name])
+                            print(
+                                f"{name:>12} {backend:>8} {first * 1000:>8.1f} ms"
+                                f" {median * 1000:>8.2f} ms"
+                            )
+
+
+if __name__ == "__main__":
+    main()
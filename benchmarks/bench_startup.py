@@ -0,0 +1,140 @@
+"""
+bench_startup.py
+
+Cold start of the logger: how long until the menu is up (and a CLI command
+like "stats" is done), and which imports the time goes to.
+
+- Each case runs in a fresh Python process, in an empty temp directory, a few
+  times; the median wall time is reported. "python -c pass" is timed too, so
+  the logger's own share is the difference.
+- The import breakdown comes from Python's own import timer
+  (PYTHONPROFILEIMPORTTIME, same as "python -X importtime"): top-level imports
+  by cumulative time, and whether requests was loaded (it shouldn't be until
+  the first callbook lookup).
+
+Usage (from repo root):
+    python benchmarks/bench_startup.py [--runs 5] [--limit 12] [--json results.json]
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from bench_utils import REPO_ROOT
+
+LOGGER = os.path.join(REPO_ROOT, "ham-radio-logger.py")
+
+# name -> (arguments after "python", stdin). "6" exits the menu right away.
+CASES = {
+    "python -c pass": (["-c", "pass"], ""),
+    "menu": ([LOGGER], "6\n"),
+    "stats": ([LOGGER, "stats"], ""),
+}
+
+
+def run_once(args: list[str], stdin: str, cwd: str, env: dict = None):
+    """Run python with args; return (wall seconds, stderr text)."""
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, *args],
+        input=stdin,
+        cwd=cwd,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return time.perf_counter() - start, result.stderr
+
+
+def parse_import_times(stderr: str) -> list[dict]:
+    """
+    Parse PYTHONPROFILEIMPORTTIME output into
+    {"module", "depth", "self_us", "cumulative_us"} dicts, in the order printed
+    (a module comes after everything it imported).
+    """
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:") :].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue
+        name = fields[2].rstrip()
+        stripped = name.lstrip()
+        imports.append(
+            {
+                "module": stripped,
+                "depth": (len(name) - len(stripped) - 1) // 2,
+                "self_us": int(fields[0]),
+                "cumulative_us": int(fields[1]),
+            }
+        )
+    return imports
+
+
+def import_breakdown(args: list[str], stdin: str, cwd: str) -> list[dict]:
+    env = dict(os.environ, PYTHONPROFILEIMPORTTIME="1")
+    _seconds, stderr = run_once(args, stdin, cwd, env)
+    return parse_import_times(stderr)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Measure logger cold start.")
+    parser.add_argument("--runs", type=int, default=5, help="runs per case")
+    parser.add_argument("--limit", type=int, default=12, help="imports to list")
+    parser.add_argument("--json", help="also save the results to this file")
+    args = parser.parse_args()
+
+    results = {"runs": args.runs, "cases": {}}
+    with tempfile.TemporaryDirectory() as temp_dir:
+        print(f"{'case':>16} {'median':>10} {'min':>10}")
+        for name, (case_args, stdin) in CASES.items():
+            times = [run_once(case_args, stdin, temp_dir)[0] for _ in range(args.runs)]
+            imports = import_breakdown(case_args, stdin, temp_dir)
+            results["cases"][name] = {
+                "median_seconds": statistics.median(times),
+                "min_seconds": min(times),
+                "imports": imports,
+            }
+            print(
+                f"{name:>16} {statistics.median(times) * 1000:>7.1f} ms"
+                f" {min(times) * 1000:>7.1f} ms"
+            )
+
+    baseline = {
+        item["module"] for item in results["cases"]["python -c pass"]["imports"]
+    }
+    for name in ["menu", "stats"]:
+        imports = results["cases"][name]["imports"]
+        top_level = [
+            item
+            for item in imports
+            if item["depth"] == 0 and item["module"] not in baseline
+        ]
+        top_level.sort(key=lambda item: item["cumulative_us"], reverse=True)
+        modules = {item["module"] for item in imports}
+        print(
+            f"\nSlowest top-level imports ({name}, not counting interpreter startup):"
+        )
+        for item in top_level[: args.limit]:
+            print(f"{item['module']:>24} {item['cumulative_us'] / 1000:>7.1f} ms")
+        print(
+            f"{'total':>24} {sum(i['cumulative_us'] for i in top_level) / 1000:>7.1f} ms"
+        )
+        print("requests imported:", "YES" if "requests" in modules else "no")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+        print(f"\nResults saved to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
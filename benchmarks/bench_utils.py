@@ -0,0 +1,40 @@
+"""
+bench_utils.py
+
+Shared helpers for the scripts in benchmarks/.
+
+- Puts the repo root on sys.path so the logger modules can be imported
+- Loads ham-radio-logger.py (its name has a dash, so it can't be imported normally)
+- Synthetic QSO logs come from synthetic_log.py
+- Times a function and records its peak memory with tracemalloc
+"""
+
+import importlib.util
+import os
+import sys
+import time
+import tracemalloc
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+
+def load_logger():
+    """Import ham-radio-logger.py and return it as a module object."""
+    path = os.path.join(REPO_ROOT, "ham-radio-logger.py")
+    spec = importlib.util.spec_from_file_location("ham_radio_logger", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def measure(func, *args, **kwargs) -> dict:
+    """Run func once and return its result, wall time and peak traced memory."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    seconds = time.perf_counter() - start
+    _current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"result": result, "seconds": seconds, "peak_bytes": peak}
@@ -0,0 +1,81 @@
+"""
+bench_xml_parse.py
+
+Compare the tree-based XML path (_parse_xml + _extract_* helpers) with the
+streaming _scan_response() on typical HamQTH responses.
+
+Usage (from repo root):
+    python benchmarks/bench_xml_parse.py [repeats]
+"""
+
+import sys
+import timeit
+
+import bench_utils  # noqa: F401  (puts the repo root on sys.path)
+
+import hamqth_api
+from tests.fake_hamqth_server import XML_HEAD, XML_TAIL
+
+SEARCH_FIELDS = {
+    "callsign": "ok7an",
+    "nick": "Petr",
+    "qth": "Neratovice",
+    "country": "Czech Republic",
+    "adif": "503",
+    "itu": "28",
+    "cq": "15",
+    "grid": "JO70HE",
+    "adr_name": "Petr Hlozek",
+    "adr_street1": "Zahradni 123",
+    "adr_city": "Neratovice",
+    "adr_zip": "27711",
+    "adr_country": "Czech Republic",
+    "lotw": "Y",
+    "qsl": "Y",
+    "qsldirect": "Y",
+    "eqsl": "Y",
+    "email": "ok7an@example.com",
+    "continent": "EU",
+    "utc_offset": "-1",
+}
+
+RESPONSES = {
+    "login": f"{XML_HEAD}<session><session_id>09b0ae90050be03c452ad235a1f2915ad684393c"
+    f"</session_id></session>{XML_TAIL}",
+    "lookup": XML_HEAD
+    + "<search>"
+    + "".join(f"<{tag}>{value}</{tag}>" for tag, value in SEARCH_FIELDS.items())
+    + "</search>"
+    + XML_TAIL,
+    "not found": f"{XML_HEAD}<session><error>Callsign not found</error>"
+    f"</session>{XML_TAIL}",
+}
+
+
+def tree_path(xml_text: str) -> dict:
+    root = hamqth_api._parse_xml(xml_text)
+    return {
+        "error": hamqth_api._extract_error_message(root),
+        "session_id": hamqth_api._extract_session_id(root),
+        "search": hamqth_api._extract_search_fields(root),
+    }
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+
+    for label, xml_text in RESPONSES.items():
+        tree = min(timeit.repeat(lambda: tree_path(xml_text), number=repeats, repeat=3))
+        scan = min(
+            timeit.repeat(
+                lambda: hamqth_api._scan_response(xml_text), number=repeats, repeat=3
+            )
+        )
+        print(
+            f"{label:>10}: tree {tree / repeats * 1e6:6.1f} us, "
+            f"scan {scan / repeats * 1e6:6.1f} us ({tree / scan:.2f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
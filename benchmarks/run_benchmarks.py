@@ -0,0 +1,263 @@
+"""
+run_benchmarks.py
+
+Time and peak memory of the logger's hot paths on synthetic logs, saved as
+JSON so results from different versions can be compared.
+
+Operations (see operations() below):
+- load_all_qsos: read the whole log into memory
+- count_qso_field: count bands while streaming the log
+- search call / band / mode / time range: handle_search_qsos with scripted
+  answers, output thrown away
+- show stats: handle_show_stats
+- "(cold)" variants remove the sidecar files (index, stats snapshot, time
+  index) before every run, so they include building them
+
+Each operation runs once as a warm-up ("first"), then REPEATS more times for
+the median. Peak memory comes from one more run under tracemalloc, kept
+separate so tracing doesn't slow the timed runs.
+
+Logs come from synthetic_log.py, so the same size and seed always give the
+same data.
+
+Usage (from repo root):
+    python benchmarks/run_benchmarks.py [size ...]        (default 10000 100000 1000000)
+        [--repeats 3] [--seed 73] [--log-dir DIR] [--output FILE]
+        [--compare OLD.json] [--threshold 1.2]
+
+- Results go to benchmarks/results/<git commit>.json unless --output is given.
+- --log-dir keeps generated logs there for the next run (10M QSOs take a
+  while to write).
+- --compare prints each operation's time against an older results file and
+  exits with status 1 if anything got slower than --threshold times.
+"""
+
+import builtins
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from bench_utils import REPO_ROOT, load_logger
+from synthetic_log import write_log
+
+import qso_index
+import qso_log
+import stats_snapshot
+import time_index
+
+RESULTS_VERSION = 1
+RESULTS_DIR = os.path.join(REPO_ROOT, "benchmarks", "results")
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+
+
+def operations(logger, log_filename: str) -> list[tuple[str, bool, object]]:
+    """Return (name, cold, zero-argument function) for each operation."""
+    last = qso_log.read_last_qsos(log_filename, 1)[0]
+    middle_day = _middle_day(log_filename)
+
+    def search(*answers):
+        return lambda: _scripted(logger.handle_search_qsos, list(answers))
+
+    return [
+        ("load_all_qsos", False, lambda: len(logger.load_all_qsos(log_filename))),
+        (
+            "count_qso_field",
+            False,
+            lambda: len(
+                logger.count_qso_field(qso_log.iter_qsos(log_filename), "band")
+            ),
+        ),
+        ("search band", True, search("2", "20M")),
+        ("search band", False, search("2", "20M")),
+        ("search call", False, search("1", last["call_sign"][:3])),
+        ("search mode", False, search("3", "FT8")),
+        ("search time range", False, search("4", middle_day, middle_day)),
+        ("show stats", True, lambda: _scripted(logger.handle_show_stats, [])),
+        ("show stats", False, lambda: _scripted(logger.handle_show_stats, [])),
+    ]
+
+
+def run_operation(func, cold_setup, repeats: int) -> dict:
+    """Time func (first run, then median of repeats) and measure its peak memory."""
+    cold_setup()
+    start = time.perf_counter()
+    result = func()
+    first = time.perf_counter() - start
+
+    runs = []
+    for _ in range(repeats):
+        cold_setup()
+        start = time.perf_counter()
+        func()
+        runs.append(time.perf_counter() - start)
+
+    cold_setup()
+    tracemalloc.start()
+    func()
+    _current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "first_seconds": first,
+        "median_seconds": statistics.median(runs) if runs else first,
+        "peak_bytes": peak,
+        "result": result,
+    }
+
+
+def run(sizes: list[int], repeats: int, seed: int, log_dir: str | None) -> dict:
+    """Run every operation on a log of each size and return the results document."""
+    logger = load_logger()
+    results = {
+        "version": RESULTS_VERSION,
+        "commit": _git_commit(),
+        "created": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": seed,
+        "repeats": repeats,
+        "results": [],
+    }
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for size in sizes:
+            log_filename = os.path.join(
+                log_dir or temp_dir, f"synthetic-{size}-{seed}.jsonl"
+            )
+            if not os.path.exists(log_filename):
+                print(f"Writing {size} QSOs to {log_filename} ...", file=sys.stderr)
+                write_log(log_filename, size, seed)
+            _drop_sidecars(log_filename)
+            logger.LOG_FILE = log_filename
+
+            print(f"\n{size} QSOs")
+            print(f"{'operation':>24} {'first':>10} {'median':>10} {'peak':>10}")
+            for name, cold, func in operations(logger, log_filename):
+                if cold:
+                    name += " (cold)"
+                    setup = lambda: _drop_sidecars(log_filename)
+                else:
+                    setup = lambda: None
+                result = run_operation(func, setup, repeats)
+                result.update({"size": size, "operation": name})
+                results["results"].append(result)
+                print(
+                    f"{name:>24} {result['first_seconds'] * 1000:>8.1f} ms"
+                    f" {result['median_seconds'] * 1000:>8.1f} ms"
+                    f" {result['peak_bytes'] / 1e6:>7.1f} MB"
+                )
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """Print median times against baseline; return the operations that got slower."""
+    old = {(entry["size"], entry["operation"]): entry for entry in baseline["results"]}
+    slower = []
+    print(f"\nCompared with {baseline.get('commit', '?')} (new / old median time)")
+    for entry in results["results"]:
+        key = (entry["size"], entry["operation"])
+        if key not in old or old[key]["median_seconds"] <= 0:
+            continue
+        ratio = entry["median_seconds"] / old[key]["median_seconds"]
+        flag = ""
+        if ratio > threshold:
+            flag = "  <-- slower"
+            slower.append(f"{entry['size']} {entry['operation']}")
+        print(f"{entry['size']:>10} {entry['operation']:>24} {ratio:>6.2f}x{flag}")
+    return slower
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark the logger's hot paths.")
+    parser.add_argument("sizes", nargs="*", type=int, help="log sizes in QSOs")
+    parser.add_argument(
+        "--repeats", type=int, default=3, help="timed runs per operation"
+    )
+    parser.add_argument("--seed", type=int, default=73, help="synthetic log seed")
+    parser.add_argument("--log-dir", help="keep generated logs here and reuse them")
+    parser.add_argument(
+        "--output", help="results file (default: benchmarks/results/<commit>.json)"
+    )
+    parser.add_argument("--compare", help="older results file to compare against")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=1.2,
+        help="slowdown that counts as a regression",
+    )
+    args = parser.parse_args()
+
+    if args.log_dir:
+        os.makedirs(args.log_dir, exist_ok=True)
+    results = run(args.sizes or DEFAULT_SIZES, args.repeats, args.seed, args.log_dir)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{results['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as file:
+        json.dump(results, file, indent=2)
+    print(f"\nResults saved to {output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as file:
+            baseline = json.load(file)
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+# -----------------------------
+# Internal helpers (private)
+# -----------------------------
+def _scripted(handler, answers: list[str]):
+    """Run a menu handler with answers for its input() calls and no printed output."""
+    answers = iter(answers)
+    real_input, real_stdout = builtins.input, sys.stdout
+    builtins.input = lambda *args: next(answers)
+    try:
+        with open(os.devnull, "w", encoding="utf-8") as sys.stdout:
+            return handler()
+    finally:
+        builtins.input, sys.stdout = real_input, real_stdout
+
+
+def _drop_sidecars(log_filename: str) -> None:
+    for filename in [
+        qso_index.index_filename(log_filename),
+        qso_index.offsets_filename(log_filename),
+        stats_snapshot.snapshot_filename(log_filename),
+        time_index.time_index_filename(log_filename),
+    ]:
+        if os.path.exists(filename):
+            os.remove(filename)
+
+
+def _middle_day(log_filename: str) -> str:
+    """Return the date ("YYYY-MM-DD") of the QSO halfway through the log."""
+    with open(log_filename, "rb") as file:
+        file.seek(os.path.getsize(log_filename) // 2)
+        file.readline()
+        qso = json.loads(file.readline())
+    return qso["timestamp"][:10]
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=REPO_ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+if __name__ == "__main__":
+    main()
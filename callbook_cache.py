@@ -0,0 +1,255 @@
+"""
+callbook_cache.py
+
+Purpose:
+- Keep HamQTH callbook results on disk (SQLite) so calls we looked up
+  recently don't go back to the network, even after a restart.
+
+What is stored (one row per normalized call sign):
+- the V1 result dict from hamqth_api.callbook_lookup(), as JSON
+- or, for calls HamQTH doesn't know, the "not found" message (a negative result)
+- when the entry expires (every entry has its own TTL)
+- when it was last used, so the least recently used entries are dropped
+  once the cache holds more than max_entries
+
+Keeping hits cheap:
+- A hit is one SELECT by primary key. Its last_used time is kept in memory
+  and written out in one batch the next time entries are stored (before
+  evicting, so eviction sees it), every LAST_USED_BATCH_SIZE hits, or on
+  close(). A crash only loses some recency, never a cached result.
+- lookup_many stores all the results it fetched in one transaction.
+
+Rules:
+- Do NOT use input() or print() in this module.
+- Only "not found" errors are cached. Network, login and other errors are
+  raised as usual and the next lookup tries again.
+"""
+
+import atexit
+import json
+import sqlite3
+import threading
+import time
+
+import hamqth_api
+from hamqth_api import HamQTHError
+
+DEFAULT_CACHE_FILE = "callbook_cache.sqlite3"
+DEFAULT_TTL_SECONDS = 30 * 24 * 3600
+DEFAULT_NEGATIVE_TTL_SECONDS = 24 * 3600
+DEFAULT_MAX_ENTRIES = 10_000
+
+# Hits whose last_used time is held in memory before it is written out anyway.
+LAST_USED_BATCH_SIZE = 1000
+
+# One open cache per file, shared by everything in this process.
+_open_caches = {}
+
+
+class CallbookCache:
+    """SQLite-backed callbook cache with per-entry TTLs and LRU eviction."""
+
+    def __init__(
+        self,
+        filename: str = DEFAULT_CACHE_FILE,
+        ttl: float = DEFAULT_TTL_SECONDS,
+        negative_ttl: float = DEFAULT_NEGATIVE_TTL_SECONDS,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ):
+        self.filename = filename
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._used = {}
+        self._db = sqlite3.connect(filename, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS callbook ("
+            " call_sign TEXT PRIMARY KEY,"
+            " result TEXT,"
+            " error TEXT,"
+            " expires_at REAL NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS callbook_last_used ON callbook (last_used)"
+        )
+        self._db.commit()
+
+    def lookup(self, call_sign: str, fetch=None) -> dict:
+        """
+        Return the callbook result for call_sign, from the cache if we can.
+
+        - fetch is called on a miss (defaults to hamqth_api.callbook_lookup)
+        - A cached "not found" raises HamQTHError just like a live lookup would
+        """
+        key = normalize_call_sign(call_sign)
+        cached = self.get(key)
+        if cached is not None:
+            result, error = cached
+            if error is not None:
+                raise HamQTHError(error)
+            return result
+
+        if fetch is None:
+            fetch = hamqth_api.callbook_lookup
+        try:
+            result = fetch(key)
+        except HamQTHError as exc:
+            if hamqth_api._is_not_found_error(str(exc)):
+                self.put_not_found(key, str(exc))
+            raise
+
+        self.put(key, result)
+        return result
+
+    def lookup_many(self, call_signs, fetch_many=None) -> dict:
+        """
+        Batch version of lookup().
+
+        - Cache hits are answered right away
+        - All misses go to fetch_many in one call (defaults to
+          hamqth_api.callbook_lookup_many, which runs them concurrently)
+        - Returns call sign -> result dict or HamQTHError, like
+          callbook_lookup_many, in the order the calls were given
+        """
+        calls = list(dict.fromkeys(normalize_call_sign(c) for c in call_signs))
+        results = {}
+        misses = []
+        for call in calls:
+            cached = self.get(call)
+            if cached is None:
+                misses.append(call)
+                continue
+            result, error = cached
+            results[call] = HamQTHError(error) if error is not None else result
+
+        if misses:
+            if fetch_many is None:
+                fetch_many = hamqth_api.callbook_lookup_many
+            entries = []
+            for call, outcome in fetch_many(misses).items():
+                if not isinstance(outcome, HamQTHError):
+                    entries.append((call, json.dumps(outcome), None, self.ttl))
+                elif hamqth_api._is_not_found_error(str(outcome)):
+                    entries.append((call, None, str(outcome), self.negative_ttl))
+                results[call] = outcome
+            self._store_many(entries)
+
+        return {call: results[call] for call in calls if call in results}
+
+    def get(self, call_sign: str) -> tuple[dict | None, str | None] | None:
+        """
+        Return (result, error) for a live entry, or None on a miss.
+
+        Exactly one of result and error is set. A hit also marks the entry as
+        recently used (in memory; see the module docstring).
+        """
+        key = normalize_call_sign(call_sign)
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT result, error, expires_at FROM callbook WHERE call_sign = ?",
+                (key,),
+            ).fetchone()
+            if row is None or row[2] <= now:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._used[key] = now
+            if len(self._used) >= LAST_USED_BATCH_SIZE:
+                self._write_used()
+                self._db.commit()
+
+        result_json, error, _expires_at = row
+        if error is not None:
+            return None, error
+        return json.loads(result_json), None
+
+    def put(self, call_sign: str, result: dict, ttl: float = None) -> None:
+        """Store a successful lookup result."""
+        if ttl is None:
+            ttl = self.ttl
+        self._store(call_sign, json.dumps(result), None, ttl)
+
+    def put_not_found(self, call_sign: str, message: str, ttl: float = None) -> None:
+        """Store a "not found" answer so we don't ask HamQTH again for a while."""
+        if ttl is None:
+            ttl = self.negative_ttl
+        self._store(call_sign, None, message, ttl)
+
+    def stats(self) -> dict:
+        """Return hit/miss counters (this process) and the number of stored entries."""
+        with self._lock:
+            (entries,) = self._db.execute("SELECT COUNT(*) FROM callbook").fetchone()
+        return {"hits": self.hits, "misses": self.misses, "entries": entries}
+
+    def close(self) -> None:
+        """Write out pending last_used times and close the database."""
+        with self._lock:
+            if self._used:
+                self._write_used()
+                self._db.commit()
+            self._db.close()
+
+    def _store(self, call_sign: str, result_json, error, ttl: float) -> None:
+        self._store_many([(call_sign, result_json, error, ttl)])
+
+    def _store_many(self, entries: list[tuple]) -> None:
+        """Store (call_sign, result_json, error, ttl) entries in one transaction."""
+        if not entries:
+            return
+        now = time.time()
+        rows = [
+            (normalize_call_sign(call_sign), result_json, error, now + ttl, now)
+            for call_sign, result_json, error, ttl in entries
+        ]
+        with self._lock:
+            for row in rows:
+                self._used.pop(row[0], None)
+            self._db.executemany(
+                "INSERT OR REPLACE INTO callbook"
+                " (call_sign, result, error, expires_at, last_used)"
+                " VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._evict()
+            self._db.commit()
+
+    def _write_used(self) -> None:
+        """Write the last_used times held in memory (caller holds the lock)."""
+        self._db.executemany(
+            "UPDATE callbook SET last_used = ? WHERE call_sign = ?",
+            [(used, key) for key, used in self._used.items()],
+        )
+        self._used.clear()
+
+    def _evict(self) -> None:
+        """Drop expired entries, then the least recently used ones over the limit."""
+        self._write_used()
+        self._db.execute("DELETE FROM callbook WHERE expires_at <= ?", (time.time(),))
+        (entries,) = self._db.execute("SELECT COUNT(*) FROM callbook").fetchone()
+        extra = entries - self.max_entries
+        if extra > 0:
+            self._db.execute(
+                "DELETE FROM callbook WHERE call_sign IN"
+                " (SELECT call_sign FROM callbook ORDER BY last_used LIMIT ?)",
+                (extra,),
+            )
+
+
+def normalize_call_sign(call_sign: str) -> str:
+    """Cache key for a call sign: trimmed and uppercased."""
+    return call_sign.strip().upper()
+
+
+def get_cache(filename: str = DEFAULT_CACHE_FILE) -> CallbookCache:
+    """Return the shared CallbookCache for filename, opening it on first use."""
+    if filename not in _open_caches:
+        cache = CallbookCache(filename)
+        atexit.register(cache.close)
+        _open_caches[filename] = cache
+    return _open_caches[filename]
@@ -0,0 +1,142 @@
+"""
+callsign_index.py
+
+Purpose:
+- Answer partial call sign searches ("5X", "W1") without testing every
+  distinct call sign in the log.
+- Built on the call_sign posting lists in the QSO index, so it maps each
+  distinct call sign to the record numbers of its QSOs.
+
+How it works:
+- Every distinct call sign is split into overlapping 2-letter pieces (bigrams).
+  "W1AW" -> "W1", "1A", "AW".
+- A search only looks at calls that contain every bigram of the search text,
+  then does the real substring check on those few candidates.
+- Prefix searches use a sorted list of calls and a binary search.
+- Building the bigrams costs more than one plain scan of the distinct calls
+  (qso_index.find_records), so it only pays off when the same process searches
+  again and again (the menu). for_index() therefore returns None for the first
+  partial search of a log, and the caller scans. From the second search on the
+  index is kept in memory, and QSOs appended later only add their new calls.
+
+Rules:
+- Do NOT use input() or print() in this module.
+"""
+
+from bisect import bisect_left
+
+GRAM_SIZE = 2
+
+# log filename -> [QSO index key, CallSignIndex or None until the 2nd search]
+_cache = {}
+
+
+class CallSignIndex:
+    """Bigram and prefix lookups over the distinct call signs of a log."""
+
+    def __init__(self, postings: dict[str, list[int]]):
+        """postings maps each stored call sign to its record numbers."""
+        self.postings = {}
+        self.grams = {}
+        self.sorted_calls = []
+        self._known = set()
+        self.update(postings)
+
+    def update(self, postings: dict[str, list[int]]) -> None:
+        """
+        Switch to newer postings (the same log after QSOs were appended).
+
+        Only calls not seen before are split into bigrams. Calls that are gone
+        (the log was rewritten) are skipped at search time.
+        """
+        self.postings = postings
+        new_calls = [call for call in postings if call not in self._known]
+        for call in new_calls:
+            for gram in _grams(call.upper()):
+                self.grams.setdefault(gram, set()).add(call)
+        if new_calls:
+            self._known.update(new_calls)
+            self.sorted_calls.extend((call.upper(), call) for call in new_calls)
+            self.sorted_calls.sort()
+
+    def matching_calls(self, text: str, prefix: bool = False) -> list[str]:
+        """
+        Return the stored call signs that contain text (or start with it).
+
+        text is compared against the uppercased call, like the search menu does.
+        """
+        text = text.upper()
+        if prefix:
+            return self._prefix_calls(text)
+
+        if len(text) < GRAM_SIZE:
+            candidates = self.postings
+        else:
+            gram_sets = [self.grams.get(gram, set()) for gram in _grams(text)]
+            gram_sets.sort(key=len)
+            candidates = set.intersection(*gram_sets)
+
+        return [
+            call
+            for call in candidates
+            if text in call.upper() and call in self.postings
+        ]
+
+    def find(self, text: str, prefix: bool = False) -> list[int]:
+        """Return the record numbers (in log order) of every matching QSO."""
+        record_numbers = []
+        for call in self.matching_calls(text, prefix):
+            record_numbers.extend(self.postings[call])
+        record_numbers.sort()
+        return record_numbers
+
+    def count(self, text: str, prefix: bool = False) -> int:
+        """Return how many QSOs match, without reading any of them."""
+        return sum(
+            len(self.postings[call]) for call in self.matching_calls(text, prefix)
+        )
+
+    def _prefix_calls(self, text: str) -> list[str]:
+        calls = []
+        position = bisect_left(self.sorted_calls, (text, ""))
+        while position < len(self.sorted_calls):
+            upper_call, call = self.sorted_calls[position]
+            if not upper_call.startswith(text):
+                break
+            if call in self.postings:
+                calls.append(call)
+            position += 1
+        return calls
+
+
+def for_index(index: dict, log_filename: str) -> CallSignIndex | None:
+    """
+    Return the CallSignIndex for a log's QSO index (see qso_index.load_index),
+    or None when a plain scan of the distinct calls is the cheaper choice.
+
+    - First partial search of this log in this process: None
+    - Later searches: the index kept in memory for this log, brought up to
+      date with any calls appended since
+    """
+    key = (index["log_size"], index["log_mtime_ns"], index["tail_check"])
+    postings = index["postings"]["call_sign"]
+
+    entry = _cache.get(log_filename)
+    if entry is None:
+        _cache[log_filename] = [key, None]
+        return None
+
+    cached_key, calls = entry
+    if calls is None:
+        calls = CallSignIndex(postings)
+    elif key != cached_key:
+        calls.update(postings)
+    _cache[log_filename] = [key, calls]
+    return calls
+
+
+# -----------------------------
+# Internal helpers (private)
+# -----------------------------
+def _grams(text: str) -> list[str]:
+    return [text[i : i + GRAM_SIZE] for i in range(len(text) - GRAM_SIZE + 1)]
@@ -0,0 +1,129 @@
+"""
+dupe_checker.py
+
+Purpose:
+- Tell the operator right away if a call was already worked on this band and
+  mode (a "dupe" in contest terms), or worked at all before.
+- A lookup normalizes the band and mode and does one set membership test, so
+  it takes a few microseconds even when the log has a million QSOs.
+
+What is kept:
+- keys: one "CALL<TAB>BAND<TAB>MODE" string per distinct combination, with
+  band and mode in canonical form (qso_normalize.normalize_qso, so a mode
+  typed into the band field of an old record counts as its mode)
+- calls: every call sign worked
+- Saved next to the JSONL log ("<log file>.dupes") with the byte offset it
+  covers, so startup only reads QSOs appended since the last save. A shrunk
+  or rewritten log is noticed (tail check) and the set is rebuilt.
+- A SQLite log already stores band and mode in canonical form, so only its
+  distinct call/band/mode rows are read (SELECT DISTINCT).
+
+An exact set is used rather than a bloom filter: the number of distinct
+call/band/mode combinations stays small enough to hold, and a dupe warning
+should never be a false alarm.
+
+Rules:
+- Do NOT use input() or print() in this module.
+"""
+
+import os
+
+import qso_log
+import qso_normalize
+import qso_repository
+
+DUPES_SUFFIX = ".dupes"
+DUPES_VERSION = 2
+DUPE_FIELDS = ("call_sign", "band", "mode")
+
+
+class DupeChecker:
+    """Set of worked (call, band, mode) combinations. Fill with add()."""
+
+    def __init__(self):
+        self.keys = set()
+        self.calls = set()
+
+    def add(self, qso: dict) -> None:
+        """Record a QSO that was just logged."""
+        call = qso.get("call_sign")
+        if not isinstance(call, str) or call.strip() == "":
+            return
+        self.keys.add(dupe_key(call, qso.get("band"), qso.get("mode")))
+        self.calls.add(call.strip().upper())
+
+    def is_dupe(self, call_sign: str, band: str, mode: str) -> bool:
+        """True if call_sign was already worked on this band and mode."""
+        return dupe_key(call_sign, band, mode) in self.keys
+
+    def worked_before(self, call_sign: str) -> bool:
+        """True if call_sign was worked before on any band or mode."""
+        return call_sign.strip().upper() in self.calls
+
+
+def dupe_key(call_sign: str, band, mode) -> str:
+    """Return the set key for a call/band/mode, normalized like the log stores them."""
+    normalized = qso_normalize.normalize_qso({"band": band, "mode": mode})
+    band = normalized["band"] if isinstance(normalized["band"], str) else ""
+    mode = normalized["mode"] if isinstance(normalized["mode"], str) else ""
+    return f"{call_sign.strip().upper()}\t{band}\t{mode}"
+
+
+def dupes_filename(log_filename: str) -> str:
+    return log_filename + DUPES_SUFFIX
+
+
+def load_dupe_checker(log_filename: str) -> DupeChecker:
+    """
+    Return a DupeChecker with every QSO in the log.
+
+    For a JSONL log the saved set is reused and only new QSOs are read; other
+    backends (SQLite) hand over their distinct call/band/mode combinations.
+    """
+    if log_filename.lower().endswith(qso_repository.SQLITE_SUFFIXES):
+        checker = DupeChecker()
+        with qso_repository.open_repository(log_filename) as log:
+            for call, band, mode in log.distinct(DUPE_FIELDS):
+                checker.add({"call_sign": call, "band": band, "mode": mode})
+        return checker
+
+    checker, covered, tail_check = _read_saved(dupes_filename(log_filename))
+    if not os.path.exists(log_filename):
+        return DupeChecker()
+
+    size = os.path.getsize(log_filename)
+    if not qso_log.log_only_grew(log_filename, covered, tail_check, size):
+        checker, covered = DupeChecker(), 0
+    if size == covered:
+        return checker
+
+    covered = qso_log.fold_records(
+        log_filename, covered, size, lambda _offset, qso: checker.add(qso)
+    )
+    _save(checker, log_filename, covered)
+    return checker
+
+
+# -----------------------------
+# Internal helpers (private)
+# -----------------------------
+def _read_saved(filename: str) -> tuple[DupeChecker, int, str]:
+    """Return (checker, covered offset, tail check) from the saved file, or an empty one."""
+    checker = DupeChecker()
+    saved = qso_log.read_sidecar(filename, DUPES_VERSION)
+    if saved is None:
+        return checker, 0, ""
+    checker.keys = set(saved["keys"])
+    checker.calls = set(saved["calls"])
+    return checker, saved["log_size"], saved["tail_check"]
+
+
+def _save(checker: DupeChecker, log_filename: str, covered: int) -> None:
+    saved = {
+        "version": DUPES_VERSION,
+        "log_size": covered,
+        "tail_check": qso_log.tail_check(log_filename, covered),
+        "keys": sorted(checker.keys),
+        "calls": sorted(checker.calls),
+    }
+    qso_log.write_sidecar(dupes_filename(log_filename), saved)
@@ -0,0 +1,237 @@
+"""
+enrichment.py
+
+Purpose:
+- Fill in callbook details (name, country, CQ zone, ITU zone) for the QSOs in
+  the log without anyone looking them up by hand.
+- Runs as its own step, separate from logging, and can be stopped and
+  restarted at any point without fetching the same call twice.
+
+How it works:
+- The log is streamed once to collect the distinct call signs that have no
+  callbook data yet. Later runs only read the QSOs appended since then. A
+  SQLite log is asked for its distinct call signs instead (qso_repository).
+- Those calls are fetched in batches through the callbook cache
+  (callbook_cache.lookup_many -> hamqth_api.callbook_lookup_many).
+- Each batch of results is appended to a sidecar next to the log:
+  "<log file>.callbook.jsonl", one line per call sign. The log itself is
+  never rewritten.
+- A checkpoint ("<log file>.enrich.json") remembers how far the log has been
+  scanned and which calls are still waiting to be fetched.
+
+Calls that failed for a reason other than "not found" (network, login) are
+kept as pending and retried on the next run.
+
+Usage (from repo root):
+    python enrichment.py [--log qsolog.jsonl] [--limit 500]
+"""
+
+import json
+import os
+
+import callbook_cache
+import hamqth_api
+import qso_log
+import qso_repository
+import qso_writer
+from hamqth_api import HamQTHError
+
+SIDECAR_SUFFIX = ".callbook.jsonl"
+CHECKPOINT_SUFFIX = ".enrich.json"
+CHECKPOINT_VERSION = 1
+DEFAULT_BATCH_SIZE = 50
+
+# Callbook fields copied onto QSOs by iter_enriched_qsos().
+ENRICH_FIELDS = ["name", "country", "cq_zone", "itu_zone"]
+
+
+def sidecar_filename(log_filename: str) -> str:
+    return log_filename + SIDECAR_SUFFIX
+
+
+def checkpoint_filename(log_filename: str) -> str:
+    return log_filename + CHECKPOINT_SUFFIX
+
+
+def enrich_log(
+    log_filename: str,
+    lookup_many=None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    limit: int = None,
+) -> dict:
+    """
+    Fetch callbook data for every call in the log that doesn't have any yet.
+
+    - lookup_many(calls) -> {call: result or HamQTHError}; defaults to the
+      shared callbook cache
+    - batch_size calls are fetched and saved at a time
+    - limit stops after that many calls, so a big log can be done a piece
+      at a time
+
+    Returns counts: fetched, not_found, failed, remaining.
+    """
+    if lookup_many is None:
+        lookup_many = callbook_cache.get_cache().lookup_many
+
+    done = load_callbook_data(log_filename)
+    pending = _scan_for_new_calls(log_filename, done)
+
+    summary = {"fetched": 0, "not_found": 0, "failed": 0, "remaining": 0}
+    to_fetch = pending if limit is None else pending[:limit]
+    failed = []
+
+    with qso_writer.QSOWriter(sidecar_filename(log_filename)) as sidecar:
+        for start in range(0, len(to_fetch), max(1, batch_size)):
+            batch = to_fetch[start : start + batch_size]
+            for call, outcome in lookup_many(batch).items():
+                if not isinstance(outcome, HamQTHError):
+                    sidecar.write(dict(outcome, call_sign=call))
+                    summary["fetched"] += 1
+                elif hamqth_api._is_not_found_error(str(outcome)):
+                    sidecar.write({"call_sign": call, "not_found": True})
+                    summary["not_found"] += 1
+                else:
+                    failed.append(call)
+                    summary["failed"] += 1
+
+            # Results are on disk before the checkpoint says they're done.
+
+            sidecar.flush()
+            remaining = (
+                failed + to_fetch[start + batch_size :] + pending[len(to_fetch) :]
+            )
+            _save_pending(log_filename, remaining)
+
+    summary["remaining"] = len(failed) + len(pending) - len(to_fetch)
+    return summary
+
+
+def load_callbook_data(log_filename: str) -> dict:
+    """Return call sign -> saved callbook data from the sidecar."""
+    data = {}
+    for record in qso_log.iter_qsos(sidecar_filename(log_filename)):
+        data[record["call_sign"]] = record
+    return data
+
+
+def iter_enriched_qsos(log_filename: str):
+    """
+    Yield the log's QSOs with callbook fields filled in from the sidecar.
+
+    Fields the operator already entered on a QSO are never overwritten.
+    """
+    data = load_callbook_data(log_filename)
+    with qso_repository.open_repository(log_filename) as log:
+        for qso in log.iter_qsos():
+            found = data.get(str(qso.get("call_sign", "")).strip().upper())
+            if found is not None:
+                for field_name in ENRICH_FIELDS:
+                    if field_name in found and not qso.get(field_name):
+                        qso[field_name] = found[field_name]
+            yield qso
+
+
+def write_enriched_log(log_filename: str, output_filename: str) -> int:
+    """Write a copy of the log with callbook fields filled in. Returns the QSO count."""
+    count = 0
+    with open(output_filename, "w", encoding="utf-8") as file:
+        for qso in iter_enriched_qsos(log_filename):
+            file.write(json.dumps(qso) + "\n")
+            count += 1
+    return count
+
+
+# -----------------------------
+# Internal helpers (private)
+# -----------------------------
+def _scan_for_new_calls(log_filename: str, done: dict) -> list[str]:
+    """
+    Return the calls still waiting for callbook data, oldest first.
+
+    Only the part of the log appended since the last run is read. The
+    checkpoint is saved before returning.
+    """
+    checkpoint = _read_checkpoint(log_filename)
+    start = checkpoint["log_size"]
+    pending = list(checkpoint["pending"])
+
+    if not os.path.exists(log_filename):
+        return [call for call in pending if call not in done]
+
+    seen = set(pending)
+
+    def add(call) -> None:
+        if not isinstance(call, str):
+            return
+        call = call.strip().upper()
+        if call and call not in done and call not in seen:
+            seen.add(call)
+            pending.append(call)
+
+    if log_filename.lower().endswith(qso_repository.SQLITE_SUFFIXES):
+        with qso_repository.open_repository(log_filename) as log:
+            for (call,) in log.distinct(("call_sign",)):
+                add(call)
+        pending = [call for call in pending if call not in done]
+        _write_checkpoint(log_filename, 0, pending)
+        return pending
+
+    size = os.path.getsize(log_filename)
+    if not qso_log.log_only_grew(log_filename, start, checkpoint["tail_check"], size):
+
+        # The log was rewritten, so look at all of it again.
+
+        start = 0
+
+    covered = qso_log.fold_records(
+        log_filename, start, size, lambda _offset, qso: add(qso.get("call_sign"))
+    )
+    pending = [call for call in pending if call not in done]
+    _write_checkpoint(log_filename, covered, pending)
+    return pending
+
+
+def _read_checkpoint(log_filename: str) -> dict:
+    checkpoint = qso_log.read_sidecar(
+        checkpoint_filename(log_filename), CHECKPOINT_VERSION
+    )
+    if checkpoint is None:
+        return {"log_size": 0, "tail_check": "", "pending": []}
+    return checkpoint
+
+
+def _write_checkpoint(log_filename: str, covered: int, pending: list[str]) -> None:
+    checkpoint = {
+        "version": CHECKPOINT_VERSION,
+        "log_size": covered,
+        "tail_check": qso_log.tail_check(log_filename, covered),
+        "pending": pending,
+    }
+    qso_log.write_sidecar(checkpoint_filename(log_filename), checkpoint)
+
+
+def _save_pending(log_filename: str, pending: list[str]) -> None:
+    """Update just the pending list in the checkpoint."""
+    checkpoint = _read_checkpoint(log_filename)
+    _write_checkpoint(log_filename, checkpoint["log_size"], pending)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Fill callbook data into the log.")
+    parser.add_argument(
+        "--log", default="qsolog.jsonl", help="QSO log (JSONL or SQLite)"
+    )
+    parser.add_argument("--limit", type=int, default=None, help="max calls this run")
+    args = parser.parse_args()
+
+    summary = enrich_log(args.log, limit=args.limit)
+    print(
+        f"Fetched {summary['fetched']}, not found {summary['not_found']}, "
+        f"failed {summary['failed']}, still to do {summary['remaining']}."
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -8,12 +8,28 @@ QSO prompts, stats, etc.) need to be implemented in the TODOs.
 
 import json  # will be useful later
 import os  # will be useful later
+import sys
 from collections import Counter
-
-# For now, keep the log file simple and in the same folder
+from collections.abc import Iterable
+
+import dupe_checker
+import instrumentation
+import qso_log
+import qso_normalize
+import qso_repository
+import qso_stats
+import time_index
+
+# For now, keep the log file simple and in the same folder.
+# Name it "qsolog.sqlite3" instead to keep the log in SQLite
+# (python qso_repository.py migrate qsolog.jsonl qsolog.sqlite3 copies it over).
 LOG_FILE = "qsolog.jsonl"
+CALLBOOK_CACHE_FILE = "callbook_cache.sqlite3"
 MY_CALL = "AG5XY"
 
+# Worked call/band/mode combinations, loaded once at startup (see main()).
+DUPE_CHECKER = None
+
 
 def ensure_log_file_exists() -> None:
     """
@@ -25,24 +41,31 @@ def ensure_log_file_exists() -> None:
         open(LOG_FILE, "a", encoding="utf-8").close()
 
 
+@instrumentation.timed("load_all_qsos")
 def load_all_qsos(filename: str) -> list[dict]:
+    """
+    Return every QSO in the log as a list of dicts.
+
+    Prefer qso_log.iter_qsos() for anything that can work one QSO at a time,
+    since this keeps the whole log in memory.
+    """
+
+    # iter_qsos skips blank lines and returns nothing if the file doesn't exist.
 
-    qso_list = []
+    return list(qso_log.iter_qsos(filename))
 
-    # First see if file exists, and if not return an empty list
 
-    if not os.path.exists(filename):
-        return qso_list
+def get_dupe_checker() -> dupe_checker.DupeChecker:
+    """Return the dupe checker for LOG_FILE, loading it the first time."""
+    global DUPE_CHECKER
+    if DUPE_CHECKER is None:
+        DUPE_CHECKER = dupe_checker.load_dupe_checker(LOG_FILE)
+    return DUPE_CHECKER
 
-    # Now, get the lines, strip them, and add them to list if not blank.
 
-    with open(filename, "r", encoding="utf-8") as file:
-        for line in file:
-            line = line.strip()
-            if line == "":
-                continue
-            qso_list.append(json.loads(line))
-    return qso_list
+def open_log() -> qso_repository.QSORepository:
+    """Open LOG_FILE with the storage backend its file name calls for."""
+    return qso_repository.open_repository(LOG_FILE)
 
 
 def show_main_menu() -> str:
@@ -72,13 +95,17 @@ def print_qso(qso: dict) -> None:
         print(f"{label}: {value}")
 
 
+@instrumentation.timed("handle_log_new_qso")
 def handle_log_new_qso() -> None:
     """
     - Prompt the user for QSO fields (their_call, band, etc.)
-    - Build a dict with the QSO data
+    - Build a dict with the QSO data, stamped with the current UTC time
     - Append it as a JSON line to LOG_FILE if the user wants, if not, return to main menu.
     """
 
+    # The QSO is happening now, so take the time before the questions start.
+
+    qso_time = time_index.utc_timestamp()
     qso = {}
     print("Enter their call sign:")
     their_call = input().strip().upper()
@@ -98,14 +125,37 @@ def handle_log_new_qso() -> None:
     print("Enter any other comments you want to about this QSO (Enter for none):")
     comments = input().strip()
     qso["comments"] = comments
+    qso["timestamp"] = qso_time
+
+    # Band and mode are saved in one canonical spelling ("20 m" -> "20M"), so
+    # show the user what will actually be stored.
+
+    qso = qso_normalize.normalize_qso(qso)
     print()
     print("Thank you. Here is what you entered. ")
     print_qso(qso)
+
+    # Warn about dupes before the user decides to save.
+
+    checker = get_dupe_checker()
+    if checker.is_dupe(qso["call_sign"], qso["band"], qso["mode"]):
+        print(
+            "DUPE: "
+            + qso["call_sign"]
+            + " is already in the log on "
+            + (qso["band"] + " " + qso["mode"]).strip()
+            + "."
+        )
+    elif checker.worked_before(qso["call_sign"]):
+        print("Worked " + qso["call_sign"] + " before, but not on this band and mode.")
     print("Save to log file Y/N?")
     write_to_log = input().strip().upper()
     if write_to_log == "Y":
-        with open(LOG_FILE, "a", encoding="utf-8") as file:
-            file.write(json.dumps(qso) + "\n")
+        # The repository writes the QSO safely and keeps its indexes current.
+
+        with open_log() as log:
+            log.append(qso)
+        checker.add(qso)
         print("QSO saved. Returning to main menu")
     elif write_to_log == "N":
         print("QSO not saved. Returning to main menu")
@@ -114,6 +164,7 @@ def handle_log_new_qso() -> None:
     return None
 
 
+@instrumentation.timed("handle_list_recent_qsos")
 def handle_list_recent_qsos() -> None:
     """
     Fundtion to  print last n QSOs
@@ -138,17 +189,19 @@ def handle_list_recent_qsos() -> None:
     print("Attemptint to print the last " + str(num_qsos) + " QSOs")
     print()
 
-    qso_list = load_all_qsos(LOG_FILE)
-    if qso_list:
+    # Only the last QSOs get read (the JSONL log is read backward from the end).
 
-        # OK, we have some to print, do a slice on the list and print them:
+    with open_log() as log:
+        recent_qsos = log.recent(num_qsos)
+    if recent_qsos:
 
-        if num_qsos > len(qso_list):
+        # OK, we have some to print. If we got fewer than asked, the file is short.
+
+        if num_qsos > len(recent_qsos):
             print("Sorry, there are not " + str(num_qsos) + " in the file")
-            num_qsos = len(qso_list)
+            num_qsos = len(recent_qsos)
             print("Printing last " + str(num_qsos) + " instead:")
 
-        recent_qsos = qso_list[-num_qsos:]
         for qso in recent_qsos:
             print_qso(qso)
     else:
@@ -156,6 +209,7 @@ def handle_list_recent_qsos() -> None:
     return None
 
 
+@instrumentation.timed("handle_search_qsos")
 def handle_search_qsos() -> None:
     """
     Functionfor searching QSOs.
@@ -165,16 +219,23 @@ def handle_search_qsos() -> None:
     - If found, print all instances and then total.
     """
     print()
-    search_list = load_all_qsos(LOG_FILE)
-    if not search_list:
-        print("No QSOs to search. Returning to main menu.")
-        return None
+    with open_log() as log:
+        if log.qso_count() == 0:
+            print("No QSOs to search. Returning to main menu.")
+            return None
+        search_log(log)
+    return None
+
+
+def search_log(log: qso_repository.QSORepository) -> None:
+    """Show the search menu and print the QSOs in log that match."""
 
     # Print the search menu.
 
     print("Type 1 to search by call sign.")
     print("Type 2 to search by band")
     print("Type 3 to search by mode.")
+    print("Type 4 to search by date/time (UTC).")
     print("Enter choice:")
     search_choice = input().strip()
     if search_choice == "1":
@@ -186,15 +247,19 @@ def handle_search_qsos() -> None:
         print("Be careful. Ttyping one letter could get you a lot of calls:")
         search_call = input().strip().upper()
 
-        # Loop through list and count the QSOs by accessing each dictionary
-        # A match counts if we have a partial match (contains substring)
+        # A match counts if we have a partial match (contains substring).
+        # The log's index narrows it down, so only the matching QSOs are read.
+        # An empty search matches everything, even QSOs with no call sign.
+
+        if search_call == "":
+            matches = log.iter_qsos()
+        else:
+            matches = log.search("call_sign", search_call, partial=True)
 
         qso_counter = 0
-        for qso in search_list:
-            stored_value = qso.get("call_sign", "").upper()
-            if search_call in stored_value:
-                print_qso(qso)
-                qso_counter += 1
+        for qso in matches:
+            print_qso(qso)
+            qso_counter += 1
         if qso_counter > 0:
             print(
                 "Found " + str(qso_counter) + " instances of " + str(search_call) + "."
@@ -203,15 +268,15 @@ def handle_search_qsos() -> None:
             print("Call sign " + search_call + " not found.")
     elif search_choice == "2":
         print("Enter band to search for (will only do exact matches here):")
-        search_band = input().strip().upper()
+        search_band = qso_normalize.normalize_band(input())[0]
 
-        # Loop through list and count the QSOs by accessing each dictionary
+        # Bands are stored in canonical form, so "20 m" or "14.074" typed here
+        # becomes "20M" and is one exact lookup in the index.
 
         qso_counter = 0
-        for qso in search_list:
-            if qso.get("band") == search_band:
-                print_qso(qso)
-                qso_counter += 1
+        for qso in log.search("band", search_band):
+            print_qso(qso)
+            qso_counter += 1
         if qso_counter > 0:
             print(
                 "Found "
@@ -226,15 +291,15 @@ def handle_search_qsos() -> None:
     elif search_choice == "3":
 
         print("Enter mode to search for (will only do exact matches here):")
-        search_mode = input().strip().upper()
+        search_mode = qso_normalize.normalize_mode(input())
 
-        # Loop through list and count the QSOs by accessing each dictionary
+        # Modes are stored in canonical form too ("ft-8" -> "FT8"), so this is
+        # one exact lookup in the index.
 
         qso_counter = 0
-        for qso in search_list:
-            if qso.get("mode") == search_mode:
-                print_qso(qso)
-                qso_counter += 1
+        for qso in log.search("mode", search_mode):
+            print_qso(qso)
+            qso_counter += 1
         if qso_counter > 0:
             print(
                 "Found "
@@ -246,16 +311,62 @@ def handle_search_qsos() -> None:
         else:
             print("Nothing found for mode " + str(search_mode) + ".")
 
+    elif search_choice == "4":
+        search_time_range(log)
+
     else:
         print("You have entered an invalid search choice. Returning to main menu")
     return None
 
 
-def count_qso_field(qso_list: list[dict], field_name: str) -> Counter:
+def search_time_range(log: qso_repository.QSORepository) -> None:
+    """
+    Print the QSOs between two UTC dates/times, then QSOs per day and the
+    busiest hours in that range.
+    """
+    print(
+        "Enter start date (YYYY-MM-DD, or YYYY-MM-DD HH:MM), Enter for the beginning:"
+    )
+    start_text = input().strip()
+    print("Enter end date (YYYY-MM-DD includes that whole day), Enter for now:")
+    end_text = input().strip()
+    try:
+        start = time_index.parse_time_bound(start_text) if start_text else None
+        end = time_index.parse_time_bound(end_text, end=True) if end_text else None
+    except ValueError:
+        print("Dates must look like 2024-06-22 or 2024-06-22 18:30.")
+        return None
+
+    # The time index jumps straight to the first QSO in range, so only that
+    # part of the log is read. Each QSO is counted as it is printed, so a
+    # wide range never has to be held in memory.
+
+    found = 0
+    rates = qso_stats.count_rates([])
+    for qso in log.time_range(start, end):
+        print_qso(qso)
+        found += 1
+        qso_stats.add_rates(rates, qso)
+    if found == 0:
+        print("No QSOs with a date in that range.")
+        return None
+
+    print("Found " + str(found) + " QSOs in that range.")
+    print()
+    print("QSOs per day (UTC):")
+    for day, value in sorted(rates["days"].items()):
+        print(day + " : " + str(value))
+    print("Busiest hours (UTC):")
+    for hour, value in rates["hours"].most_common(5):
+        print(hour + ":00 : " + str(value))
+    return None
+
+
+def count_qso_field(qso_list: Iterable[dict], field_name: str) -> Counter:
     """
     Count occurrences of a given field across all QSOs.
 
-    - Iterates through the QSO list
+    - Iterates through the QSOs (a list, or a generator like qso_log.iter_qsos)
     - Extracts the specified field from each QSO
     - Normalizes values (strip + uppercase)
     - Returns a Counter of field values
@@ -271,58 +382,72 @@ def count_qso_field(qso_list: list[dict], field_name: str) -> Counter:
     return counter
 
 
+@instrumentation.timed("handle_show_stats")
 def handle_show_stats() -> None:
     """
-    - Load all QSOs from LOG_FILE
+    - Get the counters from the log's repository. For the JSONL log that is the
+      saved stats snapshot (stats_snapshot), which only counts QSOs appended
+      since last time; SQLite answers with GROUP BY queries.
     - Use collections.Counter to summarize:
         - Total QSOs
         - At least top 10 call signs
         - At least top 5bands
         - At least top 5 modes.
+        - Top 5 band and mode combinations
+        - Busiest days (only for QSOs that have a timestamp)
     - Print the results in a simple text format
     """
 
     print()
     print("Here is a summary of your log's statistics:")
-    qso_list = load_all_qsos(LOG_FILE)
-    if qso_list == []:
+    with open_log() as log:
+        stats = log.stats()
+    if stats.total == 0:
         print("no QSOs to run statistics on, returning to main menu.")
         return None
 
-    total_qsos = len(qso_list)
-    print("Total number of QSOs is " + str(total_qsos))
+    print("Total number of QSOs is " + str(stats.total))
     print()
     print("Here are the most common call signs in your log:")
-    call_counter = count_qso_field(qso_list, "call_sign")
-    call_list = call_counter.most_common(10)
-    for call, value in call_list:
+    for call, value in stats.top("calls", 10):
         print(str(call) + " : " + str(value))
     print("Here are the most common bands in your log:")
-    band_counter = count_qso_field(qso_list, "band")
-    band_list = band_counter.most_common(5)
-    for band, value in band_list:
+    for band, value in stats.top("bands", 5):
         print(str(band) + " : " + str(value))
     print()
     print("Here are the most common modes in your log")
-    mode_counter = count_qso_field(qso_list, "mode")
-    mode_list = mode_counter.most_common(5)
-    for mode, value in mode_list:
+    for mode, value in stats.top("modes", 5):
         print(str(mode) + " : " + str(value))
+    print()
+    print("Here are the most common band and mode combinations in your log")
+    for (band, mode), value in stats.top("band_modes", 5):
+        print((band + " " + mode).strip() + " : " + str(value))
+    if stats.days:
+        print()
+        print("Here are your busiest days (UTC)")
+        for day, value in stats.top("days", 5):
+            print(str(day) + " : " + str(value))
     return None
 
 
+@instrumentation.timed("handle_hamqth_callbook_lookup")
 def handle_hamqth_callbook_lookup() -> None:
     """
-    Stub handler for HamQTH callbook lookup.
+    Look up a call sign in the HamQTH callbook and print what we get back.
 
-    Future behavior:
     - Prompt for a callsign
-    - Call hamqth_api.callbook_lookup(callsign)
-    - Display selected callbook fields
-
-    For now:
-    - Just collect input and confirm flow works
+    - Look it up through the local callbook cache, which only calls
+      hamqth_api.callbook_lookup(callsign) when it doesn't have a fresh answer
+    - Display the callbook fields, one label per line
+    - Any HamQTHError is shown as a friendly message
+
+    The callbook modules are imported here, the first time this runs, not at
+    startup: hamqth_api pulls in requests (urllib3, charset_normalizer, ...),
+    which takes longer to load than everything else the logger needs.
     """
+    import callbook_cache
+    import hamqth_api
+
     print()
     print("HamQTH Callbook Lookup")
     print("Enter callsign to look up:")
@@ -332,8 +457,13 @@ def handle_hamqth_callbook_lookup() -> None:
         print("No callsign entered. Returning to main menu.")
         return None
 
-    # Placeholder until API logic is implemented
-    print(f"(Stub) Would look up HamQTH callbook info for {call_sign}.")
+    try:
+        result = callbook_cache.get_cache(CALLBOOK_CACHE_FILE).lookup(call_sign)
+    except hamqth_api.HamQTHError as exc:
+        print(str(exc))
+        return None
+
+    print(hamqth_api.format_callbook_result(result))
     return None
 
 
@@ -344,6 +474,7 @@ def main():
     """
     print("Welcome to the Ham Radio Logger by " + MY_CALL + "!")
     ensure_log_file_exists()
+    get_dupe_checker()
 
     # Main loop
     while True:
@@ -368,4 +499,15 @@ def main():
 
 
 if __name__ == "__main__":
+    # With arguments ("stats --json", "log < qsos.jsonl", ...) run that one
+    # command instead of the menu. See logger_cli.py.
+
+    if len(sys.argv) > 1:
+        import logger_cli
+
+        sys.exit(
+            logger_cli.main(
+                sys.argv[1:], log_file=LOG_FILE, cache_file=CALLBOOK_CACHE_FILE
+            )
+        )
     main()
@@ -14,15 +14,20 @@ Rules:
 Public interface (what your main program will import/use):
 - HamQTHError
 - callbook_lookup(call_sign: str) -> dict
+- callbook_lookup_many(call_signs) -> dict
+- format_callbook_result(result: dict) -> str
 """
 
-# TODO: Imports you will likely need:
-# - datetime/time (for session expiry)
-
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
 import xml.etree.ElementTree as ET
 
+import instrumentation
+
 
 class HamQTHError(Exception):
     """Raised for any user-facing HamQTH error."""
@@ -31,20 +36,42 @@ class HamQTHError(Exception):
 # -----------------------------
 # Configuration / constants
 # -----------------------------
-# TODO: Put HamQTH endpoints here (login URL, lookup URL).
-# TODO: Put session lifetime seconds here (about 3600).
-# TODO: Put a short PROGRAM_NAME string here.
+# Login and lookup both go to the same XML endpoint.
+HAMQTH_XML_URL = "https://www.hamqth.com/xml.php"
+
+# HamQTH session ids are good for about an hour. Renew a little early so a
+# lookup never goes out with an id that is about to expire.
+SESSION_LIFETIME_SECONDS = 3600
+SESSION_RENEW_MARGIN_SECONDS = 60
+
+PROGRAM_NAME = "ham-radio-logger"
 
 ENV_HAMQTH_USER = "HAMQTH_USER"
 ENV_HAMQTH_PASS = "HAMQTH_PASS"
 HTTP_TIMEOUT_SECONDS = 10
 
+# Batch lookups: how many requests run at once, and how fast we let them go.
+# HamQTH is a free service, so the default rate stays polite.
+BATCH_MAX_WORKERS = 8
+BATCH_RATE_PER_SECOND = 5.0
+BATCH_BURST = 5
+
+# Responses are fed to the XML parser this many characters at a time, so it
+# can stop as soon as it has seen the part we need.
+XML_FEED_CHUNK_SIZE = 1024
+
 
 # -----------------------------
 # Module state (session cache)
 # -----------------------------
-# TODO: Store session id and expiry here.
-# Example idea:
+# One requests.Session for the whole program, so lookups reuse the same
+# keep-alive connection instead of doing a new TCP/TLS handshake each time.
+_HTTP_SESSION = requests.Session()
+
+# The HamQTH session id and when (time.monotonic()) we stop trusting it.
+_session_id = None
+_session_expires_at = 0.0
+_session_lock = threading.Lock()
 
 
 # -----------------------------
@@ -75,16 +102,103 @@ def callbook_lookup(call_sign: str) -> dict:
         - callsign not found
         - response format is unexpected
     """
-    # TODO:
-    # 1) Validate + normalize call_sign
-    # 2) Ensure session id exists and is valid
-    # 3) Make lookup request
-    # 4) Parse XML response
-    # 5) Detect "invalid session" -> refresh session and retry once
-    # 6) Detect "not found" -> raise HamQTHError
-    # 7) Extract fields + normalize into V1 dict
-    # 8) Return dict
-    raise NotImplementedError
+
+    # Validate + normalize the call sign before we touch the network.
+
+    call_sign = _require_text(call_sign, "call sign").upper()
+
+    session_id = _get_session_id()
+    response = _lookup_response(session_id, call_sign)
+    err_msg = response["error"]
+
+    # An expired/invalid session gets one fresh login and one retry.
+
+    if err_msg is not None and _is_session_error(err_msg):
+        _clear_session(session_id)
+        session_id = _get_session_id()
+        response = _lookup_response(session_id, call_sign)
+        err_msg = response["error"]
+
+    if err_msg is not None:
+        if _is_not_found_error(err_msg):
+            raise HamQTHError(f"Call sign {call_sign} not found in HamQTH.")
+        raise HamQTHError(f"HamQTH lookup failed: {err_msg}")
+
+    raw = response["search"]
+    if not raw:
+        raise HamQTHError("Unexpected response from HamQTH (no search result).")
+
+    return _normalize_search_fields(raw, call_sign)
+
+
+def callbook_lookup_many(
+    call_signs,
+    max_workers: int = BATCH_MAX_WORKERS,
+    rate_per_second: float | None = BATCH_RATE_PER_SECOND,
+    burst: int = BATCH_BURST,
+) -> dict:
+    """
+    Look up many call signs at once.
+
+    - Call signs are normalized (strip + uppercase) and duplicates are looked
+      up only once
+    - All requests share one session id and the pooled HTTP connections
+    - Up to max_workers requests run at the same time on a thread pool
+    - rate_per_second / burst set a token-bucket limit on how fast requests
+      start (None means no limit)
+
+    Output:
+    - dict of normalized call sign -> V1 result dict, or the HamQTHError for
+      that call. One bad call never stops the others.
+    """
+    unique_calls = list(dict.fromkeys(call.strip().upper() for call in call_signs))
+    if not unique_calls:
+        return {}
+
+    # Log in once up front so the worker threads don't each need to.
+    # If that fails, every call gets the same error.
+
+    try:
+        _get_session_id()
+    except HamQTHError as exc:
+        return {call: exc for call in unique_calls}
+
+    bucket = None
+    if rate_per_second:
+        bucket = _TokenBucket(rate_per_second, burst)
+
+    def lookup_one(call_sign: str):
+        if bucket is not None:
+            bucket.acquire()
+        try:
+            return callbook_lookup(call_sign)
+        except HamQTHError as exc:
+            return exc
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        results = pool.map(lookup_one, unique_calls)
+        return dict(zip(unique_calls, results))
+
+
+def format_callbook_result(result: dict) -> str:
+    """
+    Turn a callbook_lookup() result into label-per-line text.
+
+    Fields that are missing are left out. QTH combines city and state.
+    """
+    lines = ["Callsign: " + result["call_sign"]]
+    if result.get("name"):
+        lines.append("Name: " + result["name"])
+    qth = ", ".join(part for part in [result.get("city"), result.get("state")] if part)
+    if qth:
+        lines.append("QTH: " + qth)
+    if result.get("country"):
+        lines.append("Country: " + result["country"])
+    if result.get("cq_zone"):
+        lines.append("CQ Zone: " + result["cq_zone"])
+    if result.get("itu_zone"):
+        lines.append("ITU Zone: " + result["itu_zone"])
+    return "\n".join(lines)
 
 
 # -----------------------------
@@ -119,33 +233,135 @@ def _load_credentials() -> tuple[str, str]:
 
 
 def _get_session_id() -> str:
-    """TODO: Return cached session id if valid, otherwise log in and cache a new one."""
-    raise NotImplementedError
+    """
+    Return the cached session id if it is still valid, otherwise log in.
+
+    The lock makes sure threads that all find the cache empty wait for one
+    login instead of each logging in.
+    """
+    with _session_lock:
+        if _session_id is not None and time.monotonic() < _session_expires_at:
+            return _session_id
+        return _login_and_create_session()
 
 
 def _login_and_create_session() -> str:
-    """TODO: Make login request, parse XML, cache session id + expiry, return session id."""
-    raise NotImplementedError
+    """Log in to HamQTH, cache the new session id + expiry, and return the id."""
+    global _session_id, _session_expires_at
+
+    user_name, user_pw = _load_credentials()
+    response = _scan_response(_http_get(HAMQTH_XML_URL, {"u": user_name, "p": user_pw}))
 
+    err_msg = response["error"]
+    if err_msg is not None:
+        raise HamQTHError(f"HamQTH login failed: {err_msg}")
 
+    session_id = response["session_id"]
+    if session_id is None:
+        raise HamQTHError("HamQTH login failed: no session id in the response.")
+
+    _session_id = session_id
+    _session_expires_at = (
+        time.monotonic() + SESSION_LIFETIME_SECONDS - SESSION_RENEW_MARGIN_SECONDS
+    )
+    return session_id
+
+
+def _clear_session(session_id: str) -> None:
+    """Forget session_id, unless another thread already replaced it."""
+    global _session_id, _session_expires_at
+
+    with _session_lock:
+        if _session_id == session_id:
+            _session_id = None
+            _session_expires_at = 0.0
+
+
+def _lookup_response(session_id: str, call_sign: str) -> dict:
+    """Run one lookup request and return the scanned response (see _scan_response)."""
+    params = {"id": session_id, "callsign": call_sign, "prg": PROGRAM_NAME}
+    return _scan_response(_http_get(HAMQTH_XML_URL, params))
+
+
+@instrumentation.timed("hamqth_api._http_get")
 def _http_get(url: str, params: dict) -> str:
     try:
-        response = requests.get(url, params=params, timeout=HTTP_TIMEOUT_SECONDS)
+        response = _HTTP_SESSION.get(url, params=params, timeout=HTTP_TIMEOUT_SECONDS)
     except requests.exceptions.RequestException as exc:
         raise HamQTHError("Network error contacting HamQTH.") from exc
 
     if response.status_code != 200:
         raise HamQTHError(f"HTTP error from HamQTH (status {response.status_code}).")
 
+    if instrumentation.ENABLED:
+        instrumentation.add("hamqth_api._http_get", bytes_read=len(response.content))
     return response.text
 
 
+@instrumentation.timed("hamqth_api._scan_response")
+def _scan_response(xml_text: str) -> dict:
+    """
+    Pull the error, session_id and <search> fields out of a HamQTH response.
+
+    Gives the same answers as _parse_xml() followed by _extract_error_message(),
+    _extract_session_id() and _extract_search_fields(), but in one streaming
+    pass with no namespace rewrite or XPath searches. Parsing stops as soon
+    as an error, the end of <session> or the end of <search> has been seen.
+
+    Returns {"error": str | None, "session_id": str | None, "search": dict}.
+    """
+    found = {"error": None, "session_id": None, "search": {}}
+    error_seen = False
+    session_id_seen = False
+
+    parser = ET.XMLPullParser(events=("end",))
+    try:
+        for start in range(0, len(xml_text), XML_FEED_CHUNK_SIZE):
+            parser.feed(xml_text[start : start + XML_FEED_CHUNK_SIZE])
+            for _event, element in parser.read_events():
+                tag = element.tag.rpartition("}")[2]
+
+                # Like root.find(".//error"), only the first <error> counts.
+
+                if tag == "error" and not error_seen:
+                    error_seen = True
+                    if element.text:
+                        found["error"] = element.text.strip()
+                        return found
+                elif tag == "session_id" and not session_id_seen:
+                    session_id_seen = True
+                    text = element.text.strip() if element.text else ""
+                    found["session_id"] = text or None
+                elif tag == "session" and session_id_seen:
+                    return found
+                elif tag == "search":
+                    for child in element:
+                        if child.text and child.text.strip():
+                            child_tag = child.tag.rpartition("}")[2]
+                            found["search"][child_tag] = child.text.strip()
+                    return found
+        parser.close()
+    except ET.ParseError as exc:
+        raise HamQTHError("Invalid XML response from HamQTH.") from exc
+    return found
+
+
+@instrumentation.timed("hamqth_api._parse_xml")
 def _parse_xml(xml_text: str):
     try:
-        return ET.fromstring(xml_text)
+        root = ET.fromstring(xml_text)
     except ET.ParseError as exc:
         raise HamQTHError("Invalid XML response from HamQTH.") from exc
 
+    # HamQTH puts everything in the "https://www.hamqth.com" namespace, which
+    # makes ElementTree tags look like "{https://www.hamqth.com}error".
+    # Drop the namespace so helpers can simply search for "error".
+
+    for element in root.iter():
+        if element.tag.startswith("{"):
+            element.tag = element.tag.split("}", 1)[1]
+    return root
+
 
 def _extract_error_message(root) -> str | None:
     """TODO: Return error text from the XML if present, otherwise None."""
@@ -162,23 +378,99 @@ def _extract_error_message(root) -> str | None:
 
 
 def _extract_session_id(root) -> str | None:
-    """TODO: Extract session_id from login response XML."""
-    raise NotImplementedError
+    """Return the session_id text from a login response, or None if missing/blank."""
+    session_id = root.find(".//session_id")
+    if session_id is None or not session_id.text:
+        return None
+    session_id = session_id.text.strip()
+    if not session_id:
+        return None
+    return session_id
 
 
 def _extract_search_fields(root) -> dict:
-    """TODO: Extract <search> fields from lookup XML into a raw dict."""
-    raise NotImplementedError
+    """
+    Return the children of <search> as a raw {tag: text} dict.
+
+    Empty tags are left out. No <search> element gives an empty dict.
+    """
+    search = root.find(".//search")
+    if search is None:
+        return {}
+
+    fields = {}
+    for child in search:
+        if child.text and child.text.strip():
+            fields[child.tag] = child.text.strip()
+    return fields
 
 
 def _is_session_error(err_msg: str) -> bool:
-    """TODO: Return True if err_msg indicates invalid/expired session."""
-    raise NotImplementedError
+    """Return True if err_msg says the session id is invalid or expired."""
+    message = err_msg.lower()
+    if "session" not in message:
+        return False
+    return any(word in message for word in ["expired", "does not exist", "invalid"])
 
 
 def _is_not_found_error(err_msg: str) -> bool:
-    """TODO: Return True if err_msg indicates callsign not found/no data."""
-    raise NotImplementedError
+    """Return True if err_msg says the call sign isn't in the callbook."""
+    message = err_msg.lower()
+    return "not found" in message or "no data" in message
+
+
+def _normalize_search_fields(raw: dict, call_sign: str) -> dict:
+    """
+    Turn raw <search> fields into the V1 result dict.
+
+    HamQTH has both a nickname and a mailing address. The address fields are
+    used when present since they are more complete.
+    """
+    result = {"call_sign": raw.get("callsign", call_sign).upper()}
+    optional_fields = [
+        ("name", ["adr_name", "nick"]),
+        ("city", ["adr_city", "qth"]),
+        ("state", ["us_state", "state"]),
+        ("country", ["country", "adr_country"]),
+        ("cq_zone", ["cq"]),
+        ("itu_zone", ["itu"]),
+    ]
+    for key, tags in optional_fields:
+        for tag in tags:
+            if raw.get(tag):
+                result[key] = raw[tag]
+                break
+    return result
+
+
+class _TokenBucket:
+    """
+    Token-bucket rate limiter shared by the batch worker threads.
+
+    Tokens refill at rate per second, up to burst. Each request takes one and
+    waits if there are none left.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.capacity, self.tokens + (now - self.updated) * self.rate
+                )
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
 
 
 def _require_text(value: str, label: str) -> str:
@@ -0,0 +1,268 @@
+"""
+hamqth_async.py
+
+Purpose:
+- An asyncio version of hamqth_api.callbook_lookup(), for programs that run
+  an event loop (a web dashboard, a rig-control bridge) and can't have a
+  lookup block it.
+
+How it works:
+- AsyncHamQTHClient sends its requests with one httpx.AsyncClient, which
+  keeps connections open and reuses them like the requests.Session in
+  hamqth_api. Like requests it follows redirects, honours the proxy
+  environment variables and decodes the body with the charset the response
+  declares.
+- Responses go through the same helpers as hamqth_api (_scan_response,
+  _normalize_search_fields, ...), so results and HamQTHError messages are
+  exactly the same as the blocking version.
+- The session id is cached per client. When many lookups find it missing or
+  expired at once, only one of them logs in; the rest wait for that login
+  instead of each logging in (no re-login stampede).
+- At most max_concurrency lookups are in flight at a time; the others wait
+  their turn. lookup_many() limits how fast requests start, with the same
+  defaults as hamqth_api.callbook_lookup_many().
+
+Usage:
+    async with hamqth_async.AsyncHamQTHClient() as client:
+        result = await client.lookup("W1AW")
+        results = await client.lookup_many(["W1AW", "OK7AN"])
+
+Rules:
+- Do NOT use input() or print() in this module.
+- Do NOT read/write your JSONL log here.
+- Raise HamQTHError with human-friendly messages when something goes wrong.
+"""
+
+import asyncio
+import time
+
+import httpx
+
+import hamqth_api
+import instrumentation
+from hamqth_api import HamQTHError
+
+DEFAULT_MAX_CONCURRENCY = hamqth_api.BATCH_MAX_WORKERS
+
+# Largest response we accept. HamQTH answers are a few kilobytes.
+MAX_RESPONSE_BYTES = 1024 * 1024
+
+
+class AsyncHamQTHClient:
+    """
+    HamQTH callbook client for asyncio. Use one per program (or per event
+    loop) so the session id and open connections are shared; close it with
+    close() or "async with".
+    """
+
+    def __init__(self, max_concurrency: int = DEFAULT_MAX_CONCURRENCY, url: str = None):
+        # url=None means hamqth_api.HAMQTH_XML_URL, read at request time.
+
+        self.url = url
+        max_concurrency = max(1, max_concurrency)
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._login_lock = asyncio.Lock()
+        self._session_id = None
+        self._session_expires_at = 0.0
+        self._http = httpx.AsyncClient(
+            headers={"User-Agent": hamqth_api.PROGRAM_NAME},
+            timeout=hamqth_api.HTTP_TIMEOUT_SECONDS,
+            limits=httpx.Limits(
+                max_connections=max_concurrency,
+                max_keepalive_connections=max_concurrency,
+            ),
+            follow_redirects=True,
+        )
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
+
+    async def lookup(self, call_sign: str) -> dict:
+        """
+        Async callbook_lookup(): the same V1 result dict, or the same
+        HamQTHError (missing credentials, network/HTTP failure, login failure,
+        call sign not found, unexpected response).
+        """
+        call_sign = hamqth_api._require_text(call_sign, "call sign").upper()
+
+        async with self._slots:
+            session_id = await self._get_session_id()
+            response = await self._lookup_response(session_id, call_sign)
+            err_msg = response["error"]
+
+            # An expired/invalid session gets one fresh login and one retry.
+
+            if err_msg is not None and hamqth_api._is_session_error(err_msg):
+                self._clear_session(session_id)
+                session_id = await self._get_session_id()
+                response = await self._lookup_response(session_id, call_sign)
+                err_msg = response["error"]
+
+        if err_msg is not None:
+            if hamqth_api._is_not_found_error(err_msg):
+                raise HamQTHError(f"Call sign {call_sign} not found in HamQTH.")
+            raise HamQTHError(f"HamQTH lookup failed: {err_msg}")
+
+        raw = response["search"]
+        if not raw:
+            raise HamQTHError("Unexpected response from HamQTH (no search result).")
+
+        return hamqth_api._normalize_search_fields(raw, call_sign)
+
+    async def lookup_many(
+        self,
+        call_signs,
+        rate_per_second: float | None = hamqth_api.BATCH_RATE_PER_SECOND,
+        burst: int = hamqth_api.BATCH_BURST,
+    ) -> dict:
+        """
+        Async callbook_lookup_many(): normalized call sign -> V1 result dict or
+        the HamQTHError for that call, in the order given, duplicates looked up
+        once. rate_per_second / burst limit how fast requests start
+        (rate_per_second=None for no limit).
+        """
+        unique_calls = list(dict.fromkeys(call.strip().upper() for call in call_signs))
+        if not unique_calls:
+            return {}
+
+        # Log in once up front; if that fails, every call gets the same error.
+
+        try:
+            async with self._slots:
+                await self._get_session_id()
+        except HamQTHError as exc:
+            return {call: exc for call in unique_calls}
+
+        bucket = _AsyncTokenBucket(rate_per_second, burst) if rate_per_second else None
+
+        async def lookup_one(call_sign: str):
+            if bucket is not None:
+                await bucket.acquire()
+            try:
+                return await self.lookup(call_sign)
+            except HamQTHError as exc:
+                return exc
+
+        results = await asyncio.gather(*(lookup_one(call) for call in unique_calls))
+        return dict(zip(unique_calls, results))
+
+    async def close(self) -> None:
+        """Close the kept-open connections."""
+        await self._http.aclose()
+
+    async def _get_session_id(self) -> str:
+        """
+        Return the cached session id if it is still valid, otherwise log in.
+
+        Lookups that find the cache empty queue up on the lock; the first one
+        logs in and the others find the fresh id when their turn comes.
+        """
+        if self._session_is_valid():
+            return self._session_id
+        async with self._login_lock:
+            if self._session_is_valid():
+                return self._session_id
+            return await self._login_and_create_session()
+
+    def _session_is_valid(self) -> bool:
+        return (
+            self._session_id is not None and time.monotonic() < self._session_expires_at
+        )
+
+    async def _login_and_create_session(self) -> str:
+        user_name, user_pw = hamqth_api._load_credentials()
+        response = hamqth_api._scan_response(
+            await self._http_get({"u": user_name, "p": user_pw})
+        )
+
+        err_msg = response["error"]
+        if err_msg is not None:
+            raise HamQTHError(f"HamQTH login failed: {err_msg}")
+
+        session_id = response["session_id"]
+        if session_id is None:
+            raise HamQTHError("HamQTH login failed: no session id in the response.")
+
+        self._session_id = session_id
+        self._session_expires_at = (
+            time.monotonic()
+            + hamqth_api.SESSION_LIFETIME_SECONDS
+            - hamqth_api.SESSION_RENEW_MARGIN_SECONDS
+        )
+        return session_id
+
+    def _clear_session(self, session_id: str) -> None:
+        """Forget session_id, unless another lookup already replaced it."""
+        if self._session_id == session_id:
+            self._session_id = None
+            self._session_expires_at = 0.0
+
+    async def _lookup_response(self, session_id: str, call_sign: str) -> dict:
+        params = {
+            "id": session_id,
+            "callsign": call_sign,
+            "prg": hamqth_api.PROGRAM_NAME,
+        }
+        return hamqth_api._scan_response(await self._http_get(params))
+
+    @instrumentation.timed("hamqth_async._http_get")
+    async def _http_get(self, params: dict) -> str:
+        """GET the XML endpoint and return the body text."""
+        url = self.url or hamqth_api.HAMQTH_XML_URL
+        try:
+            async with self._http.stream("GET", url, params=params) as response:
+                body = await _read_body(response)
+        except (httpx.HTTPError, httpx.InvalidURL, ValueError) as exc:
+            raise HamQTHError("Network error contacting HamQTH.") from exc
+
+        if response.status_code != 200:
+            raise HamQTHError(
+                f"HTTP error from HamQTH (status {response.status_code})."
+            )
+        if instrumentation.ENABLED:
+            instrumentation.add("hamqth_async._http_get", bytes_read=len(body))
+        return body.decode(response.encoding or "utf-8", errors="replace")
+
+
+async def callbook_lookup(call_sign: str) -> dict:
+    """One-off lookup with a throwaway client. Keep a client around for more than one."""
+    async with AsyncHamQTHClient() as client:
+        return await client.lookup(call_sign)
+
+
+# -----------------------------
+# Internal helpers (private)
+# -----------------------------
+async def _read_body(response: httpx.Response) -> bytes:
+    """Read the whole body, refusing anything over MAX_RESPONSE_BYTES."""
+    body = bytearray()
+    async for chunk in response.aiter_bytes():
+        if len(body) + len(chunk) > MAX_RESPONSE_BYTES:
+            raise ValueError("Response too large.")
+        body += chunk
+    return bytes(body)
+
+
+class _AsyncTokenBucket:
+    """hamqth_api._TokenBucket for coroutines: waits with asyncio.sleep."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+
+    async def acquire(self) -> None:
+        while True:
+            now = time.monotonic()
+            self.tokens = min(
+                self.capacity, self.tokens + (now - self.updated) * self.rate
+            )
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
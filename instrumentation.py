@@ -0,0 +1,216 @@
+"""
+instrumentation.py
+
+Purpose:
+- Find out where the time goes when something is slow ("search is slow").
+- Counts, for each instrumented step: how many calls, how long they took
+  (total, mean, p95, max), bytes read and QSO records decoded.
+
+Turning it on:
+- Set HAMLOG_INSTRUMENT=1 before starting the logger (or logger_cli.py).
+  When the program exits, a summary table is written to stderr.
+- Also set HAMLOG_INSTRUMENT_JSON=timings.json to save everything as JSON
+  for offline analysis.
+- With HAMLOG_INSTRUMENT unset (the normal case) the cost is close to zero:
+  timed() hands back the function unchanged, and the read paths only check
+  the ENABLED flag once per call, not once per record.
+
+What is instrumented:
+- ham-radio-logger.py: load_all_qsos and every handle_* menu action
+- logger_cli.py: every command
+- qso_log / qso_index reads: records decoded and bytes read
+- hamqth_api: _http_get (with response bytes), _scan_response, _parse_xml;
+  hamqth_async: _http_get
+
+Adding more:
+    @instrumentation.timed("my_step")        (decorator, sync or async)
+    if instrumentation.ENABLED:
+        instrumentation.add("my_step", records=n, bytes_read=size)
+
+Rules:
+- Do NOT use input() or print() in this module.
+- Decorators are applied at import time, so HAMLOG_INSTRUMENT must be set
+  before the program starts. enable() only affects counting from then on.
+"""
+
+import atexit
+import functools
+import json
+import os
+import sys
+import threading
+import time
+
+ENV_INSTRUMENT = "HAMLOG_INSTRUMENT"
+ENV_INSTRUMENT_JSON = "HAMLOG_INSTRUMENT_JSON"
+
+# Latencies kept per step for percentiles. Counts and totals cover every call.
+MAX_SAMPLES = 10_000
+
+ENABLED = os.getenv(ENV_INSTRUMENT, "").strip() not in ("", "0")
+
+_steps = {}
+_lock = threading.Lock()
+
+
+class StepStats:
+    """What was recorded for one step."""
+
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+        self.samples = []
+        self.records = 0
+        self.bytes_read = 0
+
+    def to_dict(self) -> dict:
+        samples = sorted(self.samples)
+        return {
+            "calls": self.calls,
+            "total_seconds": self.seconds,
+            "mean_seconds": self.seconds / self.calls if self.calls else 0.0,
+            "p95_seconds": samples[int(0.95 * (len(samples) - 1))] if samples else 0.0,
+            "max_seconds": self.max_seconds,
+            "records": self.records,
+            "bytes_read": self.bytes_read,
+        }
+
+
+def enable() -> None:
+    """Turn counting on for the rest of the run (see Rules above)."""
+    global ENABLED
+    ENABLED = True
+
+
+def reset() -> None:
+    """Forget everything recorded so far."""
+    with _lock:
+        _steps.clear()
+
+
+def timed(name: str = None):
+    """
+    Decorator: record calls and latency of a function (or coroutine function).
+
+    When instrumentation is off the function is returned as it is, so there is
+    no wrapper to pay for. name defaults to module.function.
+    """
+
+    def decorate(func):
+        if not ENABLED:
+            return func
+        import inspect
+
+        step = name or f"{func.__module__}.{func.__qualname__}"
+
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    add(step, seconds=time.perf_counter() - start)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                add(step, seconds=time.perf_counter() - start)
+
+        return wrapper
+
+    return decorate
+
+
+def add(
+    name: str, seconds: float = None, records: int = 0, bytes_read: int = 0
+) -> None:
+    """Record one call (if seconds is given) and/or records and bytes for a step."""
+    with _lock:
+        stats = _steps.get(name)
+        if stats is None:
+            stats = _steps[name] = StepStats()
+        if seconds is not None:
+            stats.calls += 1
+            stats.seconds += seconds
+            stats.max_seconds = max(stats.max_seconds, seconds)
+            if len(stats.samples) < MAX_SAMPLES:
+                stats.samples.append(seconds)
+        stats.records += records
+        stats.bytes_read += bytes_read
+
+
+def counted(name: str, items, bytes_of=None):
+    """
+    Yield items unchanged, then record how many there were (and their bytes).
+
+    For generators of decoded QSOs: wrap them only when ENABLED, so the normal
+    path has no extra per-record work. bytes_of(item) gives an item's size.
+    """
+    records = 0
+    bytes_read = 0
+    try:
+        for item in items:
+            records += 1
+            if bytes_of is not None:
+                bytes_read += bytes_of(item)
+            yield item
+    finally:
+        add(name, records=records, bytes_read=bytes_read)
+
+
+def report() -> dict:
+    """Return step name -> recorded numbers (see StepStats.to_dict)."""
+    with _lock:
+        return {name: stats.to_dict() for name, stats in sorted(_steps.items())}
+
+
+def format_summary(steps: dict = None) -> str:
+    """Return the report as a text table, slowest total time first."""
+    steps = report() if steps is None else steps
+    lines = [
+        f"{'step':<36} {'calls':>7} {'total ms':>10} {'mean ms':>9}"
+        f" {'p95 ms':>9} {'max ms':>9} {'records':>9} {'bytes':>11}"
+    ]
+    for name, step in sorted(steps.items(), key=lambda item: -item[1]["total_seconds"]):
+        lines.append(
+            f"{name:<36} {step['calls']:>7} {step['total_seconds'] * 1000:>10.1f}"
+            f" {step['mean_seconds'] * 1000:>9.2f} {step['p95_seconds'] * 1000:>9.2f}"
+            f" {step['max_seconds'] * 1000:>9.2f} {step['records']:>9}"
+            f" {step['bytes_read']:>11}"
+        )
+    return "\n".join(lines)
+
+
+def export_json(filename: str) -> None:
+    """Save the report (and when/where it was taken) as JSON."""
+    data = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "argv": sys.argv,
+        "steps": report(),
+    }
+    with open(filename, "w", encoding="utf-8") as file:
+        json.dump(data, file, indent=2)
+
+
+# -----------------------------
+# Internal helpers (private)
+# -----------------------------
+def _write_at_exit() -> None:
+    if not _steps:
+        return
+    sys.stderr.write("\nInstrumentation summary\n" + format_summary() + "\n")
+    filename = os.getenv(ENV_INSTRUMENT_JSON)
+    if filename:
+        export_json(filename)
+
+
+if ENABLED:
+    atexit.register(_write_at_exit)
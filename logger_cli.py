@@ -0,0 +1,394 @@
+"""
+logger_cli.py
+
+Purpose:
+- Run the logger's actions from a script or the command line, one command per
+  run, without going through the menu:
+    log     add QSOs: one from options, or many as JSON lines on stdin
+    recent  show the last N QSOs
+    search  show QSOs by call sign, band, mode or UTC date range
+    stats   show the log's statistics
+    lookup  look up call signs in the HamQTH callbook (through the cache)
+- --json prints JSON instead of text, for piping into other tools. Commands
+  that list QSOs print one JSON object per line.
+
+How it works:
+- The commands use the same building blocks as the menu (qso_repository,
+  qso_normalize, time_index, callbook_cache), so a QSO logged here is stored
+  exactly like one typed into the menu.
+- Each command imports what it needs when it runs. Only "lookup" imports
+  hamqth_api (and with it requests), so "stats" and friends start quickly.
+
+Usage (from repo root):
+    python logger_cli.py stats --json
+    python logger_cli.py search --band "20 m"
+    python logger_cli.py log --call W1AW --band 20M --mode SSB --sent 5-9 --rcvd 5-7
+    my-contest-export | python logger_cli.py log
+    python ham-radio-logger.py recent -n 5     (same commands; no arguments runs the menu)
+
+Rules:
+- Do NOT use input() in this module. Output goes to the streams given to
+  main(), so tests can capture it.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+import instrumentation
+
+DEFAULT_LOG_FILE = "qsolog.jsonl"
+DEFAULT_CACHE_FILE = "callbook_cache.sqlite3"
+
+# QSOs from stdin are written this many at a time.
+LOG_BATCH_SIZE = 1000
+
+# Options of the "log" command -> QSO field, in the order the menu asks for them.
+LOG_OPTIONS = [
+    ("call", "call_sign"),
+    ("rcvd", "their_signal_report"),
+    ("sent", "my_signal_report"),
+    ("band", "band"),
+    ("mode", "mode"),
+    ("comments", "comments"),
+]
+
+
+def build_parser(
+    log_file: str = DEFAULT_LOG_FILE, cache_file: str = DEFAULT_CACHE_FILE
+) -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Ham radio logger commands (run without a command for the menu)."
+    )
+    parser.add_argument("--log", default=log_file, help=f"QSO log (default {log_file})")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    log_parser = commands.add_parser(
+        "log", help="add QSOs (from options, or JSON lines on stdin)"
+    )
+    log_parser.add_argument("--call", help="their call sign (logs one QSO)")
+    log_parser.add_argument("--rcvd", default="", help="report they gave you")
+    log_parser.add_argument("--sent", default="", help="report you gave them")
+    log_parser.add_argument("--band", default="", help='band, e.g. "20M" or "14.074"')
+    log_parser.add_argument("--mode", default="", help="mode, e.g. SSB, CW, FT8")
+    log_parser.add_argument("--comments", default="", help="comments")
+    log_parser.add_argument("--time", help="UTC time, YYYY-MM-DD HH:MM (default: now)")
+
+    recent_parser = commands.add_parser("recent", help="show the last QSOs")
+    recent_parser.add_argument(
+        "-n", "--count", type=int, default=10, help="how many (default 10)"
+    )
+
+    search_parser = commands.add_parser("search", help="find QSOs")
+    search_parser.add_argument("--call", help="call sign, or part of one")
+    search_parser.add_argument("--band", help="band (exact, after normalizing)")
+    search_parser.add_argument("--mode", help="mode (exact, after normalizing)")
+    search_parser.add_argument(
+        "--from", dest="start", help="UTC start, YYYY-MM-DD [HH:MM]"
+    )
+    search_parser.add_argument(
+        "--to", dest="end", help="UTC end, YYYY-MM-DD (whole day) or YYYY-MM-DD HH:MM"
+    )
+
+    stats_parser = commands.add_parser("stats", help="show log statistics")
+    stats_parser.add_argument(
+        "--top", type=int, default=10, help="entries per list (default 10)"
+    )
+
+    lookup_parser = commands.add_parser("lookup", help="look up call signs on HamQTH")
+    lookup_parser.add_argument(
+        "call_signs", nargs="*", help="call signs (default: one per line on stdin)"
+    )
+    lookup_parser.add_argument(
+        "--cache",
+        default=cache_file,
+        help=f"callbook cache file (default {cache_file})",
+    )
+
+    for command_parser in commands.choices.values():
+        command_parser.add_argument(
+            "--json", action="store_true", help="print JSON instead of text"
+        )
+    return parser
+
+
+def main(
+    argv=None,
+    log_file: str = DEFAULT_LOG_FILE,
+    cache_file: str = DEFAULT_CACHE_FILE,
+    stdin=None,
+    stdout=None,
+    stderr=None,
+) -> int:
+    """Run one command and return the exit status (0 OK, 1 something failed)."""
+    args = build_parser(log_file, cache_file).parse_args(argv)
+    streams = _Streams(stdin or sys.stdin, stdout or sys.stdout, stderr or sys.stderr)
+    commands = {
+        "log": command_log,
+        "recent": command_recent,
+        "search": command_search,
+        "stats": command_stats,
+        "lookup": command_lookup,
+    }
+    try:
+        return commands[args.command](args, streams)
+    except BrokenPipeError:
+        # Whatever we were piping into stopped reading (e.g. "| head"). Point
+        # stdout at devnull so Python doesn't complain again while exiting.
+
+        if streams.stdout is sys.stdout:
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+
+
+@instrumentation.timed("cli log")
+def command_log(args, streams) -> int:
+    """Append QSOs to the log and report how many were logged and how many were dupes."""
+    import dupe_checker
+    import qso_normalize
+    import qso_repository
+    import time_index
+
+    if args.call is not None:
+        fields = {field: getattr(args, option) for option, field in LOG_OPTIONS}
+        if args.time:
+            try:
+                fields["timestamp"] = time_index.parse_time_bound(args.time)
+            except ValueError:
+                streams.error("--time must look like 2024-06-22 18:30.")
+                return 1
+        qsos = [(0, fields)]
+    else:
+        qsos = _read_json_lines(streams)
+
+    checker = dupe_checker.load_dupe_checker(args.log)
+    logged = dupes = 0
+    skipped = []
+    batch = []
+    with qso_repository.open_repository(args.log) as log:
+        for line_number, fields in qsos:
+            qso = _new_qso(fields, time_index.utc_timestamp())
+            if qso is None:
+                skipped.append(line_number)
+                streams.error(
+                    f"Line {line_number}: not a QSO with a call_sign, skipped."
+                )
+                continue
+            qso = qso_normalize.normalize_qso(qso)
+            if checker.is_dupe(qso["call_sign"], qso["band"], qso["mode"]):
+                dupes += 1
+            checker.add(qso)
+            batch.append(qso)
+            if len(batch) >= LOG_BATCH_SIZE:
+                logged += log.append_many(batch)
+                batch = []
+        if batch:
+            logged += log.append_many(batch)
+
+    if args.json:
+        streams.json({"logged": logged, "dupes": dupes, "skipped": skipped})
+    else:
+        streams.out(f"Logged {logged} QSOs ({dupes} dupes).")
+        if skipped:
+            streams.out(f"Skipped {len(skipped)} lines that weren't QSOs.")
+    return 1 if skipped else 0
+
+
+@instrumentation.timed("cli recent")
+def command_recent(args, streams) -> int:
+    import qso_repository
+
+    if args.count < 1:
+        streams.error("-n must be at least 1.")
+        return 1
+    with qso_repository.open_repository(args.log) as log:
+        _print_qsos(streams, log.recent(args.count), args.json)
+    return 0
+
+
+@instrumentation.timed("cli search")
+def command_search(args, streams) -> int:
+    """Search by one of call/band/mode, or by date range (like the search menu)."""
+    import qso_normalize
+    import qso_repository
+    import time_index
+
+    chosen = [
+        option
+        for option in ("call", "band", "mode")
+        if getattr(args, option) is not None
+    ]
+    by_time = args.start is not None or args.end is not None
+    if len(chosen) + by_time != 1:
+        streams.error("Give one of --call, --band, --mode, or --from/--to.")
+        return 1
+
+    with qso_repository.open_repository(args.log) as log:
+        if by_time:
+            try:
+                start = time_index.parse_time_bound(args.start) if args.start else None
+                end = (
+                    time_index.parse_time_bound(args.end, end=True)
+                    if args.end
+                    else None
+                )
+            except ValueError:
+                streams.error("Dates must look like 2024-06-22 or 2024-06-22 18:30.")
+                return 1
+            matches = log.time_range(start, end)
+        elif args.call is not None:
+            matches = log.search("call_sign", args.call.strip().upper(), partial=True)
+        elif args.band is not None:
+            matches = log.search("band", qso_normalize.normalize_band(args.band)[0])
+        else:
+            matches = log.search("mode", qso_normalize.normalize_mode(args.mode))
+        count = _print_qsos(streams, matches, args.json)
+    if not args.json:
+        streams.out(f"Found {count} QSOs.")
+    return 0
+
+
+@instrumentation.timed("cli stats")
+def command_stats(args, streams) -> int:
+    """Print the same statistics as the menu's "Show stats", top N of each."""
+    import qso_repository
+
+    with qso_repository.open_repository(args.log) as log:
+        stats = log.stats()
+
+    sections = [
+        ("calls", "call signs"),
+        ("bands", "bands"),
+        ("modes", "modes"),
+        ("band_modes", "band and mode combinations"),
+        ("days", "days (UTC)"),
+    ]
+    if args.json:
+        summary = {"total": stats.total}
+        for name, _title in sections:
+            summary[name] = [
+                [*value, count] if isinstance(value, tuple) else [value, count]
+                for value, count in stats.top(name, args.top)
+            ]
+        streams.json(summary)
+        return 0
+
+    streams.out(f"Total QSOs: {stats.total}")
+    for name, title in sections:
+        top = stats.top(name, args.top)
+        if not top:
+            continue
+        streams.out("")
+        streams.out(f"Most common {title}:")
+        for value, count in top:
+            if isinstance(value, tuple):
+                value = " ".join(value).strip()
+            streams.out(f"{value} : {count}")
+    return 0
+
+
+@instrumentation.timed("cli lookup")
+def command_lookup(args, streams) -> int:
+    """Look up call signs (cached; misses go to HamQTH together)."""
+    import callbook_cache
+    import hamqth_api
+
+    call_signs = args.call_signs or [
+        line.strip() for line in streams.stdin if line.strip()
+    ]
+    if not call_signs:
+        streams.error("No call signs to look up.")
+        return 1
+
+    failed = 0
+    cache = callbook_cache.get_cache(args.cache)
+    try:
+        outcomes = cache.lookup_many(call_signs)
+    except hamqth_api.HamQTHError as exc:
+        streams.error(str(exc))
+        return 1
+    for call_sign, outcome in outcomes.items():
+        if isinstance(outcome, hamqth_api.HamQTHError):
+            failed += 1
+            if args.json:
+                streams.json({"call_sign": call_sign, "error": str(outcome)})
+            else:
+                streams.out(f"{call_sign}: {outcome}")
+        elif args.json:
+            streams.json(outcome)
+        else:
+            streams.out(hamqth_api.format_callbook_result(outcome))
+        if not args.json:
+            streams.out("")
+    return 1 if failed else 0
+
+
+# -----------------------------
+# Internal helpers (private)
+# -----------------------------
+class _Streams:
+    """Where a command reads and writes."""
+
+    def __init__(self, stdin, stdout, stderr):
+        self.stdin = stdin
+        self.stdout = stdout
+        self.stderr = stderr
+
+    def out(self, text: str) -> None:
+        self.stdout.write(text + "\n")
+
+    def json(self, value) -> None:
+        self.stdout.write(json.dumps(value) + "\n")
+
+    def error(self, text: str) -> None:
+        self.stderr.write(text + "\n")
+
+
+def _read_json_lines(streams):
+    """Yield (line number, parsed value) for each non-blank stdin line."""
+    for line_number, line in enumerate(streams.stdin, start=1):
+        if line.strip() == "":
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except ValueError:
+            yield line_number, None
+
+
+def _new_qso(fields, timestamp: str) -> dict | None:
+    """
+    Build a QSO like handle_log_new_qso does: its fields in menu order (missing
+    ones empty), call sign uppercased, stamped with timestamp unless it already
+    has one. Other keys are kept. Returns None if fields isn't a QSO.
+    """
+    if not isinstance(fields, dict):
+        return None
+    call_sign = fields.get("call_sign")
+    if not isinstance(call_sign, str) or call_sign.strip() == "":
+        return None
+    qso = {field: fields.get(field, "") for _option, field in LOG_OPTIONS}
+    qso["call_sign"] = call_sign.strip().upper()
+    qso["timestamp"] = fields.get("timestamp") or timestamp
+    for key, value in fields.items():
+        qso.setdefault(key, value)
+    return qso
+
+
+def _print_qsos(streams, qsos, as_json: bool) -> int:
+    """Print each QSO (label per line, or one JSON line) and return how many."""
+    count = 0
+    for qso in qsos:
+        if as_json:
+            streams.json(dict(qso.items()))
+        else:
+            if count > 0:
+                streams.out("")
+            for key, value in qso.items():
+                streams.out(f"{key.replace('_', ' ').title()}: {value}")
+        count += 1
+    return count
+
+
+if __name__ == "__main__":
+    sys.exit(main())
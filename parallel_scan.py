@@ -0,0 +1,110 @@
+"""
+parallel_scan.py
+
+Purpose:
+- Scan big logs on every CPU core instead of one.
+- The log is split into byte ranges that start and end on line boundaries,
+  each range is parsed in its own process, and the partial results are
+  merged back in log order.
+- Small logs skip all of that and use the normal serial path, since starting
+  processes costs more than it saves.
+
+scan_stats() gives the same QSOStats as qso_stats.compute_stats(). It is used
+when the stats snapshot has to be rebuilt from scratch; searches and counts go
+through the sidecar index instead (qso_index), which is built only once.
+
+Rules:
+- Do NOT use input() or print() in this module.
+"""
+
+import os
+
+import qso_log
+import qso_stats
+
+# Logs smaller than this are scanned serially.
+PARALLEL_THRESHOLD_BYTES = 32 * 1024 * 1024
+
+
+def split_ranges(filename: str, parts: int) -> list[tuple[int, int]]:
+    """
+    Split a file into up to parts (start, end) byte ranges.
+
+    Every range starts at the beginning of a line and ends just after a newline
+    (or at the end of the file), so no line is cut in two.
+    """
+    size = os.path.getsize(filename)
+    if size == 0:
+        return []
+
+    boundaries = [0]
+    with open(filename, "rb") as file:
+        for part in range(1, parts):
+            guess = size * part // parts
+            if guess <= boundaries[-1]:
+                continue
+
+            # Move forward to the start of the next line.
+
+            file.seek(guess - 1)
+            file.readline()
+            boundary = file.tell()
+            if boundary >= size:
+                break
+            if boundary > boundaries[-1]:
+                boundaries.append(boundary)
+    boundaries.append(size)
+
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
+
+def scan_stats(
+    filename: str, processes: int = None, threshold: int = PARALLEL_THRESHOLD_BYTES
+) -> qso_stats.QSOStats:
+    """Return the QSOStats for the whole log, in parallel when the log is big."""
+    if not _use_parallel(filename, processes, threshold):
+        return qso_stats.compute_stats(filename)
+
+    stats = qso_stats.QSOStats()
+    for partial in _map_ranges(_stats_in_range, filename, processes, ()):
+        stats.merge(partial)
+    return stats
+
+
+# -----------------------------
+# Internal helpers (private)
+# -----------------------------
+def _use_parallel(filename: str, processes: int, threshold: int) -> bool:
+    if processes == 1 or not os.path.exists(filename):
+        return False
+    return os.path.getsize(filename) >= threshold
+
+
+def _map_ranges(worker, filename: str, processes: int, args: tuple) -> list:
+    """Run worker(filename, start, end, *args) for every range and return results in order."""
+
+    # Imported here so plain menu actions don't pay for starting up multiprocessing.
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    if processes is None:
+        processes = os.cpu_count() or 1
+    ranges = split_ranges(filename, processes)
+
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        futures = [
+            pool.submit(worker, filename, start, end, *args) for start, end in ranges
+        ]
+        return [future.result() for future in futures]
+
+
+def _iter_range(filename: str, start: int, end: int | None):
+    """Yield the QSO dicts whose lines start between start and end."""
+    for offset, _line_end, qso in qso_log.iter_complete_records(filename, start):
+        if end is not None and offset >= end:
+            break
+        yield qso
+
+
+def _stats_in_range(filename: str, start: int, end: int | None) -> qso_stats.QSOStats:
+    return qso_stats.QSOStats().update(_iter_range(filename, start, end))
@@ -0,0 +1,499 @@
+"""
+qso_columns.py
+
+Purpose:
+- An optional, compact column-by-column copy of the QSO log for fast stats
+  and searches. The JSONL log stays the source of truth; this store can be
+  deleted at any time and rebuilt with sync_columns().
+- Create it with "python qso_columns.py". From then on every append keeps it
+  current, and JSONLRepository answers stats, counts and searches from it
+  whenever it is up to date with the log (open_if_fresh()).
+
+Layout (a directory "<log file>.cols" next to the log):
+- meta.json: how many records, how far into the log they go (log_size +
+  tail_check, like the index) and the size of every column file
+- call_sign, band, mode, their_signal_report, my_signal_report are
+  dictionary-encoded: "<field>.values" lists each distinct value once (one
+  JSON string per line) and "<field>.codes" holds one uint32 per QSO
+  (0 = field missing, n = the n-th value)
+- timestamp.i64: one int64 per QSO, seconds since 1970 UTC (-1 = missing)
+- offsets.i64: one int64 per QSO, where its line starts in the log, so search
+  hits can be read back in full with qso_log.read_qsos_at_offsets()
+- comments.heap: every comment's UTF-8 bytes back to back, with
+  comments.start (int64, -1 = missing) and comments.len (uint32) per QSO
+
+Reading:
+- Column files are memory-mapped, so opening a store reads almost nothing
+  and only the pages a scan touches are loaded.
+- Scans run over the raw column memory with C-level iterators (Counter,
+  zip, map, itertools.compress) instead of building a dict per QSO.
+- Each "<field>.values" file is decoded once per process and kept in memory
+  (value -> code) until the file changes, so an append only has to encode
+  the values it hasn't seen yet.
+
+Rules:
+- Do NOT use input() or print() in this module (except main()).
+- Only the fields listed above are kept. Values that aren't strings, and
+  timestamps not in "YYYY-MM-DDTHH:MM:SSZ" form, are stored as missing.
+"""
+
+import datetime
+import itertools
+import json
+import mmap
+import os
+from array import array
+from collections import Counter
+
+import qso_log
+import qso_stats
+
+COLUMNS_SUFFIX = ".cols"
+META_FILE = "meta.json"
+META_VERSION = 2
+
+# Appended records are written out to the column files this many at a time.
+SYNC_BATCH_SIZE = 50_000
+
+# Fields in the order handle_log_new_qso builds a QSO.
+DICTIONARY_FIELDS = (
+    "call_sign",
+    "their_signal_report",
+    "my_signal_report",
+    "band",
+    "mode",
+)
+HEAP_FIELD = "comments"
+TIMESTAMP_FIELD = qso_stats.TIMESTAMP_FIELD
+FIELDS = DICTIONARY_FIELDS + (HEAP_FIELD, TIMESTAMP_FIELD)
+
+MISSING_TIMESTAMP = -1
+SECONDS_PER_DAY = 86400
+_EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal()
+
+# Column file name -> array typecode.
+_ARRAY_FILES = {f"{field}.codes": "I" for field in DICTIONARY_FIELDS}
+_ARRAY_FILES["timestamp.i64"] = "q"
+_ARRAY_FILES["offsets.i64"] = "q"
+_ARRAY_FILES[f"{HEAP_FIELD}.start"] = "q"
+_ARRAY_FILES[f"{HEAP_FIELD}.len"] = "I"
+_BYTE_FILES = [f"{field}.values" for field in DICTIONARY_FIELDS]
+_BYTE_FILES.append(f"{HEAP_FIELD}.heap")
+
+# (store directory, field) -> [file stats, value -> code, values or None] for
+# the ".values" file last read or written in this process.
+_values_cache = {}
+
+
+def columns_dirname(log_filename: str) -> str:
+    """Return the column store directory for a log file."""
+    return log_filename + COLUMNS_SUFFIX
+
+
+def sync_columns(log_filename: str) -> int:
+    """
+    Bring the column store up to date with the log, creating it if needed.
+
+    - If the log only grew, just the new QSOs are added
+    - If the log shrank or was rewritten, the store is rebuilt
+    - Returns how many QSOs were added
+    """
+    dirname = columns_dirname(log_filename)
+    os.makedirs(dirname, exist_ok=True)
+    meta = _read_meta(dirname)
+
+    if not os.path.exists(log_filename):
+        size = 0
+    else:
+        size = os.path.getsize(log_filename)
+    if not qso_log.log_only_grew(
+        log_filename, meta["log_size"], meta["tail_check"], size
+    ):
+        meta = _empty_meta()
+
+    # Anything past the sizes in meta.json is from a sync that didn't finish.
+
+    _truncate_files(dirname, meta)
+    if size == meta["log_size"]:
+        _write_meta(dirname, meta)
+        return 0
+
+    writer = _ColumnWriter(dirname, meta)
+    count_before = meta["count"]
+
+    def add(offset: int, qso: dict) -> None:
+        writer.add(qso, offset)
+        if writer.pending >= SYNC_BATCH_SIZE:
+            writer.flush()
+
+    covered = qso_log.fold_records(log_filename, meta["log_size"], size, add)
+    writer.flush()
+    writer.keep_values()
+
+    meta["log_size"] = covered
+    meta["tail_check"] = qso_log.tail_check(log_filename, covered)
+    _write_meta(dirname, meta)
+    return meta["count"] - count_before
+
+
+def update_columns(log_filename: str) -> None:
+    """Sync the column store after an append, but only if the user made one."""
+    if os.path.isdir(columns_dirname(log_filename)):
+        sync_columns(log_filename)
+
+
+def open_columns(log_filename: str) -> "ColumnStore":
+    """Sync the column store with the log and open it for reading."""
+    sync_columns(log_filename)
+    return ColumnStore(columns_dirname(log_filename))
+
+
+def open_if_fresh(log_filename: str) -> "ColumnStore | None":
+    """
+    Open the column store if there is one and it covers the whole log as it is
+    now. Returns None otherwise, so the caller can use the index instead.
+
+    Nothing is written, so this is cheap enough to call on every search.
+    """
+    dirname = columns_dirname(log_filename)
+    if not os.path.isdir(dirname) or not os.path.exists(log_filename):
+        return None
+    meta = _read_meta(dirname)
+    size = os.path.getsize(log_filename)
+    if meta["log_size"] != size:
+        return None
+    if qso_log.tail_check(log_filename, size) != meta["tail_check"]:
+        return None
+    return ColumnStore(dirname, meta)
+
+
+class ColumnStore:
+    """Read-only, memory-mapped view of a column store. Use close() or with."""
+
+    def __init__(self, dirname: str, meta: dict = None):
+        if meta is None:
+            meta = _read_meta(dirname)
+        self.dirname = dirname
+        self.count = meta["count"]
+        self._maps = []
+        self._views = []
+
+        self.codes = {}
+        self.values = {}
+        for field in DICTIONARY_FIELDS:
+            self.codes[field] = self._map_array(meta, f"{field}.codes")
+            self.values[field] = _read_values(dirname, meta, field)
+        self.timestamps = self._map_array(meta, "timestamp.i64")
+        self.offsets = self._map_array(meta, "offsets.i64")
+        self._starts = self._map_array(meta, f"{HEAP_FIELD}.start")
+        self._lengths = self._map_array(meta, f"{HEAP_FIELD}.len")
+        self._heap = self._map_bytes(meta, f"{HEAP_FIELD}.heap")
+
+    def __enter__(self) -> "ColumnStore":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def close(self) -> None:
+        # Views must be let go before the mmap under them can be closed.
+
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        for mapped in self._maps:
+            mapped.close()
+        self._maps = []
+
+    def get(self, record_number: int) -> dict:
+        """Rebuild one QSO dict (only the stored fields, missing ones left out)."""
+        qso = {}
+        for field in DICTIONARY_FIELDS:
+            code = self.codes[field][record_number]
+            if code:
+                qso[field] = self.values[field][code - 1]
+        start = self._starts[record_number]
+        if start >= 0:
+            end = start + self._lengths[record_number]
+            qso[HEAP_FIELD] = bytes(self._heap[start:end]).decode("utf-8")
+        timestamp = self.timestamps[record_number]
+        if timestamp != MISSING_TIMESTAMP:
+            qso[TIMESTAMP_FIELD] = _format_timestamp(timestamp)
+        return qso
+
+    def read(self, record_numbers):
+        """Yield the QSO dicts for the given record numbers."""
+        for number in record_numbers:
+            yield self.get(number)
+
+    def find(self, field: str, match) -> list[int]:
+        """
+        Return record numbers (in log order) whose field value passes match().
+
+        match is called once per distinct value; the column itself is scanned
+        for the matching codes without decoding anything.
+        """
+        values = self.values[field]
+        wanted = {code for code, value in enumerate(values, start=1) if match(value)}
+        if not wanted:
+            return []
+        hits = map(wanted.__contains__, self.codes[field])
+        return list(itertools.compress(range(self.count), hits))
+
+    def lookup(self, field: str, value: str) -> list[int]:
+        """Return the record numbers whose field exactly equals value."""
+        return self.find(field, lambda stored: stored == value)
+
+    def count_field(self, field: str) -> Counter:
+        """Count a field like count_qso_field(): stripped, uppercased, missing skipped."""
+        return _decode_counter(Counter(self.codes[field]), self.values[field])
+
+    def stats(self) -> qso_stats.QSOStats:
+        """Return the same QSOStats as qso_stats.compute_stats(), from the columns."""
+        stats = qso_stats.QSOStats()
+        stats.total = self.count
+        stats.calls = self.count_field("call_sign")
+        stats.bands = self.count_field("band")
+        stats.modes = self.count_field("mode")
+
+        bands = self.values["band"]
+        modes = self.values["mode"]
+        pairs = Counter(zip(self.codes["band"], self.codes["mode"]))
+        for (band_code, mode_code), count in pairs.items():
+            if band_code:
+                band = bands[band_code - 1].strip().upper()
+                mode = modes[mode_code - 1].strip().upper() if mode_code else ""
+                stats.band_modes[(band, mode)] += count
+
+        days = Counter(map(SECONDS_PER_DAY.__rfloordiv__, self.timestamps))
+        for day, count in days.items():
+            if day >= 0:
+                stats.days[_format_day(day)] += count
+        return stats
+
+    def _map_array(self, meta: dict, name: str) -> memoryview:
+        view = self._map_bytes(meta, name).cast(_ARRAY_FILES[name])
+        self._views.append(view)
+        return view
+
+    def _map_bytes(self, meta: dict, name: str) -> memoryview:
+        size = meta["files"].get(name, 0)
+        if size == 0:
+            return memoryview(b"")
+        with open(os.path.join(self.dirname, name), "rb") as file:
+            mapped = mmap.mmap(file.fileno(), size, access=mmap.ACCESS_READ)
+        self._maps.append(mapped)
+        view = memoryview(mapped)
+        self._views.append(view)
+        return view
+
+
+# -----------------------------
+# Internal helpers (private)
+# -----------------------------
+class _ColumnWriter:
+    """Collects appended QSOs in arrays and writes them to the column files."""
+
+    def __init__(self, dirname: str, meta: dict):
+        self.dirname = dirname
+        self.meta = meta
+        self.pending = 0
+        self.columns = {name: array(code) for name, code in _ARRAY_FILES.items()}
+        self.new_values = {field: [] for field in DICTIONARY_FIELDS}
+        self.heap = bytearray()
+
+        # Value -> code for everything already stored. The maps are taken out
+        # of the cache while they are being added to, so a sync that fails
+        # half way can't leave codes behind that were never written.
+
+        self.value_codes = {}
+        for field in DICTIONARY_FIELDS:
+            entry = _cached_values(dirname, meta, field)
+            del _values_cache[(dirname, field)]
+            self.value_codes[field] = entry[1]
+
+    def add(self, qso: dict, offset: int) -> None:
+        for field in DICTIONARY_FIELDS:
+            value = qso.get(field)
+            code = 0
+            if isinstance(value, str):
+                codes = self.value_codes[field]
+                code = codes.get(value)
+                if code is None:
+                    code = len(codes) + 1
+                    codes[value] = code
+                    self.new_values[field].append(value)
+            self.columns[f"{field}.codes"].append(code)
+
+        comment = qso.get(HEAP_FIELD)
+        if isinstance(comment, str):
+            encoded = comment.encode("utf-8")
+            heap_start = self.meta["files"].get(f"{HEAP_FIELD}.heap", 0)
+            self.columns[f"{HEAP_FIELD}.start"].append(heap_start + len(self.heap))
+            self.columns[f"{HEAP_FIELD}.len"].append(len(encoded))
+            self.heap += encoded
+        else:
+            self.columns[f"{HEAP_FIELD}.start"].append(-1)
+            self.columns[f"{HEAP_FIELD}.len"].append(0)
+
+        self.columns["timestamp.i64"].append(_parse_timestamp(qso.get(TIMESTAMP_FIELD)))
+        self.columns["offsets.i64"].append(offset)
+        self.pending += 1
+
+    def flush(self) -> None:
+        """Append everything collected so far and record the new sizes in meta."""
+        if self.pending == 0:
+            return
+        files = self.meta["files"]
+        for name, column in self.columns.items():
+            files[name] = files.get(name, 0) + self._append(name, column.tobytes())
+            del column[:]
+        for field, values in self.new_values.items():
+            text = "".join(json.dumps(value) + "\n" for value in values)
+            name = f"{field}.values"
+            files[name] = files.get(name, 0) + self._append(name, text.encode("utf-8"))
+            values.clear()
+        name = f"{HEAP_FIELD}.heap"
+        files[name] = files.get(name, 0) + self._append(name, bytes(self.heap))
+        self.heap.clear()
+        self.meta["count"] += self.pending
+        self.pending = 0
+
+    def keep_values(self) -> None:
+        """Put the value -> code maps back in the cache once everything is written."""
+        for field, codes in self.value_codes.items():
+            path = os.path.join(self.dirname, f"{field}.values")
+            _values_cache[(self.dirname, field)] = [_file_stats(path), codes, None]
+
+    def _append(self, name: str, data: bytes) -> int:
+        with open(os.path.join(self.dirname, name), "ab") as file:
+            file.write(data)
+        return len(data)
+
+
+def _empty_meta() -> dict:
+    return {
+        "version": META_VERSION,
+        "count": 0,
+        "log_size": 0,
+        "tail_check": "",
+        "files": {},
+    }
+
+
+def _read_meta(dirname: str) -> dict:
+    """Read meta.json, or return an empty store's meta if it is missing or unusable."""
+    meta = qso_log.read_sidecar(os.path.join(dirname, META_FILE), META_VERSION)
+    if meta is None:
+        return _empty_meta()
+    return meta
+
+
+def _write_meta(dirname: str, meta: dict) -> None:
+    qso_log.write_sidecar(os.path.join(dirname, META_FILE), meta)
+
+
+def _truncate_files(dirname: str, meta: dict) -> None:
+    """Cut every column file back to the size meta.json says it should have."""
+    for name in list(_ARRAY_FILES) + _BYTE_FILES:
+        path = os.path.join(dirname, name)
+        size = meta["files"].get(name, 0)
+        with open(path, "ab") as file:
+            # Truncating also touches the mtime, which the values cache checks.
+
+            if file.tell() != size:
+                file.truncate(size)
+
+
+def _read_values(dirname: str, meta: dict, field: str) -> list[str]:
+    """Return a dictionary field's distinct values; code n is values[n - 1]."""
+    entry = _cached_values(dirname, meta, field)
+    if entry[2] is None:
+        entry[2] = list(entry[1])
+    return entry[2]
+
+
+def _cached_values(dirname: str, meta: dict, field: str) -> list:
+    """
+    Return the cache entry for a ".values" file, decoding the file only if it
+    isn't cached yet or changed on disk since (another process, a rebuild).
+    """
+    name = f"{field}.values"
+    path = os.path.join(dirname, name)
+    size = meta["files"].get(name, 0)
+    stats = _file_stats(path)
+    entry = _values_cache.get((dirname, field))
+    on_disk = stats[0] if stats else 0
+    if entry is not None and entry[0] == stats and on_disk == size:
+        return entry
+
+    values = []
+    if size:
+        with open(path, "rb") as file:
+            data = file.read(size)
+        values = [json.loads(line) for line in data.splitlines()]
+    codes = {value: code for code, value in enumerate(values, start=1)}
+    entry = [stats, codes, values]
+    _values_cache[(dirname, field)] = entry
+    return entry
+
+
+def _file_stats(path: str) -> tuple | None:
+    """(size, mtime) of a file, or None if it is missing."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_size, stat.st_mtime_ns)
+
+
+def _decode_counter(code_counts: Counter, values: list[str]) -> Counter:
+    """Turn code -> count into normalized value -> count, keeping first-seen order."""
+    counter = Counter()
+    for code, count in code_counts.items():
+        if code:
+            counter[values[code - 1].strip().upper()] += count
+    return counter
+
+
+def _parse_timestamp(value) -> int:
+    """Turn "YYYY-MM-DDTHH:MM:SSZ" into seconds since 1970, or MISSING_TIMESTAMP."""
+    if not isinstance(value, str) or len(value) != 20 or value[10] != "T":
+        return MISSING_TIMESTAMP
+    try:
+        day = datetime.date(int(value[0:4]), int(value[5:7]), int(value[8:10]))
+        seconds = int(value[11:13]) * 3600 + int(value[14:16]) * 60 + int(value[17:19])
+    except ValueError:
+        return MISSING_TIMESTAMP
+    if day.year < 1970:
+        return MISSING_TIMESTAMP
+    return (day.toordinal() - _EPOCH_ORDINAL) * SECONDS_PER_DAY + seconds
+
+
+def _format_day(day: int) -> str:
+    return datetime.date.fromordinal(day + _EPOCH_ORDINAL).isoformat()
+
+
+def _format_timestamp(timestamp: int) -> str:
+    day, seconds = divmod(timestamp, SECONDS_PER_DAY)
+    hours, seconds = divmod(seconds, 3600)
+    minutes, seconds = divmod(seconds, 60)
+    return f"{_format_day(day)}T{hours:02d}:{minutes:02d}:{seconds:02d}Z"
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build or update the column store.")
+    parser.add_argument("--log", default="qsolog.jsonl", help="JSONL QSO log")
+    args = parser.parse_args()
+
+    added = sync_columns(args.log)
+    dirname = columns_dirname(args.log)
+    meta = _read_meta(dirname)
+    size = sum(meta["files"].values())
+    print(f"Added {added} QSOs; {meta['count']} QSOs in {dirname} ({size} bytes).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,361 @@
+"""
+qso_index.py
+
+Purpose:
+- Keep a sidecar index next to the QSO log so search and stats don't have to
+  json.loads every line of the log on every menu action.
+- Only the records that actually match a search get decoded.
+
+What the index stores:
+- "<log file>.idx.offsets": byte offset of every QSO line (record number ->
+  offset), one int64 each
+- "<log file>.idx": JSON lines. The first is the base; each later line is a
+  segment for the QSOs appended since. Every line has
+  - count: how many records the index covers up to that line
+  - log_size / log_mtime_ns: what the log looked like then
+  - tail_check: the last few bytes that were indexed, to notice a rewritten log
+  - postings: for call_sign, band and mode, stored value -> list of record
+    numbers (in a segment, only the records it adds)
+
+How it stays cheap:
+- Saving after an append writes only the new offsets and one segment line,
+  so it costs the same however big the log is.
+- After COMPACT_AFTER_SEGMENTS segments the whole index is written again as a
+  new base, so loading never has many segments to merge.
+- The loaded index is kept in memory for the rest of the process. While the
+  log and the .idx file are unchanged, load_index() is two os.stat() calls.
+
+Rules:
+- Do NOT use input() or print() in this module.
+- The log file is the source of truth. The index can always be rebuilt from it.
+"""
+
+import json
+import os
+from array import array
+from collections import Counter
+
+import instrumentation
+import qso_log
+
+INDEX_SUFFIX = ".idx"
+OFFSETS_SUFFIX = ".offsets"
+INDEX_VERSION = 2
+INDEXED_FIELDS = ("call_sign", "band", "mode")
+
+# Segments appended after the base before the index is written out in full.
+COMPACT_AFTER_SEGMENTS = 256
+
+# Log file name -> the index last loaded or saved for it in this process.
+_cache = {}
+
+
+def index_filename(log_filename: str) -> str:
+    """Return the sidecar index path for a log file."""
+    return log_filename + INDEX_SUFFIX
+
+
+def offsets_filename(log_filename: str) -> str:
+    """Return the sidecar offsets path for a log file."""
+    return index_filename(log_filename) + OFFSETS_SUFFIX
+
+
+def load_index(log_filename: str) -> dict:
+    """
+    Return an index that matches the current contents of the log.
+
+    - Uses the index already in memory if the sidecar files haven't changed
+      since, otherwise reads them
+    - If the log only grew, indexes just the new lines
+    - If the log shrank or was rewritten, rebuilds from scratch
+    - Saves the index again whenever it changed
+    """
+    if not os.path.exists(log_filename):
+        _cache.pop(log_filename, None)
+        return _empty_index()
+
+    index = _cache.get(log_filename)
+    if index is None or index["files"] != _sidecar_stats(log_filename):
+        index = _read_index(log_filename)
+
+    start = index["count"]
+    segment = _refresh_index(index, log_filename)
+    if segment is not None:
+        _save_changes(index, log_filename, start, segment)
+    _cache[log_filename] = index
+    return index
+
+
+def update_index(log_filename: str) -> dict:
+    """
+    Bring the index up to date after QSOs were appended to the log.
+
+    Only the appended lines are read, so this is cheap to call after every save.
+    """
+    return load_index(log_filename)
+
+
+def save_index(index: dict, log_filename: str) -> None:
+    """
+    Write the whole index next to the log as a new base with no segments.
+
+    Each file goes through a temp file, so it is never half written.
+    """
+    # The old .idx goes first: a crash between the two files then leaves no
+    # index (rebuilt next time) instead of old postings with new offsets.
+
+    _remove(index_filename(log_filename))
+    temp_filename = offsets_filename(log_filename) + ".tmp"
+    with open(temp_filename, "wb") as file:
+        file.write(index["offsets"].tobytes())
+    os.replace(temp_filename, offsets_filename(log_filename))
+
+    temp_filename = index_filename(log_filename) + ".tmp"
+    with open(temp_filename, "w", encoding="utf-8") as file:
+        file.write(_index_line(index, index["postings"]))
+    os.replace(temp_filename, index_filename(log_filename))
+
+    index["segments"] = 0
+    index["files"] = _sidecar_stats(log_filename)
+
+
+def qso_count(index: dict) -> int:
+    """Return how many QSOs the index covers."""
+    return index["count"]
+
+
+def lookup(index: dict, field_name: str, value: str) -> list[int]:
+    """Return the record numbers whose field exactly equals value."""
+    return list(index["postings"][field_name].get(value, []))
+
+
+def find_records(index: dict, field_name: str, match) -> list[int]:
+    """
+    Return record numbers (in log order) whose stored field value passes match().
+
+    match is called once per distinct value, not once per QSO.
+    """
+    record_numbers = []
+    for value, numbers in index["postings"][field_name].items():
+        if match(value):
+            record_numbers.extend(numbers)
+    record_numbers.sort()
+    return record_numbers
+
+
+def all_records(index: dict) -> list[int]:
+    """Return every record number in log order."""
+    return list(range(qso_count(index)))
+
+
+def read_qsos_at(log_filename: str, index: dict, record_numbers: list[int]):
+    """
+    Yield the QSO dicts for the given record numbers.
+
+    Each record is found by seeking straight to its byte offset, so only these
+    lines are read and decoded.
+    """
+    qsos = _read_records(log_filename, index["offsets"], record_numbers)
+    if instrumentation.ENABLED:
+        qsos = instrumentation.counted("qso_index.read_qsos_at", qsos)
+    return qsos
+
+
+def count_field(index: dict, field_name: str) -> Counter:
+    """
+    Count a field across all QSOs using only the index.
+
+    Gives the same result as count_qso_field() in the main program: values are
+    stripped and uppercased, and QSOs without the field are skipped.
+    """
+    counter = Counter()
+    for value, numbers in index["postings"][field_name].items():
+        counter[value.strip().upper()] += len(numbers)
+    return counter
+
+
+# -----------------------------
+# Internal helpers (private)
+# -----------------------------
+def _empty_index() -> dict:
+    return {
+        "version": INDEX_VERSION,
+        "count": 0,
+        "log_size": 0,
+        "log_mtime_ns": 0,
+        "tail_check": "",
+        "offsets": array("q"),
+        "postings": _empty_postings(),
+        "segments": 0,
+        "files": None,
+    }
+
+
+def _empty_postings() -> dict:
+    return {field_name: {} for field_name in INDEXED_FIELDS}
+
+
+def _sidecar_stats(log_filename: str) -> tuple | None:
+    """(size, mtime) of both sidecar files, to notice another process changing them."""
+    try:
+        stats = [os.stat(index_filename(log_filename))]
+        stats.append(os.stat(offsets_filename(log_filename)))
+    except OSError:
+        return None
+    return tuple((stat.st_size, stat.st_mtime_ns) for stat in stats)
+
+
+def _read_index(log_filename: str) -> dict:
+    """
+    Read the base and segments from disk, or return an empty index if they are
+    missing or unusable (the caller then rebuilds it from the log).
+    """
+    index = _empty_index()
+    files = _sidecar_stats(log_filename)
+    if files is None:
+        return index
+    try:
+        with open(index_filename(log_filename), "rb") as file:
+            lines = file.read().splitlines()
+        with open(offsets_filename(log_filename), "rb") as file:
+            offsets_bytes = file.read()
+    except OSError:
+        return index
+
+    segments = []
+    for line in lines:
+        try:
+            segments.append(json.loads(line))
+        except ValueError:
+
+            # A segment cut off by a crash: keep what came before it, and
+            # write a fresh base next time so the bad line goes away.
+
+            index["segments"] = COMPACT_AFTER_SEGMENTS
+            break
+    if not segments or segments[0].get("version") != INDEX_VERSION:
+        return _empty_index()
+
+    postings = index["postings"]
+    for segment in segments:
+        for field_name in INDEXED_FIELDS:
+            for value, numbers in segment["postings"][field_name].items():
+                postings[field_name].setdefault(value, []).extend(numbers)
+    last = segments[-1]
+    for key in ("count", "log_size", "log_mtime_ns", "tail_check"):
+        index[key] = last[key]
+
+    # Offsets past count were written by a save that didn't finish.
+
+    index["offsets"].frombytes(offsets_bytes[: len(offsets_bytes) // 8 * 8])
+    if len(index["offsets"]) < index["count"]:
+        return _empty_index()
+    del index["offsets"][index["count"] :]
+    index["segments"] = max(index["segments"], len(segments) - 1)
+    index["files"] = files
+    return index
+
+
+def _refresh_index(index: dict, log_filename: str) -> dict | None:
+    """
+    Update index in place to match the log.
+
+    Returns the postings of just the records that were added, or None if
+    nothing changed.
+    """
+    stat = os.stat(log_filename)
+    if stat.st_size == index["log_size"] and stat.st_mtime_ns == index["log_mtime_ns"]:
+        return None
+
+    if not qso_log.log_only_grew(
+        log_filename, index["log_size"], index["tail_check"], stat.st_size
+    ):
+
+        # The log was truncated or rewritten, so nothing we have can be trusted.
+
+        index.clear()
+        index.update(_empty_index())
+
+    segment = _empty_postings()
+    indexed_end = _index_lines(
+        index, log_filename, index["log_size"], stat.st_size, segment
+    )
+
+    index["log_size"] = indexed_end
+    index["log_mtime_ns"] = stat.st_mtime_ns
+    index["tail_check"] = qso_log.tail_check(log_filename, indexed_end)
+    return segment
+
+
+def _index_lines(
+    index: dict, log_filename: str, start: int, size: int, segment: dict
+) -> int:
+    """
+    Index every complete QSO line from byte offset start, adding the new
+    postings to segment as well.
+
+    Returns the byte offset the index now covers. That is normally the end of
+    the file, or the start of a last line that is still being written.
+    """
+    offsets = index["offsets"]
+    postings = index["postings"]
+
+    def add(offset: int, qso: dict) -> None:
+        record_number = len(offsets)
+        offsets.append(offset)
+        for field_name in INDEXED_FIELDS:
+            value = qso.get(field_name)
+            if isinstance(value, str):
+                postings[field_name].setdefault(value, []).append(record_number)
+                segment[field_name].setdefault(value, []).append(record_number)
+
+    indexed_end = qso_log.fold_records(log_filename, start, size, add)
+    index["count"] = len(offsets)
+    return indexed_end
+
+
+def _save_changes(index: dict, log_filename: str, start: int, segment: dict) -> None:
+    """
+    Save the records added after the first start ones (their postings are in
+    segment).
+
+    Normally that is the new offsets plus one segment line. A rebuilt index,
+    or one with too many segments already, is written out in full instead.
+    """
+    rebuilt = index["files"] is None
+    if rebuilt or index["segments"] >= COMPACT_AFTER_SEGMENTS:
+        save_index(index, log_filename)
+        return
+
+    # Offsets first: if the segment line never makes it, the extra offsets are
+    # ignored (and overwritten) because no line counts them.
+
+    with open(offsets_filename(log_filename), "r+b") as file:
+        file.seek(start * 8)
+        file.write(index["offsets"][start:].tobytes())
+        file.truncate()
+    with open(index_filename(log_filename), "a", encoding="utf-8") as file:
+        file.write(_index_line(index, segment))
+
+    index["segments"] += 1
+    index["files"] = _sidecar_stats(log_filename)
+
+
+def _index_line(index: dict, postings: dict) -> str:
+    line = {
+        key: index[key]
+        for key in ("version", "count", "log_size", "log_mtime_ns", "tail_check")
+    }
+    line["postings"] = postings
+    return json.dumps(line, separators=(",", ":")) + "\n"
+
+
+def _remove(filename: str) -> None:
+    if os.path.exists(filename):
+        os.remove(filename)
+
+
+def _read_records(log_filename: str, offsets: list[int], record_numbers: list[int]):
+    return qso_log.read_qsos_at_offsets(
+        log_filename, (offsets[number] for number in record_numbers)
+    )
@@ -0,0 +1,263 @@
+"""
+qso_log.py
+
+Purpose:
+- Helpers for reading the JSONL QSO log without loading all of it.
+- Helpers shared by every sidecar file kept next to the log (index, stats
+  snapshot, time index, column store, dupe set, enrichment checkpoint).
+
+How a sidecar stays in step with the log:
+- It records log_size (how far into the log it is up to date) and tail_check
+  (the TAIL_CHECK_BYTES just before that point).
+- log_only_grew() tells whether the log was only appended to since then. If
+  not (it shrank or was rewritten), the sidecar starts over from offset 0.
+- fold_records() feeds it the QSOs appended since log_size and returns the
+  new log_size; tail_check() gives the matching tail_check.
+- read_sidecar() / write_sidecar() load and save the versioned JSON. Writes go
+  to a temp file first and are swapped in with os.replace, so a sidecar is
+  never half written.
+
+Rules:
+- Do NOT use input() or print() in this module.
+- Blank lines are skipped the same way load_all_qsos() skips them.
+- A last line with no newline that isn't valid JSON is a write cut off by a
+  crash (see qso_writer). Readers leave it out instead of raising.
+"""
+
+import json
+import os
+
+import instrumentation
+
+# How much of the file we read at a time when walking backward from the end.
+REVERSE_BLOCK_SIZE = 64 * 1024
+
+# How many bytes before its covered end a sidecar remembers.
+TAIL_CHECK_BYTES = 64
+
+
+def iter_qsos(filename: str, fields=None, predicate=None):
+    """
+    Yield QSO dicts from the log one at a time, in log order.
+
+    - fields: optional list of keys to keep; other keys are dropped right away
+      so only the requested fields stay in memory
+    - predicate: optional function; only QSOs where predicate(qso) is true
+      are yielded (it sees the whole record, before fields are dropped)
+    - A missing log yields nothing, like load_all_qsos()
+    - A last line cut off by a crash mid-write is not yielded
+    """
+    for _offset, _end, qso in iter_complete_records(filename):
+        if predicate is not None and not predicate(qso):
+            continue
+        if fields is not None:
+            qso = {key: qso[key] for key in fields if key in qso}
+        yield qso
+
+
+def iter_qso_lines(filename: str, start: int = 0):
+    """
+    Yield (offset, line) for every non-blank line from byte offset start.
+
+    offset is where the line starts in the file and line is the raw bytes,
+    newline included. Nothing is decoded here, so callers that only need
+    offsets (like the index) can decide what to parse.
+    """
+    if not os.path.exists(filename):
+        return
+
+    with open(filename, "rb") as file:
+        file.seek(start)
+        position = start
+        for line in file:
+            offset = position
+            position += len(line)
+            if line.decode("utf-8").strip() == "":
+                continue
+            yield offset, line
+
+
+def iter_complete_records(filename: str, start: int = 0):
+    """
+    Yield (offset, end, qso) for every QSO line from byte offset start.
+
+    end is the byte offset just past the line. A last line with no newline that
+    isn't valid JSON is a write still in progress, so it is left out instead of
+    raising. Sidecar files (index, stats snapshot) use this to pick up appends.
+    """
+    records = _complete_records(filename, start)
+    if instrumentation.ENABLED:
+        records = instrumentation.counted(
+            "qso_log.records", records, lambda record: record[1] - record[0]
+        )
+    return records
+
+
+def _complete_records(filename: str, start: int):
+    for offset, line in iter_qso_lines(filename, start):
+        try:
+            qso = json.loads(line)
+        except ValueError:
+            if not line.endswith(b"\n"):
+                return
+            raise
+        yield offset, offset + len(line), qso
+
+
+def read_qsos_at_offsets(filename: str, offsets):
+    """Yield the QSO dict of the line starting at each byte offset, in that order."""
+    with open(filename, "rb") as file:
+        for offset in offsets:
+            file.seek(offset)
+            yield json.loads(file.readline())
+
+
+def covered_end(filename: str, last_end: int, size: int) -> int:
+    """
+    Return how far into the file a sidecar is up to date.
+
+    last_end is the end of the last record that was read and size is the file
+    size when reading started. Trailing blank lines count as covered; a last line
+    that is still being written does not.
+    """
+    if last_end >= size:
+        return last_end
+    with open(filename, "rb") as file:
+        file.seek(last_end)
+        rest = file.read(size - last_end)
+    if rest.strip() == b"":
+        return size
+    return last_end
+
+
+def read_tail_check(filename: str, end: int, length: int = TAIL_CHECK_BYTES) -> str:
+    """
+    Return the length bytes just before end, as text.
+
+    Sidecar files store this and compare it later. If it changed, the log was
+    rewritten rather than appended to.
+    """
+    start = max(0, end - length)
+    with open(filename, "rb") as file:
+        file.seek(start)
+        return file.read(end - start).decode("latin-1")
+
+
+def tail_check(filename: str, covered: int) -> str:
+    """Return the tail_check a sidecar covering the log up to covered stores."""
+    if covered == 0:
+        return ""
+    return read_tail_check(filename, covered)
+
+
+def log_only_grew(
+    filename: str, covered: int, saved_tail_check: str, size: int
+) -> bool:
+    """
+    True if the log (now size bytes) was only appended to since a sidecar
+    covered it up to covered, so the sidecar can keep what it has.
+    """
+    if size < covered:
+        return False
+    return tail_check(filename, covered) == saved_tail_check
+
+
+def fold_records(filename: str, start: int, size: int, add) -> int:
+    """
+    Call add(offset, qso) for every QSO from byte offset start, in log order.
+
+    size is the log size when the caller looked. Returns the offset the sidecar
+    now covers (see covered_end()).
+    """
+    last_end = start
+    for offset, end, qso in iter_complete_records(filename, start):
+        add(offset, qso)
+        last_end = end
+    return covered_end(filename, last_end, size)
+
+
+def read_sidecar(filename: str, version: int) -> dict | None:
+    """Return a saved sidecar, or None if it is missing, unreadable or another version."""
+    if not os.path.exists(filename):
+        return None
+    try:
+        with open(filename, "r", encoding="utf-8") as file:
+            data = json.load(file)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(data, dict) or data.get("version") != version:
+        return None
+    return data
+
+
+def write_sidecar(filename: str, data: dict) -> None:
+    """Save a sidecar as JSON, via a temp file so it is never half written."""
+    temp_filename = filename + ".tmp"
+    with open(temp_filename, "w", encoding="utf-8") as file:
+        json.dump(data, file, separators=(",", ":"))
+    os.replace(temp_filename, filename)
+
+
+def iter_lines_reversed(filename: str, block_size: int = REVERSE_BLOCK_SIZE):
+    """
+    Yield the lines of a file (as bytes, without the newline) from last to first.
+
+    The file is read backward in fixed-size blocks, so only the end of the
+    file is touched when the caller stops early.
+    """
+    with open(filename, "rb") as file:
+        file.seek(0, os.SEEK_END)
+        position = file.tell()
+        remainder = b""
+        while position > 0:
+            read_size = min(block_size, position)
+            position -= read_size
+            file.seek(position)
+            lines = (file.read(read_size) + remainder).split(b"\n")
+
+            # The first piece may be the end of a line that started in an
+            # earlier block, so hold on to it until we read that block.
+
+            remainder = lines[0]
+            for line in reversed(lines[1:]):
+                yield line
+        yield remainder
+
+
+def read_last_qsos(filename: str, count: int) -> list[dict]:
+    """
+    Return the last count QSOs in the log, oldest first.
+
+    - Returns fewer if the log doesn't have that many
+    - Returns an empty list if the log doesn't exist
+    - Only the last count records are decoded
+    """
+    if count <= 0 or not os.path.exists(filename):
+        return []
+
+    qso_list = []
+    last_line = True
+    for raw_line in iter_lines_reversed(filename):
+
+        # The first piece we get back is whatever follows the last newline.
+        # If it isn't valid JSON it's a write that was cut off, so skip it.
+
+        is_last_line = last_line
+        last_line = False
+        line = raw_line.decode("utf-8").strip()
+        if line == "":
+            continue
+        try:
+            qso = json.loads(line)
+        except ValueError:
+            if is_last_line:
+                continue
+            raise
+        qso_list.append(qso)
+        if len(qso_list) == count:
+            break
+
+    qso_list.reverse()
+    if instrumentation.ENABLED:
+        instrumentation.add("qso_log.read_last_qsos", records=len(qso_list))
+    return qso_list
@@ -0,0 +1,281 @@
+"""
+qso_normalize.py
+
+Purpose:
+- Give band and mode one canonical spelling, so "20m", "20 M SSB" and
+  "14.250" all end up as band "20M" (and mode "SSB" where it was typed into
+  the band field). Exact-match search and stats then just compare keys.
+- New QSOs are normalized when they are appended (qso_repository, adif).
+- normalize_log() rewrites an existing JSONL log once, in a single streaming
+  pass, for records saved before this existed.
+
+Canonical forms:
+- band: ADIF band name, uppercase, no spaces ("160M", "20M", "1.25M", "70CM").
+  A frequency in MHz ("14.074", "7100 kHz") is turned into its band. A band
+  field holding only a mode ("SSB") becomes "" and the mode moves to mode.
+  Text after the band ("20M SSB", "20M/SSB") moves to mode only if it is a
+  mode in MODES (or an alias of one); "20 meters" is just the band. Anything
+  else ("20 M SS", text that isn't a band we know) is left as typed, only
+  stripped and uppercased, so normalize_log() never throws text away.
+- mode: stripped, uppercased, inner spaces and dashes removed ("FT-8" -> "FT8"),
+  with a few aliases (USB/LSB -> SSB).
+
+Usage (from repo root):
+    python qso_normalize.py [--log qsolog.jsonl]
+
+Rules:
+- Do NOT use input() or print() in this module (except main()).
+"""
+
+import os
+import re
+import shutil
+
+import qso_columns
+import qso_index
+import qso_log
+import qso_writer
+import stats_snapshot
+import time_index
+
+# (band, lowest MHz, highest MHz), from the ADIF band table.
+BAND_EDGES_MHZ = [
+    ("2190M", 0.1357, 0.1378),
+    ("630M", 0.472, 0.479),
+    ("160M", 1.8, 2.0),
+    ("80M", 3.5, 4.0),
+    ("60M", 5.06, 5.45),
+    ("40M", 7.0, 7.3),
+    ("30M", 10.1, 10.15),
+    ("20M", 14.0, 14.35),
+    ("17M", 18.068, 18.168),
+    ("15M", 21.0, 21.45),
+    ("12M", 24.89, 24.99),
+    ("10M", 28.0, 29.7),
+    ("6M", 50.0, 54.0),
+    ("4M", 70.0, 71.0),
+    ("2M", 144.0, 148.0),
+    ("1.25M", 222.0, 225.0),
+    ("70CM", 420.0, 450.0),
+    ("33CM", 902.0, 928.0),
+    ("23CM", 1240.0, 1300.0),
+]
+BANDS = {band for band, _low, _high in BAND_EDGES_MHZ}
+
+# Modes (canonical spelling) we recognize when they turn up in the band field.
+MODES = {
+    "AM",
+    "C4FM",
+    "CW",
+    "DMR",
+    "DSTAR",
+    "FM",
+    "FT4",
+    "FT8",
+    "JS8",
+    "JT65",
+    "JT9",
+    "MFSK",
+    "MSK144",
+    "OLIVIA",
+    "PSK31",
+    "PSK63",
+    "Q65",
+    "RTTY",
+    "SSB",
+    "SSTV",
+}
+
+MODE_ALIASES = {
+    "USB": "SSB",
+    "LSB": "SSB",
+    "A1A": "CW",
+}
+
+# Words that may follow a band number and just repeat the unit ("20 meters").
+BAND_UNIT_WORDS = {"METER", "METERS", "METRE", "METRES", "MTR", "MTRS"}
+
+# "20M", "20 m", "70cm", "1.25 M", "20" + whatever comes after (often a mode).
+_BAND_PATTERN = re.compile(r"^(\d+(?:\.\d+)?)\s*(CM|M)?\b\s*(.*)$")
+
+# "14.074", "14.074 MHz", "7100 kHz" + whatever comes after.
+_FREQUENCY_PATTERN = re.compile(r"^(\d+(?:\.\d+)?)\s*(MHZ|KHZ)?\b\s*(.*)$")
+
+
+def normalize_band(text: str) -> tuple[str, str]:
+    """
+    Return (band, leftover) for what was typed in the band field.
+
+    leftover is a mode typed after the band, like the "SSB" in "20 M SSB",
+    so callers can use it as the mode. It is "" when there was nothing else.
+    A field holding only a mode ("SSB") gives ("", "SSB"). If what follows
+    the band isn't a mode ("20 M SS"), the text is returned as the band.
+    """
+    text = text.strip().upper()
+    band, leftover = _band_from_frequency(text)
+    if band is None:
+        band, leftover = _band_from_name(text)
+    if band is None:
+        if normalize_mode(text) in MODES:
+            return "", text
+        return text, ""
+    return band, leftover
+
+
+def normalize_mode(text: str) -> str:
+    """Return the canonical spelling of a mode."""
+    mode = re.sub(r"[\s\-]+", "", text.strip().upper()).strip("()[]")
+    return MODE_ALIASES.get(mode, mode)
+
+
+def normalize_qso(qso: dict) -> dict:
+    """
+    Return a copy of qso with band and mode in canonical form.
+
+    A mode typed into the band field moves to mode when mode is missing or
+    empty. Values that aren't strings are left alone.
+    """
+    qso = dict(qso)
+    band = qso.get("band")
+    if isinstance(band, str):
+        band, leftover = normalize_band(band)
+        qso["band"] = band
+        if leftover and not qso.get("mode"):
+            qso["mode"] = leftover
+    mode = qso.get("mode")
+    if isinstance(mode, str):
+        qso["mode"] = normalize_mode(mode)
+    return qso
+
+
+def normalize_log(log_filename: str) -> dict:
+    """
+    Rewrite the JSONL log with every QSO normalized (one streaming pass).
+
+    The new log is written next to the old one and swapped in with
+    os.replace, so a crash leaves one or the other, never a mix. Sidecars
+    built from the old contents (indexes, stats snapshot, dupe set, column
+    store) are thrown away so they get rebuilt.
+
+    Only JSONL logs are rewritten. A SQLite log raises ValueError: its QSOs
+    are normalized as they are added (qso_repository).
+
+    Returns {"records": total QSOs, "changed": QSOs that were rewritten}.
+    """
+    # Imported here: qso_repository imports this module to normalize appends.
+
+    import qso_repository
+
+    if log_filename.lower().endswith(qso_repository.SQLITE_SUFFIXES):
+        raise ValueError(
+            f"{log_filename} is a SQLite log; only JSONL logs can be normalized."
+        )
+    result = {"records": 0, "changed": 0}
+    if not os.path.exists(log_filename):
+        return result
+
+    temp_filename = log_filename + ".normalize.tmp"
+    if os.path.exists(temp_filename):
+        os.remove(temp_filename)
+    with qso_writer.QSOWriter(temp_filename, flush_every=1000) as writer:
+        for qso in qso_log.iter_qsos(log_filename):
+            normalized = normalize_qso(qso)
+            if normalized != qso:
+                result["changed"] += 1
+            writer.write(normalized)
+            result["records"] += 1
+
+    if result["changed"] == 0:
+        os.remove(temp_filename)
+        return result
+
+    os.replace(temp_filename, log_filename)
+    _drop_sidecars(log_filename)
+    return result
+
+
+# -----------------------------
+# Internal helpers (private)
+# -----------------------------
+def _band_from_frequency(text: str) -> tuple[str | None, str]:
+    """Turn "14.074" / "14.074 MHz" / "14074 kHz" into ("20M", leftover)."""
+    match = _FREQUENCY_PATTERN.match(text)
+    if match is None:
+        return None, ""
+    number, unit, leftover = match.groups()
+
+    # A bare whole number like "20" is a band in meters, not 20 MHz.
+
+    if unit is None and "." not in number:
+        return None, ""
+    mhz = float(number) / 1000 if unit == "KHZ" else float(number)
+    for band, low, high in BAND_EDGES_MHZ:
+        if low <= mhz <= high:
+            return _with_mode(band, leftover)
+    return None, ""
+
+
+def _band_from_name(text: str) -> tuple[str | None, str]:
+    """Turn "20 M SSB" / "70cm" / "20" into ("20M", "SSB") / ("70CM", "") / ("20M", "")."""
+    match = _BAND_PATTERN.match(text)
+    if match is None:
+        return None, ""
+    number, unit, leftover = match.groups()
+    band = number + (unit or "M")
+    if band not in BANDS:
+        return None, ""
+    return _with_mode(band, leftover)
+
+
+def _with_mode(band: str, leftover: str) -> tuple[str | None, str]:
+    """
+    Return (band, mode) when what followed the band is nothing, a unit word or
+    a mode we know, else (None, "") so the field is kept as typed.
+    """
+    leftover = leftover.strip().lstrip("/,;:-").strip()
+    if leftover == "" or leftover in BAND_UNIT_WORDS:
+        return band, ""
+    if normalize_mode(leftover) in MODES:
+        return band, leftover
+    return None, ""
+
+
+def _drop_sidecars(log_filename: str) -> None:
+    """Remove files built from the old log contents; they are rebuilt on next use."""
+
+    # Imported here: dupe_checker imports this module for its keys.
+
+    import dupe_checker
+
+    for filename in [
+        qso_index.index_filename(log_filename),
+        qso_index.offsets_filename(log_filename),
+        stats_snapshot.snapshot_filename(log_filename),
+        time_index.time_index_filename(log_filename),
+        dupe_checker.dupes_filename(log_filename),
+    ]:
+        if os.path.exists(filename):
+            os.remove(filename)
+
+    columns_dir = qso_columns.columns_dirname(log_filename)
+    if os.path.isdir(columns_dir):
+        shutil.rmtree(columns_dir)
+        qso_columns.sync_columns(log_filename)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Normalize band and mode in the log.")
+    parser.add_argument("--log", default="qsolog.jsonl", help="JSONL QSO log")
+    args = parser.parse_args()
+
+    try:
+        result = normalize_log(args.log)
+    except ValueError as exc:
+        parser.error(str(exc))
+    print(f"Normalized {result['changed']} of {result['records']} QSOs in {args.log}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,396 @@
+"""
+qso_repository.py
+
+Purpose:
+- One interface for storing and reading QSOs, so the menu code doesn't care
+  whether the log is the JSONL file or a SQLite database.
+
+Backends:
+- JSONLRepository: the original qsolog.jsonl file, with the sidecar index,
+  stats snapshot and (optional) column store kept up to date on append.
+  When the column store exists and covers the whole log, stats, counts and
+  searches are column scans; otherwise they use the index and snapshot.
+- SQLiteRepository: a SQLite database with one row per QSO. The whole QSO is
+  kept as JSON (so nothing is lost) and call_sign, band, mode and timestamp
+  are copied into indexed columns for searching and counting.
+
+Every backend stores band and mode in canonical form (qso_normalize), so
+exact band/mode searches just compare keys.
+
+open_repository(filename) picks the backend from the file name: ".sqlite3",
+".sqlite" and ".db" files use SQLite, anything else is JSONL.
+
+Usage (from repo root):
+    python qso_repository.py migrate qsolog.jsonl qsolog.sqlite3
+
+Rules:
+- Do NOT use input() or print() in this module (except main()).
+"""
+
+import json
+import os
+import sqlite3
+from collections import Counter
+
+import callsign_index
+import qso_columns
+import qso_index
+import qso_log
+import qso_normalize
+import qso_stats
+import qso_writer
+import stats_snapshot
+import time_index
+
+SQLITE_SUFFIXES = (".sqlite3", ".sqlite", ".db")
+
+# Fields search() accepts. Every backend can answer these from an index.
+SEARCH_FIELDS = ("call_sign", "band", "mode")
+
+# SQLite columns copied out of each QSO (all indexed).
+SQLITE_COLUMNS = ("call_sign", "band", "mode", qso_stats.TIMESTAMP_FIELD)
+
+MIGRATE_BATCH_SIZE = 10_000
+
+
+class QSORepository:
+    """
+    What every storage backend provides.
+
+    - append(qso) / append_many(qsos): add QSOs to the end of the log
+    - iter_qsos(): every QSO, oldest first
+    - search(field, value, partial=False): QSOs whose field equals value (or,
+      with partial=True, contains it, ignoring case), oldest first
+    - recent(count): the last count QSOs, oldest first
+    - time_range(start, end): QSOs with start <= timestamp < end, oldest first
+      (timestamp strings, None for no limit)
+    - count(field): Counter of a field, normalized like count_qso_field()
+    - distinct(fields): each distinct tuple of those fields' values, as stored
+      (None for a missing field), in no particular order
+    - qso_count(): how many QSOs there are
+    - stats(): a qso_stats.QSOStats for the whole log
+    """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def append(self, qso: dict) -> None:
+        self.append_many([qso])
+
+    def append_many(self, qsos) -> int:
+        raise NotImplementedError
+
+    def iter_qsos(self):
+        raise NotImplementedError
+
+    def search(self, field_name: str, value: str, partial: bool = False):
+        raise NotImplementedError
+
+    def recent(self, count: int) -> list[dict]:
+        raise NotImplementedError
+
+    def time_range(self, start: str = None, end: str = None):
+        raise NotImplementedError
+
+    def count(self, field_name: str) -> Counter:
+        raise NotImplementedError
+
+    def qso_count(self) -> int:
+        raise NotImplementedError
+
+    def distinct(self, fields) -> list[tuple]:
+        rows = (tuple(qso.get(field) for field in fields) for qso in self.iter_qsos())
+        return list(dict.fromkeys(rows))
+
+    def stats(self) -> qso_stats.QSOStats:
+        return qso_stats.QSOStats().update(self.iter_qsos())
+
+    def close(self) -> None:
+        pass
+
+
+class JSONLRepository(QSORepository):
+    """The JSONL log file, read through the sidecar index where it can be."""
+
+    def __init__(self, filename: str):
+        self.filename = filename
+
+    def append(self, qso: dict) -> None:
+        # append_qso writes the whole line in one go and fsyncs it, so a crash
+        # can't leave half a QSO in the log.
+
+        qso_writer.append_qso(self.filename, qso_normalize.normalize_qso(qso))
+        self._update_sidecars()
+
+    def append_many(self, qsos) -> int:
+        with qso_writer.QSOWriter(self.filename, flush_every=1000) as writer:
+            writer.write_many(qso_normalize.normalize_qso(qso) for qso in qsos)
+        self._update_sidecars()
+        return writer.written
+
+    def iter_qsos(self):
+        return qso_log.iter_qsos(self.filename)
+
+    def search(self, field_name: str, value: str, partial: bool = False):
+        _check_search_field(field_name)
+        store = qso_columns.open_if_fresh(self.filename)
+        if store is not None:
+            with store:
+                if partial:
+                    text = value.upper()
+                    matches = store.find(
+                        field_name, lambda stored: text in stored.upper()
+                    )
+                else:
+                    matches = store.lookup(field_name, value)
+                offsets = [store.offsets[number] for number in matches]
+            return qso_log.read_qsos_at_offsets(self.filename, offsets)
+
+        index = qso_index.load_index(self.filename)
+        calls = None
+        if partial and field_name == "call_sign":
+            calls = callsign_index.for_index(index, self.filename)
+        if calls is not None:
+            matches = calls.find(value)
+        elif partial:
+            text = value.upper()
+            matches = qso_index.find_records(
+                index, field_name, lambda stored: text in stored.upper()
+            )
+        else:
+            matches = qso_index.lookup(index, field_name, value)
+        return qso_index.read_qsos_at(self.filename, index, matches)
+
+    def recent(self, count: int) -> list[dict]:
+        return qso_log.read_last_qsos(self.filename, count)
+
+    def time_range(self, start: str = None, end: str = None):
+        if not os.path.exists(self.filename):
+            return iter([])
+        return time_index.iter_range(self.filename, start, end)
+
+    def count(self, field_name: str) -> Counter:
+        if field_name in qso_columns.DICTIONARY_FIELDS:
+            store = qso_columns.open_if_fresh(self.filename)
+            if store is not None:
+                with store:
+                    return store.count_field(field_name)
+        if field_name in qso_index.INDEXED_FIELDS:
+            return qso_index.count_field(
+                qso_index.load_index(self.filename), field_name
+            )
+        return _count_values(qso.get(field_name) for qso in self.iter_qsos())
+
+    def qso_count(self) -> int:
+        return qso_index.qso_count(qso_index.load_index(self.filename))
+
+    def stats(self) -> qso_stats.QSOStats:
+        store = qso_columns.open_if_fresh(self.filename)
+        if store is not None:
+            with store:
+                return store.stats()
+        return stats_snapshot.load_stats(self.filename)
+
+    def _update_sidecars(self) -> None:
+        # Keep the search index (and the column store, if there is one) current
+        # so the next search doesn't rebuild it.
+
+        qso_index.update_index(self.filename)
+        qso_columns.update_columns(self.filename)
+
+
+class SQLiteRepository(QSORepository):
+    """QSOs in a SQLite database, with indexes on call_sign, band, mode and timestamp."""
+
+    def __init__(self, filename: str):
+        self.filename = filename
+        self._db = sqlite3.connect(filename)
+        columns = "".join(f", {column} TEXT" for column in SQLITE_COLUMNS)
+        self._db.execute(
+            f"CREATE TABLE IF NOT EXISTS qsos (id INTEGER PRIMARY KEY{columns},"
+            " data TEXT NOT NULL)"
+        )
+        for column in SQLITE_COLUMNS:
+            self._db.execute(
+                f"CREATE INDEX IF NOT EXISTS qsos_{column} ON qsos ({column})"
+            )
+        self._db.commit()
+
+    def append_many(self, qsos) -> int:
+        rows = (_sqlite_row(qso_normalize.normalize_qso(qso)) for qso in qsos)
+        placeholders = ", ".join("?" for _ in range(len(SQLITE_COLUMNS) + 1))
+        with self._db:
+            cursor = self._db.executemany(
+                f"INSERT INTO qsos ({', '.join(SQLITE_COLUMNS)}, data)"
+                f" VALUES ({placeholders})",
+                rows,
+            )
+        return cursor.rowcount
+
+    def iter_qsos(self):
+        for (data,) in self._db.execute("SELECT data FROM qsos ORDER BY id"):
+            yield json.loads(data)
+
+    def search(self, field_name: str, value: str, partial: bool = False):
+        _check_search_field(field_name)
+        if partial:
+            where = f"instr(upper({field_name}), ?) > 0"
+            value = value.upper()
+        else:
+            where = f"{field_name} = ?"
+        rows = self._db.execute(
+            f"SELECT data FROM qsos WHERE {where} ORDER BY id", (value,)
+        )
+        return (json.loads(data) for (data,) in rows)
+
+    def recent(self, count: int) -> list[dict]:
+        rows = self._db.execute(
+            "SELECT data FROM qsos ORDER BY id DESC LIMIT ?", (count,)
+        ).fetchall()
+        return [json.loads(data) for (data,) in reversed(rows)]
+
+    def time_range(self, start: str = None, end: str = None):
+        rows = self._db.execute(
+            "SELECT data FROM qsos WHERE timestamp >= ? AND timestamp < ?"
+            " ORDER BY id",
+            (start if start is not None else "", end if end is not None else "~"),
+        )
+        return (json.loads(data) for (data,) in rows)
+
+    def count(self, field_name: str) -> Counter:
+        if field_name not in SQLITE_COLUMNS:
+            return _count_values(qso.get(field_name) for qso in self.iter_qsos())
+
+        # Group on the stored value, then normalize in Python so the result is
+        # exactly what count_qso_field() gives (SQLite's upper() is ASCII-only).
+        # Groups come back in first-seen order so ties stay stable.
+
+        rows = self._db.execute(
+            f"SELECT {field_name}, COUNT(*) FROM qsos WHERE {field_name} IS NOT NULL"
+            f" GROUP BY {field_name} ORDER BY MIN(id)"
+        )
+        counter = Counter()
+        for value, count in rows:
+            counter[value.strip().upper()] += count
+        return counter
+
+    def qso_count(self) -> int:
+        (count,) = self._db.execute("SELECT COUNT(*) FROM qsos").fetchone()
+        return count
+
+    def distinct(self, fields) -> list[tuple]:
+        if not set(fields) <= set(SQLITE_COLUMNS):
+            return super().distinct(fields)
+        columns = ", ".join(fields)
+        rows = self._db.execute(f"SELECT DISTINCT {columns} FROM qsos")
+        return [tuple(row) for row in rows]
+
+    def stats(self) -> qso_stats.QSOStats:
+        """Build the same QSOStats as qso_stats.compute_stats() with GROUP BY queries."""
+        stats = qso_stats.QSOStats()
+        stats.total = self.qso_count()
+        stats.calls = self.count("call_sign")
+        stats.bands = self.count("band")
+        stats.modes = self.count("mode")
+
+        rows = self._db.execute(
+            "SELECT band, mode, COUNT(*) FROM qsos WHERE band IS NOT NULL"
+            " GROUP BY band, mode ORDER BY MIN(id)"
+        )
+        for band, mode, count in rows:
+            mode = mode.strip().upper() if mode is not None else ""
+            stats.band_modes[(band.strip().upper(), mode)] += count
+
+        rows = self._db.execute(
+            "SELECT substr(timestamp, 1, 10), COUNT(*) FROM qsos"
+            " WHERE length(timestamp) >= 10"
+            " GROUP BY substr(timestamp, 1, 10) ORDER BY MIN(id)"
+        )
+        for day, count in rows:
+            stats.days[day] += count
+        return stats
+
+    def close(self) -> None:
+        self._db.close()
+
+
+def open_repository(filename: str) -> QSORepository:
+    """Open the log at filename with the backend its extension calls for."""
+    if filename.lower().endswith(SQLITE_SUFFIXES):
+        return SQLiteRepository(filename)
+    return JSONLRepository(filename)
+
+
+def migrate(source_filename: str, target_filename: str) -> int:
+    """
+    Copy every QSO from one log to another (e.g. JSONL -> SQLite).
+
+    The target must be empty, so running it twice can't duplicate QSOs.
+    Returns how many QSOs were copied.
+    """
+    with open_repository(source_filename) as source:
+        with open_repository(target_filename) as target:
+            if target.qso_count() > 0:
+                raise ValueError(f"{target_filename} already has QSOs in it.")
+            copied = 0
+            batch = []
+            for qso in source.iter_qsos():
+                batch.append(qso)
+                if len(batch) >= MIGRATE_BATCH_SIZE:
+                    copied += target.append_many(batch)
+                    batch = []
+            if batch:
+                copied += target.append_many(batch)
+    return copied
+
+
+# -----------------------------
+# Internal helpers (private)
+# -----------------------------
+def _check_search_field(field_name: str) -> None:
+    if field_name not in SEARCH_FIELDS:
+        raise ValueError(f"Can't search by {field_name!r}.")
+
+
+def _sqlite_row(qso: dict) -> tuple:
+    row = []
+    for column in SQLITE_COLUMNS:
+        value = qso.get(column)
+        row.append(value if isinstance(value, str) else None)
+    row.append(json.dumps(qso))
+    return tuple(row)
+
+
+def _count_values(values) -> Counter:
+    """Count values like count_qso_field(): missing skipped, strip + uppercase."""
+    counter = Counter()
+    for value in values:
+        if isinstance(value, str):
+            counter[value.strip().upper()] += 1
+    return counter
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Manage QSO log storage.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    migrate_parser = commands.add_parser("migrate", help="copy a log to a new backend")
+    migrate_parser.add_argument("source", help="log to copy from (e.g. qsolog.jsonl)")
+    migrate_parser.add_argument("target", help="new log (e.g. qsolog.sqlite3)")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.source):
+        parser.error(f"{args.source} does not exist")
+    try:
+        copied = migrate(args.source, args.target)
+    except ValueError as exc:
+        parser.error(str(exc))
+    print(f"Copied {copied} QSOs from {args.source} to {args.target}.")
+
+
+if __name__ == "__main__":
+    main()
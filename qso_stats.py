@@ -0,0 +1,147 @@
+"""
+qso_stats.py
+
+Purpose:
+- Build every stats counter the logger shows in a single pass over the QSOs.
+- Results from separate chunks of the log can be merged into one.
+
+Counters kept:
+- calls, bands, modes (same normalization as count_qso_field: strip + uppercase)
+- band_modes: (band, mode) pairs, mode is "" when a QSO has none
+- days: UTC date (YYYY-MM-DD) taken from the QSO timestamp, when there is one
+
+Rules:
+- Do NOT use input() or print() in this module.
+"""
+
+from collections import Counter
+
+import qso_log
+
+TIMESTAMP_FIELD = "timestamp"
+
+# The only fields the stats need. Everything else can be dropped while reading.
+STATS_FIELDS = ["call_sign", "band", "mode", TIMESTAMP_FIELD]
+
+
+class QSOStats:
+    """Counters for a set of QSOs. Fill with add()/update(), combine with merge()."""
+
+    def __init__(self):
+        self.total = 0
+        self.calls = Counter()
+        self.bands = Counter()
+        self.modes = Counter()
+        self.band_modes = Counter()
+        self.days = Counter()
+
+    def add(self, qso: dict) -> None:
+        """Count one QSO. Each field is cleaned up once, then used by every counter."""
+        self.total += 1
+
+        call = _clean(qso.get("call_sign"))
+        if call is not None:
+            self.calls[call] += 1
+
+        band = _clean(qso.get("band"))
+        mode = _clean(qso.get("mode"))
+        if band is not None:
+            self.bands[band] += 1
+            self.band_modes[(band, mode or "")] += 1
+        if mode is not None:
+            self.modes[mode] += 1
+
+        timestamp = qso.get(TIMESTAMP_FIELD)
+        if isinstance(timestamp, str) and len(timestamp) >= 10:
+            self.days[timestamp[:10]] += 1
+
+    def update(self, qsos) -> "QSOStats":
+        """Count every QSO from a list or generator. Returns self for chaining."""
+        for qso in qsos:
+            self.add(qso)
+        return self
+
+    def merge(self, other: "QSOStats") -> "QSOStats":
+        """
+        Fold another QSOStats into this one and return self.
+
+        Merge chunks in log order so ties in top() come out the same as a
+        single pass over the whole log would give.
+        """
+        self.total += other.total
+        self.calls.update(other.calls)
+        self.bands.update(other.bands)
+        self.modes.update(other.modes)
+        self.band_modes.update(other.band_modes)
+        self.days.update(other.days)
+        return self
+
+    def top(self, counter_name: str, k: int) -> list[tuple]:
+        """
+        Return the k most common (value, count) pairs of one counter.
+
+        Counter.most_common(k) keeps a heap of k entries, so the whole counter is
+        never sorted. Ties keep first-seen order, like count_qso_field().
+        """
+        counter = getattr(self, counter_name)
+        return counter.most_common(k)
+
+    def to_dict(self) -> dict:
+        """Return a JSON-friendly copy. Counter order is kept so ties stay stable."""
+        return {
+            "total": self.total,
+            "calls": dict(self.calls),
+            "bands": dict(self.bands),
+            "modes": dict(self.modes),
+            "band_modes": [
+                [band, mode, count] for (band, mode), count in self.band_modes.items()
+            ],
+            "days": dict(self.days),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "QSOStats":
+        """Rebuild a QSOStats saved with to_dict()."""
+        stats = cls()
+        stats.total = data["total"]
+        stats.calls = Counter(data["calls"])
+        stats.bands = Counter(data["bands"])
+        stats.modes = Counter(data["modes"])
+        stats.band_modes = Counter(
+            {(band, mode): count for band, mode, count in data["band_modes"]}
+        )
+        stats.days = Counter(data["days"])
+        return stats
+
+
+def compute_stats(filename: str) -> QSOStats:
+    """Stream the log once and return its QSOStats."""
+    return QSOStats().update(qso_log.iter_qsos(filename, fields=STATS_FIELDS))
+
+
+def count_rates(qsos) -> dict:
+    """
+    Count QSOs per UTC day ("YYYY-MM-DD") and per UTC hour ("YYYY-MM-DDTHH").
+
+    Returns {"days": Counter, "hours": Counter}. QSOs without a timestamp are
+    skipped.
+    """
+    rates = {"days": Counter(), "hours": Counter()}
+    for qso in qsos:
+        add_rates(rates, qso)
+    return rates
+
+
+def add_rates(rates: dict, qso: dict) -> None:
+    """Count one more QSO into rates from count_rates(), for callers that stream."""
+    timestamp = qso.get(TIMESTAMP_FIELD)
+    if isinstance(timestamp, str) and len(timestamp) >= 13:
+        rates["days"][timestamp[:10]] += 1
+        rates["hours"][timestamp[:13]] += 1
+
+
+def _clean(value) -> str | None:
+    """Normalize a field value the way count_qso_field does. None means skip it."""
+    if not isinstance(value, str):
+        return None
+    return value.strip().upper()
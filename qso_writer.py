@@ -0,0 +1,159 @@
+"""
+qso_writer.py
+
+Purpose:
+- Append QSOs to the JSONL log without opening and closing the file for
+  every single QSO (contest imports, fast FT8 sessions).
+- QSOs are collected in memory and written in batches. A batch is flushed
+  (and fsynced) after flush_every QSOs, once flush_interval seconds have passed
+  since the last flush, or when the writer is closed.
+
+Crash safety:
+- Each batch is one os.write() of whole lines on a file opened for append.
+- If the program dies in the middle of a write, the log can end with part of
+  a line. Readers (qso_log) ignore such a last line, and the next QSOWriter
+  cuts it off before appending, so a half-written QSO is never read back.
+
+Rules:
+- Do NOT use input() or print() in this module.
+"""
+
+import json
+import os
+import time
+
+DEFAULT_FLUSH_EVERY = 100
+DEFAULT_FLUSH_INTERVAL = 1.0
+
+# How far back from the end we look for the last newline when repairing.
+REPAIR_BLOCK_SIZE = 64 * 1024
+
+
+class QSOWriter:
+    """
+    Buffered, append-only writer for the QSO log.
+
+    Use it as a context manager so the last batch is always flushed:
+
+        with QSOWriter(LOG_FILE) as writer:
+            writer.write(qso)
+    """
+
+    def __init__(
+        self,
+        filename: str,
+        flush_every: int = DEFAULT_FLUSH_EVERY,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+        fsync: bool = True,
+    ):
+        self.filename = filename
+        self.flush_every = max(1, flush_every)
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.written = 0
+
+        repair_torn_tail(filename)
+        flags = os.O_WRONLY | os.O_APPEND | os.O_CREAT | getattr(os, "O_BINARY", 0)
+        self._fd = os.open(filename, flags, 0o644)
+        self._pending = []
+        self._last_flush = time.monotonic()
+
+    def write(self, qso: dict) -> None:
+        """
+        Queue one QSO. It reaches the file on the next flush.
+
+        The time limit is checked here, when a QSO arrives. There is no
+        background timer, so call flush() or close() when a session goes idle.
+        """
+        self._pending.append(json.dumps(qso) + "\n")
+        if len(self._pending) >= self.flush_every:
+            self.flush()
+        elif time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def write_many(self, qsos) -> None:
+        """Queue every QSO from a list or generator."""
+        for qso in qsos:
+            self.write(qso)
+
+    def flush(self) -> None:
+        """Write every queued QSO to the log in one go, then fsync if enabled."""
+        self._last_flush = time.monotonic()
+        if not self._pending:
+            return
+
+        data = "".join(self._pending).encode("utf-8")
+        view = memoryview(data)
+        while view:
+            count = os.write(self._fd, view)
+            view = view[count:]
+        if self.fsync:
+            os.fsync(self._fd)
+
+        self.written += len(self._pending)
+        self._pending = []
+
+    def close(self) -> None:
+        """Flush anything still queued and close the file."""
+        if self._fd is None:
+            return
+        try:
+            self.flush()
+        finally:
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def append_qso(filename: str, qso: dict) -> None:
+    """Append a single QSO and make sure it is on disk before returning."""
+    with QSOWriter(filename, flush_every=1) as writer:
+        writer.write(qso)
+
+
+def repair_torn_tail(filename: str) -> None:
+    """
+    Make sure the log ends with a complete line before we append to it.
+
+    - A last line that is valid JSON but has no newline gets its newline
+    - A last line that is not valid JSON (a write cut off by a crash) is removed
+    """
+    if not os.path.exists(filename):
+        return
+
+    with open(filename, "r+b") as file:
+        file.seek(0, os.SEEK_END)
+        size = file.tell()
+        if size == 0:
+            return
+        file.seek(size - 1)
+        if file.read(1) == b"\n":
+            return
+
+        # Find where the unfinished last line starts.
+
+        start = max(0, size - REPAIR_BLOCK_SIZE)
+        while True:
+            file.seek(start)
+            block = file.read(size - start)
+            newline = block.rfind(b"\n")
+            if newline != -1 or start == 0:
+                break
+            start = max(0, start - REPAIR_BLOCK_SIZE)
+        line_start = start + newline + 1
+
+        last_line = block[newline + 1 :]
+        if last_line.strip() == b"":
+            return
+        try:
+            json.loads(last_line)
+        except ValueError:
+            file.truncate(line_start)
+            return
+        file.seek(size)
+        file.write(b"\n")
@@ -0,0 +1,95 @@
+"""
+stats_snapshot.py
+
+Purpose:
+- Keep the stats counters saved next to the log ("<log file>.stats") so the
+  stats screen doesn't recount the whole log every time.
+- Each run only folds in the QSOs appended since the snapshot was saved.
+- A truncated or rewritten log is noticed and the snapshot is rebuilt.
+
+What the snapshot stores (as JSON):
+- log_size: the byte offset the counters cover
+- tail_check: the last few bytes that were counted, to notice a rewritten log
+- stats: QSOStats.to_dict()
+
+Rules:
+- Do NOT use input() or print() in this module.
+- The log file is the source of truth. The snapshot can always be rebuilt.
+"""
+
+import os
+
+import parallel_scan
+import qso_log
+import qso_stats
+
+SNAPSHOT_SUFFIX = ".stats"
+SNAPSHOT_VERSION = 1
+
+
+def snapshot_filename(log_filename: str) -> str:
+    """Return the stats snapshot path for a log file."""
+    return log_filename + SNAPSHOT_SUFFIX
+
+
+def load_stats(log_filename: str) -> qso_stats.QSOStats:
+    """
+    Return up-to-date QSOStats for the log.
+
+    - Reuses the saved snapshot and counts only the appended tail
+    - Rebuilds from scratch (in parallel for big logs) if the log shrank or
+      was rewritten, or there is no usable snapshot
+    - Saves the snapshot again whenever it changed
+    """
+    if not os.path.exists(log_filename):
+        return qso_stats.QSOStats()
+
+    size = os.path.getsize(log_filename)
+    snapshot = qso_log.read_sidecar(snapshot_filename(log_filename), SNAPSHOT_VERSION)
+
+    if snapshot is not None and qso_log.log_only_grew(
+        log_filename, snapshot["log_size"], snapshot["tail_check"], size
+    ):
+        stats = qso_stats.QSOStats.from_dict(snapshot["stats"])
+        covered = snapshot["log_size"]
+        if covered == size:
+            return stats
+        covered = _fold_tail(stats, log_filename, covered, size)
+    else:
+        stats, covered = _rebuild(log_filename, size)
+
+    save_snapshot(stats, covered, log_filename)
+    return stats
+
+
+def save_snapshot(stats: qso_stats.QSOStats, covered: int, log_filename: str) -> None:
+    """Write the snapshot next to the log (via a temp file so it is never half written)."""
+    snapshot = {
+        "version": SNAPSHOT_VERSION,
+        "log_size": covered,
+        "tail_check": qso_log.tail_check(log_filename, covered),
+        "stats": stats.to_dict(),
+    }
+    qso_log.write_sidecar(snapshot_filename(log_filename), snapshot)
+
+
+# -----------------------------
+# Internal helpers (private)
+# -----------------------------
+def _fold_tail(
+    stats: qso_stats.QSOStats, log_filename: str, start: int, size: int
+) -> int:
+    """Count the QSOs from byte offset start on. Returns the offset now covered."""
+    return qso_log.fold_records(
+        log_filename, start, size, lambda _offset, qso: stats.add(qso)
+    )
+
+
+def _rebuild(log_filename: str, size: int) -> tuple[qso_stats.QSOStats, int]:
+    """Count the whole log. Big logs are split across processes."""
+    if size >= parallel_scan.PARALLEL_THRESHOLD_BYTES:
+        return parallel_scan.scan_stats(log_filename), size
+
+    stats = qso_stats.QSOStats()
+    covered = _fold_tail(stats, log_filename, 0, size)
+    return stats, covered
@@ -0,0 +1,26 @@
+import json
+
+import pytest
+
+import hamqth_api
+from fake_hamqth_server import FakeHamQTHServer
+
+
+@pytest.fixture
+def fake_server(monkeypatch):
+    """A local fake HamQTH server with hamqth_api pointed at it and logged out."""
+    server = FakeHamQTHServer(user="bob", password="123").start()
+    monkeypatch.setenv("HAMQTH_USER", "bob")
+    monkeypatch.setenv("HAMQTH_PASS", "123")
+    monkeypatch.setattr(hamqth_api, "HAMQTH_XML_URL", server.url)
+    monkeypatch.setattr(hamqth_api, "_session_id", None)
+    monkeypatch.setattr(hamqth_api, "_session_expires_at", 0.0)
+    yield server
+    server.stop()
+
+
+def write_log(path, qsos, mode="w"):
+    """Write (or with mode="a", append) QSO dicts to a JSONL log."""
+    with open(path, mode, encoding="utf-8") as file:
+        for qso in qsos:
+            file.write(json.dumps(qso) + "\n")
@@ -0,0 +1,270 @@
+"""
+fake_hamqth_server.py
+
+A small local stand-in for the HamQTH XML API, so tests (and benchmarks) can
+exercise the real HTTP code without touching the network.
+
+- FakeHamQTHServer runs a threaded HTTP/1.1 server (keep-alive) on 127.0.0.1
+  in a background thread
+- AsyncFakeHamQTHServer is the same API as an asyncio server, for
+  hamqth_async; it runs on the test's own event loop
+- Answers login (?u=&p=) and lookup (?id=&callsign=) like xml.php does
+- Counts logins, lookups and TCP connections so tests can check reuse
+- in_flight / max_in_flight count requests being answered at once
+- Can expire sessions and add latency to every response
+"""
+
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+XML_HEAD = (
+    '<?xml version="1.0"?>\n<HamQTH version="2.8" xmlns="https://www.hamqth.com">'
+)
+XML_TAIL = "</HamQTH>"
+
+DEFAULT_RECORDS = {
+    "W1AW": {
+        "callsign": "w1aw",
+        "nick": "ARRL HQ",
+        "adr_name": "ARRL Headquarters",
+        "adr_city": "Newington",
+        "us_state": "CT",
+        "country": "United States",
+        "cq": "5",
+        "itu": "8",
+    },
+    "OK7AN": {
+        "callsign": "ok7an",
+        "nick": "Petr",
+        "qth": "Neratovice",
+        "country": "Czech Republic",
+        "cq": "15",
+        "itu": "28",
+    },
+}
+
+
+class _FakeHamQTH:
+    """Accounts, sessions and answers shared by both servers."""
+
+    def __init__(self, user="bob", password="123", records=None, latency=0.0):
+        self.user = user
+        self.password = password
+        self.records = dict(DEFAULT_RECORDS if records is None else records)
+        self.latency = latency
+        self.sessions = set()
+        self.logins = 0
+        self.lookups = 0
+        self.connections = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def expire_sessions(self) -> None:
+        with self._lock:
+            self.sessions.clear()
+
+    def answer(self, params: dict) -> str:
+        """Return the XML body for one request (params are single values)."""
+        if "u" in params:
+            with self._lock:
+                self.logins += 1
+                if params["u"] != self.user or params.get("p") != self.password:
+                    return _session_error("Wrong user name or password")
+                session_id = f"session{self.logins:04d}"
+                self.sessions.add(session_id)
+            return (
+                f"{XML_HEAD}<session><session_id>{session_id}</session_id>"
+                f"</session>{XML_TAIL}"
+            )
+
+        with self._lock:
+            self.lookups += 1
+            valid = params.get("id") in self.sessions
+        if not valid:
+            return _session_error("Session does not exist or expired")
+
+        record = self.records.get(params.get("callsign", "").upper())
+        if record is None:
+            return _session_error("Callsign not found")
+        fields = "".join(f"<{tag}>{value}</{tag}>" for tag, value in record.items())
+        return f"{XML_HEAD}<search>{fields}</search>{XML_TAIL}"
+
+
+class FakeHamQTHServer(_FakeHamQTH):
+    """Start with start(), point hamqth_api at .url, stop with stop()."""
+
+    def __init__(self, user="bob", password="123", records=None, latency=0.0):
+        super().__init__(user, password, records, latency)
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/xml.php"
+
+    def start(self) -> "FakeHamQTHServer":
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, args=(0.05,), daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def respond(self, params: dict) -> str:
+        """Return the XML body for one request, after the configured latency."""
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if self.latency:
+                time.sleep(self.latency)
+            return self.answer(params)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def _make_handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                with fake._lock:
+                    fake.connections += 1
+
+            def do_GET(self):
+                query = parse_qs(urlparse(self.path).query)
+                params = {key: values[0] for key, values in query.items()}
+                body = fake.respond(params).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/xml; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+class AsyncFakeHamQTHServer(_FakeHamQTH):
+    """
+    asyncio version: "await start()", point hamqth_async at .url, "await stop()".
+
+    - chunked=True sends bodies with Transfer-Encoding: chunked
+    - close_delimited=True answers as HTTP/1.0 with no length: the body is
+      sent in two pieces and ends when the server closes the connection
+    - charset is how bodies are encoded, and what Content-Type declares
+    - drop_idle_connections() closes kept-open connections, like a server
+      timing them out
+    """
+
+    def __init__(
+        self,
+        user="bob",
+        password="123",
+        records=None,
+        latency=0.0,
+        chunked=False,
+        close_delimited=False,
+        charset="utf-8",
+    ):
+        super().__init__(user, password, records, latency)
+        self.chunked = chunked
+        self.close_delimited = close_delimited
+        self.charset = charset
+        self._server = None
+        self._writers = set()
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.sockets[0].getsockname()[:2]
+        return f"http://{host}:{port}/xml.php"
+
+    async def start(self) -> "AsyncFakeHamQTHServer":
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        return self
+
+    async def stop(self) -> None:
+        self.drop_idle_connections()
+        self._server.close()
+        await self._server.wait_closed()
+
+    def drop_idle_connections(self) -> None:
+        for writer in list(self._writers):
+            writer.close()
+
+    async def _handle(self, reader, writer) -> None:
+        self.connections += 1
+        self._writers.add(writer)
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+                query = parse_qs(urlparse(request_line.split()[1].decode()).query)
+                params = {key: values[0] for key, values in query.items()}
+
+                self.in_flight += 1
+                self.max_in_flight = max(self.max_in_flight, self.in_flight)
+                try:
+                    if self.latency:
+                        await asyncio.sleep(self.latency)
+                    body = self.answer(params).encode(self.charset)
+                finally:
+                    self.in_flight -= 1
+
+                head = (
+                    "HTTP/1.1 200 OK\r\n"
+                    f"Content-Type: text/xml; charset={self.charset}\r\n"
+                )
+                if self.close_delimited:
+                    half = len(body) // 2
+                    writer.write(
+                        b"HTTP/1.0 200 OK\r\nContent-Type: text/xml\r\n\r\n"
+                        + body[:half]
+                    )
+                    await writer.drain()
+                    await asyncio.sleep(0.01)
+                    writer.write(body[half:])
+                    await writer.drain()
+                    break
+                if self.chunked:
+                    half = len(body) // 2
+                    chunks = b"".join(
+                        f"{len(part):x}\r\n".encode() + part + b"\r\n"
+                        for part in (body[:half], body[half:])
+                    )
+                    writer.write(
+                        (head + "Transfer-Encoding: chunked\r\n\r\n").encode()
+                        + chunks
+                        + b"0\r\n\r\n"
+                    )
+                else:
+                    writer.write(
+                        (head + f"Content-Length: {len(body)}\r\n\r\n").encode() + body
+                    )
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+
+def _session_error(message: str) -> str:
+    return f"{XML_HEAD}<session><error>{message}</error></session>{XML_TAIL}"
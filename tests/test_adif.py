@@ -0,0 +1,75 @@
+import io
+
+import pytest
+
+import qso_repository
+from adif import ADIFError, adif_to_qso, export_adif, import_adif, iter_adif_records
+
+SAMPLE_ADIF = """Exported by some contest logger
+<ADIF_VER:5>3.1.4 <PROGRAMID:4>TEST
+<EOH>
+<CALL:4>W1AW <BAND:3>20m <MODE:3>SSB <RST_SENT:2>59 <RST_RCVD:2>57
+<QSO_DATE:8>20260102 <TIME_ON:4>1234 <COMMENT:10>Good <copy> <EOR>
+<call:5>N8PPC<band:3>40M<mode:2>cw<eor>
+"""
+
+
+def test_iter_adif_records_handles_header_and_small_chunks():
+    records = list(iter_adif_records(io.StringIO(SAMPLE_ADIF), chunk_size=3))
+
+    assert len(records) == 2
+    assert records[0]["CALL"] == "W1AW"
+    assert records[0]["COMMENT"] == "Good <copy"
+    assert records[1] == {"CALL": "N8PPC", "BAND": "40M", "MODE": "cw"}
+
+
+def test_adif_to_qso_maps_fields():
+    record = next(iter_adif_records(io.StringIO(SAMPLE_ADIF)))
+
+    assert adif_to_qso(record) == {
+        "call_sign": "W1AW",
+        "their_signal_report": "57",
+        "my_signal_report": "59",
+        "band": "20M",
+        "mode": "SSB",
+        "comments": "Good <copy",
+        "timestamp": "2026-01-02T12:34:00Z",
+    }
+
+
+def test_bad_field_length_raises():
+    with pytest.raises(ADIFError):
+        list(iter_adif_records(io.StringIO("<CALL:x>W1AW <EOR>")))
+
+
+def test_import_then_export_round_trip(tmp_path):
+    adif_in = tmp_path / "in.adi"
+    adif_in.write_text(SAMPLE_ADIF, encoding="utf-8")
+    log = tmp_path / "log.jsonl"
+    adif_out = tmp_path / "out.adi"
+
+    imported = import_adif(str(adif_in), str(log))
+    exported = export_adif(str(log), str(adif_out))
+
+    assert imported["records"] == 2
+    assert exported["records"] == 2
+    with open(adif_out, encoding="utf-8") as file:
+        again = [adif_to_qso(r) for r in iter_adif_records(file)]
+    with open(adif_in, encoding="utf-8") as file:
+        original = [adif_to_qso(r) for r in iter_adif_records(file)]
+    assert again == original
+
+
+def test_sqlite_log(tmp_path):
+    adif_in = tmp_path / "in.adi"
+    adif_in.write_text(SAMPLE_ADIF, encoding="utf-8")
+    log = str(tmp_path / "log.sqlite3")
+    adif_out = tmp_path / "out.adi"
+
+    assert import_adif(str(adif_in), log)["records"] == 2
+    with qso_repository.open_repository(log) as repo:
+        assert [qso["call_sign"] for qso in repo.iter_qsos()] == ["W1AW", "N8PPC"]
+
+    assert export_adif(log, str(adif_out))["records"] == 2
+    with open(adif_out, encoding="utf-8") as file:
+        assert [r["CALL"] for r in iter_adif_records(file)] == ["W1AW", "N8PPC"]
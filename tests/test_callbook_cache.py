@@ -0,0 +1,169 @@
+import itertools
+
+import pytest
+
+import callbook_cache
+from callbook_cache import CallbookCache
+from hamqth_api import HamQTHError
+
+W1AW = {"call_sign": "W1AW", "name": "ARRL Headquarters"}
+
+
+class FakeLookup:
+    def __init__(self, results):
+        self.results = results
+        self.calls = []
+
+    def __call__(self, call_sign):
+        self.calls.append(call_sign)
+        if call_sign not in self.results:
+            raise HamQTHError(f"Call sign {call_sign} not found in HamQTH.")
+        return self.results[call_sign]
+
+
+def test_repeat_lookup_is_served_from_cache(tmp_path):
+    cache = CallbookCache(str(tmp_path / "cache.sqlite3"))
+    fetch = FakeLookup({"W1AW": W1AW})
+
+    assert cache.lookup(" w1aw ", fetch) == W1AW
+    assert cache.lookup("W1AW", fetch) == W1AW
+
+    assert fetch.calls == ["W1AW"]
+    assert cache.stats() == {"hits": 1, "misses": 1, "entries": 1}
+
+
+def test_entries_survive_reopening(tmp_path):
+    filename = str(tmp_path / "cache.sqlite3")
+    CallbookCache(filename).lookup("W1AW", FakeLookup({"W1AW": W1AW}))
+
+    fetch = FakeLookup({})
+    assert CallbookCache(filename).lookup("W1AW", fetch) == W1AW
+    assert fetch.calls == []
+
+
+def test_not_found_is_cached_as_negative_result(tmp_path):
+    cache = CallbookCache(str(tmp_path / "cache.sqlite3"))
+    fetch = FakeLookup({})
+
+    for _ in range(2):
+        with pytest.raises(HamQTHError) as exc:
+            cache.lookup("N0CALL", fetch)
+        assert "not found" in str(exc.value)
+
+    assert fetch.calls == ["N0CALL"]
+
+
+def test_other_errors_are_not_cached(tmp_path):
+    cache = CallbookCache(str(tmp_path / "cache.sqlite3"))
+
+    def failing(call_sign):
+        raise HamQTHError("Network error contacting HamQTH.")
+
+    with pytest.raises(HamQTHError):
+        cache.lookup("W1AW", failing)
+    assert cache.get("W1AW") is None
+
+
+def test_expired_entries_are_refetched(tmp_path):
+    cache = CallbookCache(str(tmp_path / "cache.sqlite3"), ttl=0)
+    fetch = FakeLookup({"W1AW": W1AW})
+
+    cache.lookup("W1AW", fetch)
+    cache.lookup("W1AW", fetch)
+
+    assert fetch.calls == ["W1AW", "W1AW"]
+
+
+class TickingClock:
+    """Stands in for the time module: every call is one second later."""
+
+    def __init__(self):
+        self.ticks = itertools.count(1_000_000)
+
+    def time(self):
+        return float(next(self.ticks))
+
+
+def test_least_recently_used_entry_is_evicted(tmp_path, monkeypatch):
+    monkeypatch.setattr(callbook_cache, "time", TickingClock())
+    cache = CallbookCache(str(tmp_path / "cache.sqlite3"), max_entries=2)
+    cache.put("W1AW", W1AW)
+    cache.put("N8PPC", {"call_sign": "N8PPC"})
+    cache.get("W1AW")
+
+    cache.put("VE3AT", {"call_sign": "VE3AT"})
+
+    assert cache.get("N8PPC") is None
+    assert cache.get("W1AW") is not None
+    assert cache.get("VE3AT") is not None
+
+
+def test_lookup_many_only_fetches_misses(tmp_path):
+    cache = CallbookCache(str(tmp_path / "cache.sqlite3"))
+    cache.put("W1AW", W1AW)
+    fetched = []
+
+    def fetch_many(calls):
+        fetched.append(list(calls))
+        return {
+            call: HamQTHError(f"Call sign {call} not found in HamQTH.")
+            for call in calls
+        }
+
+    results = cache.lookup_many(["n0call", "W1AW", "N0CALL"], fetch_many)
+
+    assert list(results) == ["N0CALL", "W1AW"]
+    assert results["W1AW"] == W1AW
+    assert isinstance(results["N0CALL"], HamQTHError)
+    assert fetched == [["N0CALL"]]
+    assert cache.get("N0CALL")[1] is not None
+
+
+class CountingCommits:
+    """Wraps a sqlite3 connection and counts commit() calls."""
+
+    def __init__(self, db):
+        self.db = db
+        self.commits = 0
+
+    def commit(self):
+        self.commits += 1
+        self.db.commit()
+
+    def __getattr__(self, name):
+        return getattr(self.db, name)
+
+
+def test_hits_do_not_commit(tmp_path, monkeypatch):
+    monkeypatch.setattr(callbook_cache, "time", TickingClock())
+    filename = str(tmp_path / "cache.sqlite3")
+    cache = CallbookCache(filename)
+    cache.put("W1AW", W1AW)
+    cache._db = CountingCommits(cache._db)
+
+    for _ in range(5):
+        assert cache.get("W1AW") is not None
+    assert cache._db.commits == 0
+
+    # Written out on close, so the recency survives reopening.
+
+    used = cache._used["W1AW"]
+    cache.close()
+    reopened = CallbookCache(filename)
+    (last_used,) = reopened._db.execute(
+        "SELECT last_used FROM callbook WHERE call_sign = 'W1AW'"
+    ).fetchone()
+    assert last_used == used
+
+
+def test_lookup_many_commits_once(tmp_path):
+    cache = CallbookCache(str(tmp_path / "cache.sqlite3"))
+    cache._db = CountingCommits(cache._db)
+    calls = [f"K{n}ABC" for n in range(20)]
+
+    cache.lookup_many(
+        calls, lambda misses: {call: {"call_sign": call} for call in misses}
+    )
+
+    assert cache._db.commits == 1
+    assert all(cache.get(call) is not None for call in calls)
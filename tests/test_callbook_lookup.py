@@ -0,0 +1,124 @@
+import pytest
+
+from hamqth_api import (
+    HamQTHError,
+    _extract_error_message,
+    _extract_search_fields,
+    _extract_session_id,
+    _is_not_found_error,
+    _is_session_error,
+    _parse_xml,
+    _scan_response,
+    callbook_lookup,
+    format_callbook_result,
+)
+
+
+def test_extract_session_id_with_namespace():
+    root = _parse_xml(
+        '<HamQTH xmlns="https://www.hamqth.com"><session>'
+        "<session_id> abc123 </session_id></session></HamQTH>"
+    )
+    assert _extract_session_id(root) == "abc123"
+    assert _extract_session_id(_parse_xml("<HamQTH><session/></HamQTH>")) is None
+
+
+def test_extract_search_fields_skips_empty_tags():
+    root = _parse_xml(
+        "<HamQTH><search><callsign>ok7an</callsign><nick>Petr</nick>"
+        "<qth> </qth></search></HamQTH>"
+    )
+    assert _extract_search_fields(root) == {"callsign": "ok7an", "nick": "Petr"}
+    assert _extract_search_fields(_parse_xml("<HamQTH/>")) == {}
+
+
+SAMPLE_RESPONSES = [
+    '<HamQTH xmlns="https://www.hamqth.com"><session>'
+    "<session_id>abc123</session_id></session></HamQTH>",
+    "<HamQTH><session><error>Session does not exist or expired</error>"
+    "</session></HamQTH>",
+    "<HamQTH><session><error/></session><search>"
+    "<callsign>w1aw</callsign><nick>ARRL</nick><qth/></search></HamQTH>",
+    "<HamQTH><search><callsign>ok7an</callsign><extra><cq>1</cq></extra>"
+    "</search></HamQTH>",
+    "<HamQTH><session><error> </error></session></HamQTH>",
+    "<HamQTH/>",
+]
+
+
+@pytest.mark.parametrize("xml_text", SAMPLE_RESPONSES)
+def test_scan_response_matches_tree_helpers(xml_text):
+    root = _parse_xml(xml_text)
+    scanned = _scan_response(xml_text)
+
+    # An error ends the scan early; callers ignore everything else then.
+
+    assert scanned["error"] == _extract_error_message(root)
+    if scanned["error"] is None:
+        assert scanned["session_id"] == _extract_session_id(root)
+        assert scanned["search"] == _extract_search_fields(root)
+
+
+def test_scan_response_invalid_xml_raises():
+    with pytest.raises(HamQTHError) as exc:
+        _scan_response("<HamQTH><search></HamQTH>")
+    assert "XML" in str(exc.value)
+    with pytest.raises(HamQTHError):
+        _scan_response("")
+
+
+def test_error_classifiers():
+    assert _is_session_error("Session does not exist or expired")
+    assert not _is_session_error("Callsign not found")
+    assert _is_not_found_error("Callsign not found")
+    assert not _is_not_found_error("Wrong user name or password")
+
+
+def test_lookups_share_one_login_and_one_connection(fake_server):
+    first = callbook_lookup(" w1aw ")
+    second = callbook_lookup("ok7an")
+
+    assert first == {
+        "call_sign": "W1AW",
+        "name": "ARRL Headquarters",
+        "city": "Newington",
+        "state": "CT",
+        "country": "United States",
+        "cq_zone": "5",
+        "itu_zone": "8",
+    }
+    assert second["name"] == "Petr"
+    assert second["city"] == "Neratovice"
+    assert fake_server.logins == 1
+    assert fake_server.connections == 1
+
+
+def test_expired_session_logs_in_again_and_retries_once(fake_server):
+    callbook_lookup("W1AW")
+    fake_server.expire_sessions()
+
+    result = callbook_lookup("W1AW")
+
+    assert result["call_sign"] == "W1AW"
+    assert fake_server.logins == 2
+
+
+def test_not_found_raises(fake_server):
+    with pytest.raises(HamQTHError) as exc:
+        callbook_lookup("N0CALL")
+    assert "not found" in str(exc.value).lower()
+
+
+def test_bad_credentials_raise(fake_server, monkeypatch):
+    monkeypatch.setenv("HAMQTH_PASS", "wrong")
+
+    with pytest.raises(HamQTHError) as exc:
+        callbook_lookup("W1AW")
+    assert "login failed" in str(exc.value).lower()
+
+
+def test_format_callbook_result_omits_missing_fields():
+    text = format_callbook_result(
+        {"call_sign": "OK7AN", "name": "Petr", "city": "Neratovice"}
+    )
+    assert text == "Callsign: OK7AN\nName: Petr\nQTH: Neratovice"
@@ -0,0 +1,50 @@
+import time
+
+from hamqth_api import HamQTHError, _TokenBucket, callbook_lookup_many
+
+
+def test_duplicates_are_looked_up_once(fake_server):
+    results = callbook_lookup_many(["w1aw", "W1AW ", "ok7an", "W1AW"])
+
+    assert list(results) == ["W1AW", "OK7AN"]
+    assert results["W1AW"]["name"] == "ARRL Headquarters"
+    assert fake_server.lookups == 2
+    assert fake_server.logins == 1
+
+
+def test_errors_are_returned_per_call(fake_server):
+    results = callbook_lookup_many(["N0CALL", "OK7AN", ""], rate_per_second=None)
+
+    assert isinstance(results["N0CALL"], HamQTHError)
+    assert isinstance(results[""], HamQTHError)
+    assert results["OK7AN"]["call_sign"] == "OK7AN"
+
+
+def test_login_failure_is_reported_for_every_call(fake_server, monkeypatch):
+    monkeypatch.setenv("HAMQTH_PASS", "wrong")
+
+    results = callbook_lookup_many(["W1AW", "OK7AN"])
+
+    assert all(isinstance(r, HamQTHError) for r in results.values())
+    assert fake_server.lookups == 0
+
+
+def test_lookups_run_concurrently(fake_server):
+    fake_server.latency = 0.05
+    calls = ["W1AW", "OK7AN"] + ["N0CALL" + str(n) for n in range(6)]
+
+    callbook_lookup_many(calls, max_workers=4, rate_per_second=None)
+
+    assert fake_server.lookups == 8
+    assert 1 < fake_server.max_in_flight <= 4
+
+
+def test_token_bucket_limits_rate():
+    bucket = _TokenBucket(rate=50, burst=1)
+
+    start = time.perf_counter()
+    for _ in range(6):
+        bucket.acquire()
+    elapsed = time.perf_counter() - start
+
+    assert elapsed >= 0.09
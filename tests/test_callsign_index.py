@@ -0,0 +1,75 @@
+from callsign_index import CallSignIndex, for_index
+
+POSTINGS = {
+    "W1AW": [0, 4],
+    "5X1XA": [1],
+    "ve3at": [2],
+    "KW1XYZ": [3, 5, 6],
+    "5X4B": [7],
+}
+
+
+def test_substring_search_matches_plain_scan():
+    calls = CallSignIndex(POSTINGS)
+
+    for text in ["W1", "5X", "X", "AT", "1X", "ZZ", "W1AW", "KW1XYZQ"]:
+        expected = [c for c in POSTINGS if text.upper() in c.upper()]
+        assert sorted(calls.matching_calls(text)) == sorted(expected)
+
+
+def test_find_returns_record_numbers_in_log_order():
+    calls = CallSignIndex(POSTINGS)
+
+    assert calls.find("w1") == [0, 3, 4, 5, 6]
+    assert calls.find("nothing") == []
+
+
+def test_prefix_search():
+    calls = CallSignIndex(POSTINGS)
+
+    assert sorted(calls.matching_calls("5X", prefix=True)) == ["5X1XA", "5X4B"]
+    assert calls.matching_calls("VE", prefix=True) == ["ve3at"]
+    assert calls.find("W1", prefix=True) == [0, 4]
+
+
+def test_count_needs_no_records():
+    calls = CallSignIndex(POSTINGS)
+
+    assert calls.count("W1") == 5
+    assert calls.count("5X", prefix=True) == 2
+
+
+def test_for_index_scans_first_then_keeps_index_current():
+    postings = dict(POSTINGS)
+    index = {
+        "log_size": 10,
+        "log_mtime_ns": 1,
+        "tail_check": "x",
+        "postings": {"call_sign": postings},
+    }
+
+    # First search of a log: not worth building, the caller scans.
+    assert for_index(index, "a.jsonl") is None
+
+    first = for_index(index, "a.jsonl")
+    assert first is not None
+    assert for_index(dict(index), "a.jsonl") is first
+
+    # Another log with the same size, mtime and tail gets its own index.
+    assert for_index(index, "b.jsonl") is None
+
+    # Appended QSOs update the same index in place.
+    grown = dict(postings, W1XYZ=[8])
+    changed = dict(index, log_size=20, postings={"call_sign": grown})
+    assert for_index(changed, "a.jsonl") is first
+    assert sorted(first.matching_calls("W1")) == ["KW1XYZ", "W1AW", "W1XYZ"]
+    assert first.find("W1XYZ", prefix=True) == [8]
+
+
+def test_update_skips_calls_that_are_gone():
+    calls = CallSignIndex(POSTINGS)
+    calls.update({"W1AW": [0], "K1ABC": [1]})
+
+    assert calls.matching_calls("5X") == []
+    assert calls.matching_calls("5X", prefix=True) == []
+    assert calls.find("1") == [0, 1]
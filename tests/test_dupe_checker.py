@@ -0,0 +1,80 @@
+import os
+import shutil
+
+import dupe_checker
+import qso_normalize
+from conftest import write_log
+
+QSOS = [
+    {"call_sign": "W1AW", "band": "20M", "mode": "SSB"},
+    {"call_sign": "VE3AT", "band": "40M", "mode": "CW"},
+    {"call_sign": "", "band": "40M", "mode": "CW"},
+]
+
+
+def test_dupe_and_worked_before(tmp_path):
+    log = str(tmp_path / "log.jsonl")
+    write_log(log, QSOS)
+
+    checker = dupe_checker.load_dupe_checker(log)
+
+    assert checker.is_dupe("w1aw ", "20 m", "ssb")
+    assert not checker.is_dupe("W1AW", "40M", "SSB")
+    assert checker.worked_before("W1AW")
+    assert not checker.worked_before("K1ABC")
+
+    checker.add({"call_sign": "K1ABC", "band": "10M", "mode": "FT8"})
+    assert checker.is_dupe("K1ABC", "10M", "FT8")
+
+
+def test_saved_set_is_reused_and_caught_up(tmp_path):
+    log = str(tmp_path / "log.jsonl")
+    write_log(log, QSOS[:1])
+    dupe_checker.load_dupe_checker(log)
+    assert os.path.exists(dupe_checker.dupes_filename(log))
+
+    write_log(log, QSOS[1:], mode="a")
+    checker = dupe_checker.load_dupe_checker(log)
+    assert checker.is_dupe("W1AW", "20M", "SSB")
+    assert checker.is_dupe("VE3AT", "40M", "CW")
+
+    # A rewritten log starts over.
+    write_log(log, [{"call_sign": "N0CALL", "band": "2M", "mode": "FM"}] * 3)
+    checker = dupe_checker.load_dupe_checker(log)
+    assert checker.calls == {"N0CALL"}
+
+
+def test_sqlite_log(tmp_path):
+    import qso_repository
+
+    log = str(tmp_path / "log.sqlite3")
+    with qso_repository.open_repository(log) as repo:
+        repo.append_many(QSOS)
+
+    assert dupe_checker.load_dupe_checker(log).is_dupe("VE3AT", "40M", "CW")
+
+
+def test_mode_in_old_band_field_counts(tmp_path):
+    log = str(tmp_path / "log.jsonl")
+    write_log(log, [{"call_sign": "W1AW", "band": "20M SSB"}])
+
+    checker = dupe_checker.load_dupe_checker(log)
+    assert checker.is_dupe("W1AW", "20M", "SSB")
+    assert checker.is_dupe("W1AW", "20M SSB", "")
+    assert not checker.is_dupe("W1AW", "20M", "CW")
+
+
+def test_shipped_log_w1aw_20m_ssb_is_a_dupe(tmp_path):
+    log = str(tmp_path / "qsolog.jsonl")
+    shutil.copy(os.path.join(os.path.dirname(__file__), "..", "qsolog.jsonl"), log)
+
+    assert dupe_checker.load_dupe_checker(log).is_dupe("W1AW", "20M", "SSB")
+
+
+def test_normalize_log_drops_saved_set(tmp_path):
+    log = str(tmp_path / "log.jsonl")
+    write_log(log, [{"call_sign": "W1AW", "band": "20M SSB"}])
+    dupe_checker.load_dupe_checker(log)
+
+    qso_normalize.normalize_log(log)
+    assert not os.path.exists(dupe_checker.dupes_filename(log))
@@ -0,0 +1,108 @@
+import json
+
+import enrichment
+import qso_repository
+from hamqth_api import HamQTHError
+
+W1AW = {"call_sign": "W1AW", "name": "ARRL Headquarters", "country": "United States"}
+
+
+class FakeLookupMany:
+    def __init__(self, results, broken=()):
+        self.results = results
+        self.broken = set(broken)
+        self.batches = []
+
+    def __call__(self, calls):
+        self.batches.append(list(calls))
+        outcomes = {}
+        for call in calls:
+            if call in self.broken:
+                outcomes[call] = HamQTHError("HamQTH request failed: timed out")
+            elif call in self.results:
+                outcomes[call] = self.results[call]
+            else:
+                outcomes[call] = HamQTHError(f"Call sign {call} not found in HamQTH.")
+        return outcomes
+
+
+def write_log(filename, calls, mode="w"):
+    with open(filename, mode, encoding="utf-8") as file:
+        for call in calls:
+            file.write(json.dumps({"call_sign": call, "band": "20M"}) + "\n")
+
+
+def test_each_distinct_call_is_fetched_once(tmp_path):
+    log = str(tmp_path / "log.jsonl")
+    write_log(log, ["W1AW", "w1aw", "N0CALL", "W1AW"])
+    lookup = FakeLookupMany({"W1AW": W1AW})
+
+    summary = enrichment.enrich_log(log, lookup)
+
+    assert lookup.batches == [["W1AW", "N0CALL"]]
+    assert summary == {"fetched": 1, "not_found": 1, "failed": 0, "remaining": 0}
+
+    # Nothing new in the log, so nothing to fetch.
+    assert enrichment.enrich_log(log, lookup)["fetched"] == 0
+    assert len(lookup.batches) == 1
+
+
+def test_only_appended_calls_are_fetched(tmp_path):
+    log = str(tmp_path / "log.jsonl")
+    write_log(log, ["W1AW"])
+    lookup = FakeLookupMany({"W1AW": W1AW})
+    enrichment.enrich_log(log, lookup)
+
+    write_log(log, ["W1AW", "OK7AN"], mode="a")
+    enrichment.enrich_log(log, lookup)
+
+    assert lookup.batches == [["W1AW"], ["OK7AN"]]
+
+
+def test_limit_and_failures_are_left_for_the_next_run(tmp_path):
+    log = str(tmp_path / "log.jsonl")
+    write_log(log, ["W1AW", "OK7AN", "G4ABC"])
+
+    first = FakeLookupMany({"W1AW": W1AW}, broken=["OK7AN"])
+    summary = enrichment.enrich_log(log, first, batch_size=1, limit=2)
+    assert first.batches == [["W1AW"], ["OK7AN"]]
+    assert summary == {"fetched": 1, "not_found": 0, "failed": 1, "remaining": 2}
+
+    second = FakeLookupMany({"W1AW": W1AW})
+    enrichment.enrich_log(log, second)
+    assert second.batches == [["OK7AN", "G4ABC"]]
+
+
+def test_enriched_qsos_keep_operator_fields(tmp_path):
+    log = str(tmp_path / "log.jsonl")
+    with open(log, "w", encoding="utf-8") as file:
+        file.write(json.dumps({"call_sign": "W1AW", "name": "Hiram"}) + "\n")
+        file.write(json.dumps({"call_sign": "N0CALL"}) + "\n")
+    enrichment.enrich_log(log, FakeLookupMany({"W1AW": W1AW}))
+
+    qsos = list(enrichment.iter_enriched_qsos(log))
+
+    assert qsos[0] == {
+        "call_sign": "W1AW",
+        "name": "Hiram",
+        "country": "United States",
+    }
+    assert qsos[1] == {"call_sign": "N0CALL"}
+
+
+def test_sqlite_log(tmp_path):
+    log = str(tmp_path / "log.sqlite3")
+    with qso_repository.open_repository(log) as repo:
+        repo.append_many({"call_sign": call} for call in ["W1AW", "N0CALL", "W1AW"])
+    lookup = FakeLookupMany({"W1AW": W1AW})
+
+    summary = enrichment.enrich_log(log, lookup)
+
+    assert [sorted(batch) for batch in lookup.batches] == [["N0CALL", "W1AW"]]
+    assert summary == {"fetched": 1, "not_found": 1, "failed": 0, "remaining": 0}
+    assert enrichment.enrich_log(log, lookup)["fetched"] == 0
+    assert [qso.get("name") for qso in enrichment.iter_enriched_qsos(log)] == [
+        "ARRL Headquarters",
+        None,
+        "ARRL Headquarters",
+    ]
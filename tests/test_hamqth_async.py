@@ -0,0 +1,166 @@
+import asyncio
+import inspect
+
+import pytest
+
+import hamqth_api
+import hamqth_async
+from fake_hamqth_server import AsyncFakeHamQTHServer
+from hamqth_api import HamQTHError
+
+
+@pytest.fixture(autouse=True)
+def credentials(monkeypatch):
+    monkeypatch.setenv("HAMQTH_USER", "bob")
+    monkeypatch.setenv("HAMQTH_PASS", "123")
+
+
+def run_with_server(test, max_concurrency=8, **server_options):
+    """Run test(server, client) on a new event loop against a fake server."""
+
+    async def main():
+        server = await AsyncFakeHamQTHServer(**server_options).start()
+        try:
+            async with hamqth_async.AsyncHamQTHClient(
+                max_concurrency=max_concurrency, url=server.url
+            ) as client:
+                return await test(server, client)
+        finally:
+            await server.stop()
+
+    return asyncio.run(main())
+
+
+def test_lookup_matches_blocking_client_result():
+    async def test(server, client):
+        return await client.lookup(" w1aw ")
+
+    assert run_with_server(test) == {
+        "call_sign": "W1AW",
+        "name": "ARRL Headquarters",
+        "city": "Newington",
+        "state": "CT",
+        "country": "United States",
+        "cq_zone": "5",
+        "itu_zone": "8",
+    }
+
+
+def test_chunked_responses_and_connection_reuse():
+    async def test(server, client):
+        for call in ["W1AW", "OK7AN", "W1AW"]:
+            await client.lookup(call)
+        return server.connections
+
+    assert run_with_server(test, chunked=True) == 1
+
+
+def test_close_delimited_responses():
+    async def test(server, client):
+        results = [await client.lookup(call) for call in ["W1AW", "OK7AN"]]
+        return server.connections, results
+
+    connections, results = run_with_server(test, close_delimited=True)
+    assert [result["call_sign"] for result in results] == ["W1AW", "OK7AN"]
+
+    # The server closes after every response, so nothing is reused.
+    assert connections == 3
+
+
+def test_close_delimited_response_too_large(monkeypatch):
+    monkeypatch.setattr(hamqth_async, "MAX_RESPONSE_BYTES", 64)
+
+    async def test(server, client):
+        with pytest.raises(HamQTHError, match="Network error") as excinfo:
+            await client.lookup("W1AW")
+        assert str(excinfo.value.__cause__) == "Response too large."
+
+    run_with_server(test, close_delimited=True)
+
+
+def test_declared_charset_is_used():
+    records = {"OK1ZZ": {"callsign": "ok1zz", "adr_name": "Jiří Novák"}}
+
+    async def test(server, client):
+        return await client.lookup("OK1ZZ")
+
+    result = run_with_server(test, records=records, charset="iso-8859-2")
+    assert result["name"] == "Jiří Novák"
+
+
+def test_lookup_many_defaults_match_blocking_client():
+    blocking = inspect.signature(hamqth_api.callbook_lookup_many).parameters
+    async_ = inspect.signature(hamqth_async.AsyncHamQTHClient.lookup_many).parameters
+    for name in ("rate_per_second", "burst"):
+        assert async_[name].default == blocking[name].default
+
+
+def test_errors_match_blocking_client():
+    async def test(server, client):
+        with pytest.raises(HamQTHError, match="Call sign N0CALL not found in HamQTH."):
+            await client.lookup("n0call")
+        with pytest.raises(HamQTHError, match="Nothing found for call sign."):
+            await client.lookup("  ")
+
+    run_with_server(test)
+
+
+def test_login_failure(monkeypatch):
+    monkeypatch.setenv("HAMQTH_PASS", "wrong")
+
+    async def test(server, client):
+        with pytest.raises(HamQTHError, match="HamQTH login failed"):
+            await client.lookup("W1AW")
+
+    run_with_server(test)
+
+
+def test_concurrent_lookups_log_in_once():
+    async def test(server, client):
+        results = await asyncio.gather(*(client.lookup("W1AW") for _ in range(20)))
+        assert len(results) == 20
+        assert server.logins == 1
+
+        # Every waiting lookup finds the session gone; still one new login.
+
+        server.expire_sessions()
+        await asyncio.gather(*(client.lookup("OK7AN") for _ in range(10)))
+        assert server.logins == 2
+
+    run_with_server(test, latency=0.01)
+
+
+def test_concurrency_is_bounded():
+    async def test(server, client):
+        calls = ["W1AW", "OK7AN"] + [f"N{n}CALL" for n in range(6)]
+        return server, await client.lookup_many(calls + ["w1aw"], rate_per_second=None)
+
+    server, results = run_with_server(test, max_concurrency=2, latency=0.05)
+
+    assert list(results)[:2] == ["W1AW", "OK7AN"]
+    assert len(results) == 8
+    assert isinstance(results["N0CALL"], HamQTHError)
+    # One login plus eight lookups, never more than two at a time.
+    assert server.max_in_flight == 2
+    assert server.logins == 1
+    assert server.lookups == 8
+    assert server.connections <= 2
+
+
+def test_stale_keep_alive_connection_is_replaced():
+    async def test(server, client):
+        await client.lookup("W1AW")
+        server.drop_idle_connections()
+        await asyncio.sleep(0.01)
+        return await client.lookup("OK7AN")
+
+    assert run_with_server(test)["call_sign"] == "OK7AN"
+
+
+def test_network_error():
+    async def test():
+        client = hamqth_async.AsyncHamQTHClient(url="http://127.0.0.1:9/xml.php")
+        with pytest.raises(HamQTHError, match="Network error contacting HamQTH."):
+            await client.lookup("W1AW")
+
+    asyncio.run(test())
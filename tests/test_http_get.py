@@ -1,6 +1,7 @@
 import pytest
 import requests
 
+import hamqth_api
 from hamqth_api import _http_get, HamQTHError
 
 
@@ -14,7 +15,7 @@ def test_http_get_success(monkeypatch):
     def fake_get(url, params=None, timeout=None):
         return DummyResponse(status_code=200, text="<xml>success</xml>")
 
-    monkeypatch.setattr(requests, "get", fake_get)
+    monkeypatch.setattr(hamqth_api._HTTP_SESSION, "get", fake_get)
 
     result = _http_get("http://example.com", {"a": "b"})
 
@@ -25,7 +26,7 @@ def test_http_get_non_200_raises(monkeypatch):
     def fake_get(url, params=None, timeout=None):
         return DummyResponse(status_code=500, text="Server error")
 
-    monkeypatch.setattr(requests, "get", fake_get)
+    monkeypatch.setattr(hamqth_api._HTTP_SESSION, "get", fake_get)
 
     with pytest.raises(HamQTHError) as exc:
         _http_get("http://example.com", {})
@@ -37,7 +38,7 @@ def test_http_get_network_error(monkeypatch):
     def fake_get(url, params=None, timeout=None):
         raise requests.exceptions.Timeout("Timed out")
 
-    monkeypatch.setattr(requests, "get", fake_get)
+    monkeypatch.setattr(hamqth_api._HTTP_SESSION, "get", fake_get)
 
     with pytest.raises(HamQTHError) as exc:
         _http_get("http://example.com", {})
@@ -52,7 +53,7 @@ def test_http_get_uses_timeout(monkeypatch):
         captured["timeout"] = timeout
         return DummyResponse()
 
-    monkeypatch.setattr(requests, "get", fake_get)
+    monkeypatch.setattr(hamqth_api._HTTP_SESSION, "get", fake_get)
 
     _http_get("http://example.com", {})
 
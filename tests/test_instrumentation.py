@@ -0,0 +1,111 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+import instrumentation
+import qso_log
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def enabled(monkeypatch):
+    monkeypatch.setattr(instrumentation, "ENABLED", True)
+    instrumentation.reset()
+    yield
+    instrumentation.reset()
+
+
+def test_off_by_default_leaves_functions_alone(monkeypatch):
+    monkeypatch.setattr(instrumentation, "ENABLED", False)
+
+    def step():
+        return 1
+
+    assert instrumentation.timed("step")(step) is step
+
+
+def test_timed_records_calls_and_latency(enabled):
+    @instrumentation.timed("step")
+    def step(fail=False):
+        if fail:
+            raise ValueError
+        return 42
+
+    @instrumentation.timed()
+    async def async_step():
+        await asyncio.sleep(0.01)
+
+    assert step() == 42
+    with pytest.raises(ValueError):
+        step(fail=True)
+    asyncio.run(async_step())
+
+    report = instrumentation.report()
+    assert report["step"]["calls"] == 2
+    assert report["step"]["max_seconds"] >= report["step"]["mean_seconds"] > 0
+    name = (
+        "test_instrumentation.test_timed_records_calls_and_latency.<locals>.async_step"
+    )
+    assert report[name]["total_seconds"] >= 0.01
+
+
+def test_log_reads_count_records_and_bytes(enabled, tmp_path):
+    log = tmp_path / "log.jsonl"
+    lines = [json.dumps({"call_sign": call}) + "\n" for call in ["W1AW", "K1ABC"]]
+    log.write_text("".join(lines), encoding="utf-8")
+
+    assert len(list(qso_log.iter_qsos(str(log)))) == 2
+    qso_log.read_last_qsos(str(log), 1)
+
+    report = instrumentation.report()
+    assert report["qso_log.records"]["records"] == 2
+    assert report["qso_log.records"]["bytes_read"] == os.path.getsize(log)
+    assert report["qso_log.read_last_qsos"]["records"] == 1
+
+
+def test_summary_and_json_export(enabled, tmp_path):
+    instrumentation.add("fast", seconds=0.001, records=3)
+    instrumentation.add("slow", seconds=0.5, bytes_read=100)
+
+    summary = instrumentation.format_summary().splitlines()
+    assert summary[1].startswith("slow")
+    assert summary[2].startswith("fast")
+
+    instrumentation.export_json(str(tmp_path / "timings.json"))
+    data = json.loads((tmp_path / "timings.json").read_text(encoding="utf-8"))
+    assert data["steps"]["fast"]["records"] == 3
+    assert data["steps"]["slow"]["bytes_read"] == 100
+
+
+def test_env_var_instruments_menu_actions(tmp_path):
+    log = tmp_path / "qsolog.jsonl"
+    qso = {"call_sign": "W1AW", "band": "20M", "mode": "SSB", "comments": ""}
+    log.write_text(json.dumps(qso) + "\n", encoding="utf-8")
+    timings = tmp_path / "timings.json"
+
+    result = subprocess.run(
+        [sys.executable, os.path.join(REPO_ROOT, "ham-radio-logger.py")],
+        input="4\n3\n2\n20m\n6\n",
+        cwd=str(tmp_path),
+        env=dict(
+            os.environ,
+            PYTHONPATH=REPO_ROOT,
+            HAMLOG_INSTRUMENT="1",
+            HAMLOG_INSTRUMENT_JSON=str(timings),
+        ),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    assert "Instrumentation summary" in result.stderr
+    steps = json.loads(timings.read_text(encoding="utf-8"))["steps"]
+    assert steps["handle_show_stats"]["calls"] == 1
+    assert steps["handle_search_qsos"]["calls"] == 1
+    assert steps["qso_index.read_qsos_at"]["records"] == 1
+    assert steps["qso_log.records"]["records"] >= 1
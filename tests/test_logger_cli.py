@@ -0,0 +1,184 @@
+import io
+import json
+import os
+import subprocess
+import sys
+
+import logger_cli
+
+
+def run(log, *argv, stdin=""):
+    """Run one CLI command against log; return (status, stdout, stderr)."""
+    out, err = io.StringIO(), io.StringIO()
+    status = logger_cli.main(
+        ["--log", str(log), *argv],
+        stdin=io.StringIO(stdin),
+        stdout=out,
+        stderr=err,
+    )
+    return status, out.getvalue(), err.getvalue()
+
+
+def json_lines(text):
+    return [json.loads(line) for line in text.splitlines()]
+
+
+def test_log_from_stdin_normalizes_and_counts_dupes(tmp_path):
+    log = tmp_path / "qsolog.jsonl"
+    stdin = "\n".join(
+        [
+            json.dumps({"call_sign": "w1aw", "band": "20 m ssb"}),
+            "not json",
+            json.dumps({"call_sign": "W1AW", "band": "14.2", "mode": "usb"}),
+            json.dumps(
+                {
+                    "call_sign": "VE3AT",
+                    "band": "40M",
+                    "mode": "CW",
+                    "timestamp": "2024-06-22T18:05:00Z",
+                    "grid": "FN03",
+                }
+            ),
+        ]
+    )
+
+    status, out, err = run(log, "log", "--json", stdin=stdin)
+
+    assert status == 1
+    assert json.loads(out) == {"logged": 3, "dupes": 1, "skipped": [2]}
+    assert "Line 2" in err
+
+    status, out, _err = run(log, "recent", "-n", "3", "--json")
+    qsos = json_lines(out)
+    assert [q["band"] for q in qsos] == ["20M", "20M", "40M"]
+    assert [q["mode"] for q in qsos] == ["SSB", "SSB", "CW"]
+    assert list(qsos[0]) == [
+        "call_sign",
+        "their_signal_report",
+        "my_signal_report",
+        "band",
+        "mode",
+        "comments",
+        "timestamp",
+    ]
+    assert qsos[2]["timestamp"] == "2024-06-22T18:05:00Z"
+    assert qsos[2]["grid"] == "FN03"
+
+
+def test_log_one_qso_from_options(tmp_path):
+    log = tmp_path / "qsolog.sqlite3"
+    status, out, _err = run(
+        log,
+        "log",
+        "--call",
+        "k1abc",
+        "--band",
+        "7.03",
+        "--mode",
+        "cw",
+        "--time",
+        "2024-06-22 18:30",
+    )
+    assert status == 0
+    assert out == "Logged 1 QSOs (0 dupes).\n"
+
+    _status, out, _err = run(log, "search", "--call", "K1", "--json")
+    assert json_lines(out) == [
+        {
+            "call_sign": "K1ABC",
+            "their_signal_report": "",
+            "my_signal_report": "",
+            "band": "40M",
+            "mode": "CW",
+            "comments": "",
+            "timestamp": "2024-06-22T18:30:00Z",
+        }
+    ]
+
+
+def test_search_and_stats(tmp_path):
+    log = tmp_path / "qsolog.jsonl"
+    qsos = [
+        {
+            "call_sign": "W1AW",
+            "band": "20M",
+            "mode": "SSB",
+            "timestamp": "2024-06-22T18:05:00Z",
+        },
+        {
+            "call_sign": "KB5ELV",
+            "band": "40M",
+            "mode": "FT8",
+            "timestamp": "2024-06-23T01:00:00Z",
+        },
+        {
+            "call_sign": "W1AW",
+            "band": "40M",
+            "mode": "FT-8",
+            "timestamp": "2024-06-24T01:00:00Z",
+        },
+    ]
+    run(log, "log", stdin="\n".join(json.dumps(q) for q in qsos))
+
+    _status, out, _err = run(log, "search", "--band", "40 m")
+    assert out.count("Call Sign:") == 2
+    assert out.endswith("Found 2 QSOs.\n")
+
+    _status, out, _err = run(log, "search", "--mode", "ft8", "--json")
+    assert [q["call_sign"] for q in json_lines(out)] == ["KB5ELV", "W1AW"]
+
+    _status, out, _err = run(log, "search", "--from", "2024-06-23", "--json")
+    assert len(json_lines(out)) == 2
+
+    status, _out, err = run(log, "search", "--band", "20M", "--mode", "SSB")
+    assert status == 1 and "one of" in err
+
+    _status, out, _err = run(log, "stats", "--json", "--top", "1")
+    summary = json.loads(out)
+    assert summary["total"] == 3
+    assert summary["calls"] == [["W1AW", 2]]
+    assert summary["band_modes"] == [["40M", "FT8", 2]]
+
+    _status, out, _err = run(log, "stats")
+    assert out.startswith("Total QSOs: 3\n")
+    assert "40M FT8 : 2" in out
+
+
+def test_lookup_uses_cache(tmp_path):
+    import callbook_cache
+
+    cache_file = str(tmp_path / "cache.sqlite3")
+    cache = callbook_cache.get_cache(cache_file)
+    cache.put("W1AW", {"call_sign": "W1AW", "name": "ARRL"})
+    cache.put_not_found("N0CALL", "Callsign not found")
+
+    status, out, _err = run(
+        tmp_path / "log.jsonl",
+        "lookup",
+        "w1aw",
+        "N0CALL",
+        "--cache",
+        cache_file,
+        "--json",
+    )
+
+    assert status == 1
+    assert json_lines(out) == [
+        {"call_sign": "W1AW", "name": "ARRL"},
+        {"call_sign": "N0CALL", "error": "Callsign not found"},
+    ]
+
+
+def test_stats_does_not_import_requests(tmp_path):
+    code = (
+        "import sys, logger_cli; logger_cli.main(['--log', sys.argv[1], 'stats']);"
+        " print('requests' in sys.modules)"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code, str(tmp_path / "log.jsonl")],
+        cwd=os.path.dirname(os.path.abspath(logger_cli.__file__)),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert result.stdout.splitlines()[-1] == "False"
@@ -0,0 +1,47 @@
+import json
+
+import parallel_scan
+import qso_stats
+
+
+def write_log(path, count):
+    bands = ["20M", "40M", "6M"]
+    modes = ["SSB", "CW", "FT8", "AM"]
+    with open(path, "w", encoding="utf-8") as file:
+        for n in range(count):
+            qso = {
+                "call_sign": "W" + str(n % 7) + "AW",
+                "band": bands[n % 3],
+                "comments": "",
+            }
+            if n % 5:
+                qso["mode"] = modes[n % 4]
+            file.write(json.dumps(qso) + "\n")
+            if n % 11 == 0:
+                file.write("\n")
+
+
+def test_split_ranges_cover_file_on_line_boundaries(tmp_path):
+    log = tmp_path / "log.jsonl"
+    write_log(log, 200)
+    data = log.read_bytes()
+
+    ranges = parallel_scan.split_ranges(str(log), 4)
+
+    assert ranges[0][0] == 0
+    assert ranges[-1][1] == len(data)
+    for (_, end), (start, _) in zip(ranges, ranges[1:]):
+        assert end == start
+        assert data[start - 1 : start] == b"\n"
+
+
+def test_parallel_stats_match_single_pass(tmp_path):
+    log = tmp_path / "log.jsonl"
+    write_log(log, 500)
+
+    parallel = parallel_scan.scan_stats(str(log), processes=4, threshold=0)
+    serial = qso_stats.compute_stats(str(log))
+
+    assert parallel.total == serial.total == 500
+    assert parallel.top("calls", 10) == serial.top("calls", 10)
+    assert parallel.top("band_modes", 20) == serial.top("band_modes", 20)
@@ -0,0 +1,158 @@
+import pytest
+
+import qso_columns
+import qso_stats
+from conftest import write_log
+
+SAMPLE_QSOS = [
+    {
+        "call_sign": "W1AW",
+        "their_signal_report": "5-9",
+        "my_signal_report": "5-7",
+        "band": "20M",
+        "mode": "SSB",
+        "comments": "Field Day, très bien",
+        "timestamp": "2024-06-22T18:05:00Z",
+    },
+    {"call_sign": "KB5ELV", "band": "40 m", "mode": "CW", "comments": ""},
+    {"call_sign": "w1aw", "band": "20M", "timestamp": "2024-06-23T01:00:00Z"},
+    {"call_sign": "VE3AT", "mode": "FT8", "band": 40},
+]
+
+
+def test_columns_round_trip_stored_fields(tmp_path):
+    log = str(tmp_path / "log.jsonl")
+    write_log(log, SAMPLE_QSOS)
+
+    assert qso_columns.sync_columns(log) == 4
+    with qso_columns.ColumnStore(qso_columns.columns_dirname(log)) as store:
+        assert store.count == 4
+        assert list(store.read(range(3))) == SAMPLE_QSOS[:3]
+
+        # A band that isn't a string is stored as missing.
+        assert store.get(3) == {"call_sign": "VE3AT", "mode": "FT8"}
+
+
+def test_stats_and_counts_match_json_scan(tmp_path):
+    log = str(tmp_path / "log.jsonl")
+    write_log(log, SAMPLE_QSOS * 3)
+
+    with qso_columns.open_columns(log) as store:
+        stats = store.stats()
+        assert store.count_field("call_sign") == {"W1AW": 6, "KB5ELV": 3, "VE3AT": 3}
+
+    expected = qso_stats.compute_stats(log)
+    assert stats.to_dict() == expected.to_dict()
+    assert stats.top("band_modes", 5) == expected.top("band_modes", 5)
+
+
+def test_find_scans_codes_in_log_order(tmp_path):
+    log = str(tmp_path / "log.jsonl")
+    write_log(log, SAMPLE_QSOS * 2)
+
+    with qso_columns.open_columns(log) as store:
+        assert store.lookup("band", "20M") == [0, 2, 4, 6]
+        assert store.find("call_sign", lambda call: call.upper() == "W1AW") == [
+            0,
+            2,
+            4,
+            6,
+        ]
+        assert store.lookup("mode", "RTTY") == []
+
+
+def test_sync_adds_appends_and_rebuilds_after_rewrite(tmp_path):
+    log = str(tmp_path / "log.jsonl")
+    write_log(log, SAMPLE_QSOS[:2])
+    qso_columns.sync_columns(log)
+
+    write_log(log, SAMPLE_QSOS[2:], mode="a")
+    assert qso_columns.sync_columns(log) == 2
+    assert qso_columns.sync_columns(log) == 0
+    with qso_columns.ColumnStore(qso_columns.columns_dirname(log)) as store:
+        assert store.count == 4
+        assert store.get(2) == SAMPLE_QSOS[2]
+
+    write_log(log, [{"call_sign": "K1ABC", "band": "10M"}])
+    assert qso_columns.sync_columns(log) == 1
+    with qso_columns.ColumnStore(qso_columns.columns_dirname(log)) as store:
+        assert store.count == 1
+        assert store.count_field("band") == {"10M": 1}
+
+
+def test_update_columns_only_syncs_an_existing_store(tmp_path):
+    log = str(tmp_path / "log.jsonl")
+    write_log(log, SAMPLE_QSOS)
+
+    qso_columns.update_columns(log)
+    assert not (tmp_path / "log.jsonl.cols").exists()
+
+    qso_columns.sync_columns(log)
+    write_log(log, SAMPLE_QSOS[:1], mode="a")
+    qso_columns.update_columns(log)
+    with qso_columns.ColumnStore(qso_columns.columns_dirname(log)) as store:
+        assert store.count == 5
+
+
+def test_values_are_kept_in_memory_between_appends(tmp_path):
+    log = str(tmp_path / "log.jsonl")
+    dirname = qso_columns.columns_dirname(log)
+    write_log(log, SAMPLE_QSOS)
+    qso_columns.sync_columns(log)
+    codes = qso_columns._values_cache[(dirname, "call_sign")][1]
+
+    write_log(log, [{"call_sign": "K1ABC", "band": "20M"}], mode="a")
+    qso_columns.update_columns(log)
+
+    # The same map was added to instead of decoding the values file again.
+    assert qso_columns._values_cache[(dirname, "call_sign")][1] is codes
+    assert codes["K1ABC"] == 5
+    with qso_columns.ColumnStore(dirname) as store:
+        assert store.get(4) == {"call_sign": "K1ABC", "band": "20M"}
+
+
+def test_values_are_read_again_after_another_process_rebuilds(tmp_path):
+    log = str(tmp_path / "log.jsonl")
+    dirname = qso_columns.columns_dirname(log)
+    write_log(log, SAMPLE_QSOS)
+    qso_columns.sync_columns(log)
+    cached = dict(qso_columns._values_cache)
+
+    # Another process rewrites the log and rebuilds the store.
+    write_log(log, [{"call_sign": "K1ABC", "band": "10M"}])
+    qso_columns.sync_columns(log)
+    qso_columns._values_cache.update(cached)
+
+    write_log(log, [{"call_sign": "W1AW", "band": "10M"}], mode="a")
+    qso_columns.update_columns(log)
+    with qso_columns.ColumnStore(dirname) as store:
+        assert list(store.read(range(2))) == [
+            {"call_sign": "K1ABC", "band": "10M"},
+            {"call_sign": "W1AW", "band": "10M"},
+        ]
+
+
+def test_failed_sync_leaves_no_unwritten_values(tmp_path, monkeypatch):
+    log = str(tmp_path / "log.jsonl")
+    write_log(log, SAMPLE_QSOS)
+    qso_columns.sync_columns(log)
+    write_log(log, [{"call_sign": "K1ABC"}, {"call_sign": "N0CALL"}], mode="a")
+
+    def fold_then_fail(filename, start, size, add):
+        add(start, {"call_sign": "K1ABC"})
+        raise OSError("disk gone")
+
+    with monkeypatch.context() as patched:
+        patched.setattr(qso_columns.qso_log, "fold_records", fold_then_fail)
+        with pytest.raises(OSError):
+            qso_columns.sync_columns(log)
+
+    assert qso_columns.sync_columns(log) == 2
+    with qso_columns.ColumnStore(qso_columns.columns_dirname(log)) as store:
+        assert store.count_field("call_sign") == {
+            "W1AW": 2,
+            "KB5ELV": 1,
+            "VE3AT": 1,
+            "K1ABC": 1,
+            "N0CALL": 1,
+        }
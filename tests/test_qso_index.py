@@ -0,0 +1,181 @@
+import os
+
+import pytest
+
+import qso_index
+from conftest import write_log
+
+SAMPLE_QSOS = [
+    {"call_sign": "W1AW", "band": "20M SSB", "comments": ""},
+    {"call_sign": "KB5ELV", "band": "40 M", "mode": "SSB", "comments": ""},
+    {"call_sign": "w1aw", "band": "40 M", "mode": "CW", "comments": ""},
+    {"call_sign": "VE3AT", "band": "30 M", "mode": "AM", "comments": ""},
+]
+
+
+def test_load_index_builds_offsets_and_sidecar(tmp_path):
+    log = str(tmp_path / "log.jsonl")
+    write_log(log, SAMPLE_QSOS)
+
+    index = qso_index.load_index(log)
+
+    assert qso_index.qso_count(index) == 4
+    assert os.path.exists(qso_index.index_filename(log))
+    qsos = list(qso_index.read_qsos_at(log, index, [3, 0]))
+    assert qsos == [SAMPLE_QSOS[3], SAMPLE_QSOS[0]]
+
+
+def test_lookup_and_find_records(tmp_path):
+    log = str(tmp_path / "log.jsonl")
+    write_log(log, SAMPLE_QSOS)
+    index = qso_index.load_index(log)
+
+    assert qso_index.lookup(index, "band", "40 M") == [1, 2]
+    assert qso_index.lookup(index, "mode", "FT8") == []
+    matches = qso_index.find_records(index, "call_sign", lambda c: "W1" in c.upper())
+    assert matches == [0, 2]
+
+
+def test_count_field_matches_strip_upper_counting(tmp_path):
+    log = str(tmp_path / "log.jsonl")
+    write_log(log, SAMPLE_QSOS)
+    index = qso_index.load_index(log)
+
+    calls = qso_index.count_field(index, "call_sign")
+    modes = qso_index.count_field(index, "mode")
+
+    assert calls.most_common() == [("W1AW", 2), ("KB5ELV", 1), ("VE3AT", 1)]
+    assert sum(modes.values()) == 3
+
+
+def test_appended_qsos_are_indexed_incrementally(tmp_path):
+    log = str(tmp_path / "log.jsonl")
+    write_log(log, SAMPLE_QSOS[:2])
+    qso_index.load_index(log)
+
+    write_log(log, SAMPLE_QSOS[2:], mode="a")
+    index = qso_index.update_index(log)
+
+    assert qso_index.qso_count(index) == 4
+    assert qso_index.lookup(index, "call_sign", "VE3AT") == [3]
+
+
+def test_rewritten_log_is_reindexed(tmp_path):
+    log = str(tmp_path / "log.jsonl")
+    write_log(log, SAMPLE_QSOS)
+    qso_index.load_index(log)
+
+    write_log(log, [{"call_sign": "N5PPC", "band": "40 M"}])
+    index = qso_index.load_index(log)
+
+    assert qso_index.qso_count(index) == 1
+    assert qso_index.lookup(index, "call_sign", "W1AW") == []
+
+
+def test_blank_lines_and_partial_last_line_are_skipped(tmp_path):
+    log = tmp_path / "log.jsonl"
+    log.write_text('{"call_sign": "W1AW"}\n\n   \n{"call_sign": "N8', encoding="utf-8")
+
+    index = qso_index.load_index(str(log))
+
+    assert qso_index.qso_count(index) == 1
+
+
+def appended_one_at_a_time(log, qsos):
+    for qso in qsos:
+        write_log(log, [qso], mode="a")
+        qso_index.update_index(log)
+
+
+def reload_from_disk(log):
+    qso_index._cache.clear()
+    return qso_index.load_index(log)
+
+
+def test_appends_add_segments_and_reload_the_same(tmp_path):
+    log = str(tmp_path / "log.jsonl")
+    write_log(log, SAMPLE_QSOS[:1])
+    qso_index.load_index(log)
+    base_size = os.path.getsize(qso_index.index_filename(log))
+
+    appended_one_at_a_time(log, SAMPLE_QSOS[1:])
+    index = qso_index.load_index(log)
+    assert index["segments"] == 3
+    with open(qso_index.index_filename(log), "rb") as file:
+        assert len(file.read().splitlines()) == 4
+    assert os.path.getsize(qso_index.offsets_filename(log)) == 4 * 8
+
+    # The base is untouched; each append only added a line after it.
+
+    with open(qso_index.index_filename(log), "rb") as file:
+        assert len(file.readline()) == base_size
+
+    reloaded = reload_from_disk(log)
+    assert reloaded["postings"] == index["postings"]
+    assert list(reloaded["offsets"]) == list(index["offsets"])
+    assert qso_index.lookup(reloaded, "call_sign", "VE3AT") == [3]
+
+
+def test_segments_are_compacted(tmp_path, monkeypatch):
+    monkeypatch.setattr(qso_index, "COMPACT_AFTER_SEGMENTS", 2)
+    log = str(tmp_path / "log.jsonl")
+    write_log(log, SAMPLE_QSOS[:1])
+    qso_index.load_index(log)
+
+    appended_one_at_a_time(log, SAMPLE_QSOS[1:])
+    with open(qso_index.index_filename(log), "rb") as file:
+        assert len(file.read().splitlines()) == 1
+    assert qso_index.lookup(reload_from_disk(log), "band", "40 M") == [1, 2]
+
+
+def test_index_is_kept_in_memory(tmp_path, monkeypatch):
+    log = str(tmp_path / "log.jsonl")
+    write_log(log, SAMPLE_QSOS)
+    first = qso_index.load_index(log)
+
+    def no_reading(log_filename):
+        raise AssertionError("the index was read again")
+
+    monkeypatch.setattr(qso_index, "_read_index", no_reading)
+    assert qso_index.load_index(log) is first
+
+
+def test_index_changed_by_another_process_is_read_again(tmp_path):
+    log = str(tmp_path / "log.jsonl")
+    write_log(log, SAMPLE_QSOS[:2])
+    qso_index.load_index(log)
+
+    # Another process appends and updates the sidecar files.
+
+    cached = qso_index._cache.pop(log)
+    write_log(log, SAMPLE_QSOS[2:], mode="a")
+    qso_index.load_index(log)
+    qso_index._cache[log] = cached
+
+    index = qso_index.load_index(log)
+    assert index is not cached
+    assert qso_index.qso_count(index) == 4
+
+
+@pytest.mark.parametrize("damage", ["cut segment", "extra offsets", "no offsets"])
+def test_unfinished_save_is_recovered(tmp_path, damage):
+    log = str(tmp_path / "log.jsonl")
+    write_log(log, SAMPLE_QSOS[:2])
+    qso_index.load_index(log)
+    appended_one_at_a_time(log, SAMPLE_QSOS[2:3])
+
+    if damage == "cut segment":
+        with open(qso_index.index_filename(log), "ab") as file:
+            file.write(b'{"version":2,"count":4,"log_')
+    elif damage == "extra offsets":
+        with open(qso_index.offsets_filename(log), "ab") as file:
+            file.write(b"\x07" * 8)
+    else:
+        os.remove(qso_index.offsets_filename(log))
+
+    write_log(log, SAMPLE_QSOS[3:], mode="a")
+    reload_from_disk(log)
+    index = reload_from_disk(log)
+    assert qso_index.qso_count(index) == 4
+    assert list(qso_index.read_qsos_at(log, index, [2, 3])) == SAMPLE_QSOS[2:]
+    assert qso_index.lookup(index, "call_sign", "VE3AT") == [3]
@@ -0,0 +1,108 @@
+import json
+
+import qso_log
+from qso_log import iter_lines_reversed, iter_qsos, read_last_qsos
+
+
+def write_lines(path, lines):
+    path.write_bytes("".join(lines).encode("utf-8"))
+
+
+def test_iter_lines_reversed_crosses_block_boundaries(tmp_path):
+    log = tmp_path / "log.jsonl"
+    write_lines(log, ["first\n", "second\n", "third line is longer\n"])
+
+    lines = list(iter_lines_reversed(str(log), block_size=4))
+
+    assert lines == [b"", b"third line is longer", b"second", b"first"]
+
+
+def test_read_last_qsos_returns_oldest_first(tmp_path):
+    log = tmp_path / "log.jsonl"
+    qsos = [{"call_sign": "CALL" + str(n)} for n in range(20)]
+    write_lines(log, [json.dumps(qso) + "\n" for qso in qsos])
+
+    assert read_last_qsos(str(log), 3) == qsos[-3:]
+
+
+def test_read_last_qsos_skips_blank_lines_and_crlf(tmp_path):
+    log = tmp_path / "log.jsonl"
+    write_lines(
+        log,
+        [
+            '{"call_sign": "W1AW"}\r\n',
+            "\r\n",
+            "   \n",
+            '{"call_sign": "N8PPC"}\r\n',
+            "\n",
+        ],
+    )
+
+    assert read_last_qsos(str(log), 2) == [
+        {"call_sign": "W1AW"},
+        {"call_sign": "N8PPC"},
+    ]
+
+
+def test_read_last_qsos_short_or_missing_file(tmp_path):
+    log = tmp_path / "log.jsonl"
+    write_lines(log, ['{"call_sign": "W1AW"}'])
+
+    assert read_last_qsos(str(log), 10) == [{"call_sign": "W1AW"}]
+    assert read_last_qsos(str(tmp_path / "missing.jsonl"), 10) == []
+
+
+def test_iter_qsos_streams_with_fields_and_predicate(tmp_path):
+    log = tmp_path / "log.jsonl"
+    write_lines(
+        log,
+        [
+            '{"call_sign": "W1AW", "band": "20M", "mode": "CW"}\n',
+            "\n",
+            '{"call_sign": "N8PPC", "band": "40M", "mode": "SSB"}\n',
+        ],
+    )
+
+    everything = list(iter_qsos(str(log)))
+    bands = list(iter_qsos(str(log), fields=["band", "missing"]))
+    ssb_calls = list(
+        iter_qsos(
+            str(log), fields=["call_sign"], predicate=lambda q: q["mode"] == "SSB"
+        )
+    )
+
+    assert len(everything) == 2
+    assert bands == [{"band": "20M"}, {"band": "40M"}]
+    assert ssb_calls == [{"call_sign": "N8PPC"}]
+    assert list(iter_qsos(str(tmp_path / "missing.jsonl"))) == []
+
+
+def test_sidecar_helpers_follow_appends_and_rewrites(tmp_path):
+    log = tmp_path / "log.jsonl"
+    write_lines(log, ['{"call_sign": "W1AW"}\n', '{"call_sign": "K1ABC"}\n'])
+    size = log.stat().st_size
+
+    seen = []
+    covered = qso_log.fold_records(
+        str(log), 0, size, lambda offset, qso: seen.append((offset, qso["call_sign"]))
+    )
+    assert covered == size
+    assert seen == [(0, "W1AW"), (22, "K1ABC")]
+
+    sidecar = str(tmp_path / "log.jsonl.side")
+    saved = {"version": 1, "log_size": covered}
+    saved["tail_check"] = qso_log.tail_check(str(log), covered)
+    qso_log.write_sidecar(sidecar, saved)
+    assert qso_log.read_sidecar(sidecar, 1) == saved
+    assert qso_log.read_sidecar(sidecar, 2) is None
+    assert qso_log.read_sidecar(sidecar + ".missing", 1) is None
+
+    with open(log, "a", encoding="utf-8") as file:
+        file.write('{"call_sign": "VE3AT"}\n')
+    grown = log.stat().st_size
+    assert qso_log.log_only_grew(str(log), covered, saved["tail_check"], grown)
+
+    write_lines(log, ['{"call_sign": "N0CALL"}\n', '{"call_sign": "K1ABC"}\n'])
+    rewritten = log.stat().st_size
+    assert not qso_log.log_only_grew(str(log), covered, saved["tail_check"], rewritten)
+    assert not qso_log.log_only_grew(str(log), covered, saved["tail_check"], 10)
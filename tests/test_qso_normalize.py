@@ -0,0 +1,94 @@
+import json
+import os
+
+import pytest
+
+import qso_index
+import qso_normalize
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("20M", ("20M", "")),
+        (" 20 m ", ("20M", "")),
+        ("20M SSB", ("20M", "SSB")),
+        ("40 M cw", ("40M", "CW")),
+        ("70cm", ("70CM", "")),
+        ("1.25 m", ("1.25M", "")),
+        ("2", ("2M", "")),
+        ("14.074", ("20M", "")),
+        ("7100 kHz LSB", ("40M", "LSB")),
+        ("20 meters", ("20M", "")),
+        ("20M/SSB", ("20M", "SSB")),
+        ("20 M SS", ("20 M SS", "")),
+        ("144.200 MHz", ("2M", "")),
+        ("11M", ("11M", "")),
+        (" ssb ", ("", "SSB")),
+        ("usb", ("", "USB")),
+        ("QRP", ("QRP", "")),
+        ("", ("", "")),
+    ],
+)
+def test_normalize_band(text, expected):
+    assert qso_normalize.normalize_band(text) == expected
+
+
+def test_normalize_mode():
+    assert qso_normalize.normalize_mode(" ft-8 ") == "FT8"
+    assert qso_normalize.normalize_mode("usb") == "SSB"
+    assert qso_normalize.normalize_mode("(SSB)") == "SSB"
+    assert qso_normalize.normalize_mode("RTTY") == "RTTY"
+
+
+def test_normalize_qso_moves_mode_out_of_band():
+    assert qso_normalize.normalize_qso({"band": "20 M SSB"}) == {
+        "band": "20M",
+        "mode": "SSB",
+    }
+    assert qso_normalize.normalize_qso({"band": "20M SSB", "mode": "cw"}) == {
+        "band": "20M",
+        "mode": "CW",
+    }
+    assert qso_normalize.normalize_qso({"band": "SSB"}) == {"band": "", "mode": "SSB"}
+    assert qso_normalize.normalize_qso({"band": "lsb", "mode": ""}) == {
+        "band": "",
+        "mode": "SSB",
+    }
+    assert qso_normalize.normalize_qso({"band": "20 meters", "mode": "CW"}) == {
+        "band": "20M",
+        "mode": "CW",
+    }
+    assert qso_normalize.normalize_qso({"band": "20 M SS"}) == {"band": "20 M SS"}
+    assert qso_normalize.normalize_qso({"band": 20, "call_sign": "W1AW"}) == {
+        "band": 20,
+        "call_sign": "W1AW",
+    }
+
+
+def test_normalize_log_rewrites_and_drops_stale_index(tmp_path):
+    log = str(tmp_path / "log.jsonl")
+    qsos = [
+        {"call_sign": "W1AW", "band": "20M SSB"},
+        {"call_sign": "KB5ELV", "band": "20 m", "mode": "SSB"},
+        {"call_sign": "VE3AT", "band": "40M", "mode": "CW"},
+    ]
+    with open(log, "w", encoding="utf-8") as file:
+        for qso in qsos:
+            file.write(json.dumps(qso) + "\n")
+    qso_index.load_index(log)
+
+    assert qso_normalize.normalize_log(log) == {"records": 3, "changed": 2}
+    assert not os.path.exists(log + ".normalize.tmp")
+
+    index = qso_index.load_index(log)
+    assert qso_index.lookup(index, "band", "20M") == [0, 1]
+    assert qso_index.lookup(index, "mode", "SSB") == [0, 1]
+
+    # Already normalized: nothing to rewrite.
+    assert qso_normalize.normalize_log(log) == {"records": 3, "changed": 0}
+
+
+def test_normalize_log_refuses_sqlite(tmp_path):
+    with pytest.raises(ValueError, match="only JSONL logs"):
+        qso_normalize.normalize_log(str(tmp_path / "log.sqlite3"))
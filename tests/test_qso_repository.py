@@ -0,0 +1,125 @@
+import json
+
+import pytest
+
+import qso_columns
+import qso_repository
+import qso_stats
+
+SAMPLE_QSOS = [
+    {
+        "call_sign": "W1AW",
+        "band": "20M",
+        "mode": "SSB",
+        "comments": "",
+        "timestamp": "2024-06-22T18:05:00Z",
+    },
+    {"call_sign": "KB5ELV", "band": "40M", "mode": "CW", "comments": "QRP"},
+    {"call_sign": "w1aw", "band": "20M", "timestamp": "2024-06-23T01:00:00Z"},
+    {"call_sign": "VE3AT", "band": "30M", "mode": "FT8", "extra": [1, 2]},
+]
+
+
+@pytest.fixture(params=["qsolog.jsonl", "qsolog.sqlite3", "column store"])
+def repo(request, tmp_path):
+    filename = str(tmp_path / request.param)
+    if request.param == "column store":
+        # A JSONL log with a column store, which appends keep current.
+        filename = str(tmp_path / "qsolog.jsonl")
+        qso_columns.sync_columns(filename)
+    with qso_repository.open_repository(filename) as repo:
+        repo.append(SAMPLE_QSOS[0])
+        repo.append_many(SAMPLE_QSOS[1:])
+        yield repo
+
+
+def test_open_repository_picks_backend_from_name(tmp_path):
+    jsonl = qso_repository.open_repository(str(tmp_path / "log.jsonl"))
+    sqlite = qso_repository.open_repository(str(tmp_path / "log.sqlite3"))
+    assert isinstance(jsonl, qso_repository.JSONLRepository)
+    assert isinstance(sqlite, qso_repository.SQLiteRepository)
+    sqlite.close()
+
+
+def test_iter_and_recent_keep_log_order(repo):
+    assert list(repo.iter_qsos()) == SAMPLE_QSOS
+    assert repo.recent(2) == SAMPLE_QSOS[2:]
+    assert repo.recent(10) == SAMPLE_QSOS
+    assert repo.qso_count() == 4
+
+
+def test_search_exact_and_partial(repo):
+    assert list(repo.search("band", "20M")) == [SAMPLE_QSOS[0], SAMPLE_QSOS[2]]
+    assert list(repo.search("mode", "RTTY")) == []
+    assert list(repo.search("call_sign", "W1", partial=True)) == [
+        SAMPLE_QSOS[0],
+        SAMPLE_QSOS[2],
+    ]
+    assert list(repo.search("mode", "ft", partial=True)) == [SAMPLE_QSOS[3]]
+
+    # Repeat searches (served from the in-memory call sign index) agree.
+    for _ in range(2):
+        assert list(repo.search("call_sign", "1a", partial=True)) == [
+            SAMPLE_QSOS[0],
+            SAMPLE_QSOS[2],
+        ]
+    with pytest.raises(ValueError):
+        repo.search("comments", "QRP")
+
+
+def test_counts_and_stats_match_a_json_scan(repo):
+    assert repo.count("call_sign") == {"W1AW": 2, "KB5ELV": 1, "VE3AT": 1}
+    assert repo.count("comments") == {"": 1, "QRP": 1}
+
+    expected = qso_stats.QSOStats().update(SAMPLE_QSOS)
+    assert repo.stats().to_dict() == expected.to_dict()
+
+
+def test_append_stores_canonical_band_and_mode(repo):
+    repo.append({"call_sign": "K1ABC", "band": "20 m ssb"})
+    repo.append({"call_sign": "K1ABC", "band": "14.074", "mode": "ft-8"})
+
+    assert repo.recent(2) == [
+        {"call_sign": "K1ABC", "band": "20M", "mode": "SSB"},
+        {"call_sign": "K1ABC", "band": "20M", "mode": "FT8"},
+    ]
+    assert len(list(repo.search("band", "20M"))) == 4
+
+
+def test_stale_column_store_is_not_used(tmp_path):
+    filename = str(tmp_path / "qsolog.jsonl")
+    qso_columns.sync_columns(filename)
+    with qso_repository.open_repository(filename) as repo:
+        repo.append_many(SAMPLE_QSOS)
+        assert qso_columns.open_if_fresh(filename) is not None
+
+        # Written behind the repository's back: the store no longer covers it.
+        with open(filename, "a", encoding="utf-8") as file:
+            file.write(json.dumps({"call_sign": "K1ABC", "band": "10M"}) + "\n")
+
+        assert qso_columns.open_if_fresh(filename) is None
+        assert len(list(repo.search("band", "10M"))) == 1
+        assert repo.count("call_sign")["K1ABC"] == 1
+        assert repo.stats().total == 5
+
+
+def test_time_range(repo):
+    assert list(repo.time_range("2024-06-23T00:00:00Z", None)) == [SAMPLE_QSOS[2]]
+    assert list(repo.time_range(None, "2024-06-23T00:00:00Z")) == [SAMPLE_QSOS[0]]
+    assert list(repo.time_range("2024-07-01T00:00:00Z", None)) == []
+
+
+def test_migrate_jsonl_to_sqlite(tmp_path):
+    source = str(tmp_path / "log.jsonl")
+    target = str(tmp_path / "log.sqlite3")
+    with open(source, "w", encoding="utf-8") as file:
+        for qso in SAMPLE_QSOS:
+            file.write(json.dumps(qso) + "\n")
+
+    assert qso_repository.migrate(source, target) == 4
+    with qso_repository.open_repository(target) as repo:
+        assert list(repo.iter_qsos()) == SAMPLE_QSOS
+
+    # Running it again would duplicate every QSO, so it refuses.
+    with pytest.raises(ValueError):
+        qso_repository.migrate(source, target)
@@ -0,0 +1,68 @@
+import json
+from collections import Counter
+
+from qso_stats import QSOStats, compute_stats, count_rates
+
+QSOS = [
+    {"call_sign": "W1AW", "band": "20M", "mode": "SSB"},
+    {"call_sign": " w1aw ", "band": "20m", "mode": "cw"},
+    {"call_sign": "N8PPC", "band": "40 M SSB"},
+    {
+        "call_sign": "VE3AT",
+        "band": "20M",
+        "mode": "SSB",
+        "timestamp": "2026-01-02T03:04:05Z",
+    },
+    {"call_sign": "KB5ELV", "mode": "FT8", "timestamp": "2026-01-02T23:59:59Z"},
+]
+
+
+def test_add_builds_every_counter_in_one_pass():
+    stats = QSOStats().update(QSOS)
+
+    assert stats.total == 5
+    assert stats.calls == Counter({"W1AW": 2, "N8PPC": 1, "VE3AT": 1, "KB5ELV": 1})
+    assert stats.bands == Counter({"20M": 3, "40 M SSB": 1})
+    assert stats.modes == Counter({"SSB": 2, "CW": 1, "FT8": 1})
+    assert stats.band_modes[("20M", "SSB")] == 2
+    assert stats.band_modes[("40 M SSB", "")] == 1
+    assert stats.days == Counter({"2026-01-02": 2})
+
+
+def test_merged_chunks_match_single_pass():
+    whole = QSOStats().update(QSOS)
+    merged = QSOStats().update(QSOS[:2]).merge(QSOStats().update(QSOS[2:]))
+
+    assert merged.total == whole.total
+    assert merged.top("calls", 10) == whole.top("calls", 10)
+    assert merged.top("band_modes", 10) == whole.top("band_modes", 10)
+
+
+def test_top_keeps_first_seen_order_for_ties():
+    stats = QSOStats().update(QSOS)
+
+    assert stats.top("calls", 3) == [("W1AW", 2), ("N8PPC", 1), ("VE3AT", 1)]
+
+
+def test_compute_stats_streams_the_log(tmp_path):
+    log = tmp_path / "log.jsonl"
+    log.write_text("".join(json.dumps(q) + "\n" for q in QSOS), encoding="utf-8")
+
+    stats = compute_stats(str(log))
+
+    assert stats.total == 5
+    assert stats.modes["SSB"] == 2
+
+
+def test_count_rates_per_day_and_hour():
+    rates = count_rates(
+        [
+            {"timestamp": "2024-06-22T18:05:00Z"},
+            {"timestamp": "2024-06-22T18:59:59Z"},
+            {"timestamp": "2024-06-23T01:00:00Z"},
+            {"call_sign": "W1AW"},
+        ]
+    )
+
+    assert rates["days"] == {"2024-06-22": 2, "2024-06-23": 1}
+    assert rates["hours"] == {"2024-06-22T18": 2, "2024-06-23T01": 1}
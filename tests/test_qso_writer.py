@@ -0,0 +1,66 @@
+import json
+
+from qso_log import iter_qsos, read_last_qsos
+from qso_writer import QSOWriter, append_qso, repair_torn_tail
+
+
+def read_qsos(path):
+    return [json.loads(line) for line in path.read_text().splitlines() if line]
+
+
+def test_writer_batches_until_flush_every(tmp_path):
+    log = tmp_path / "log.jsonl"
+    writer = QSOWriter(str(log), flush_every=3, flush_interval=3600)
+
+    writer.write({"call_sign": "W1AW"})
+    writer.write({"call_sign": "N8PPC"})
+    assert read_qsos(log) == []
+
+    writer.write({"call_sign": "VE3AT"})
+    assert len(read_qsos(log)) == 3
+
+    writer.write({"call_sign": "KB5ELV"})
+    writer.close()
+    assert [q["call_sign"] for q in read_qsos(log)][-1] == "KB5ELV"
+    assert writer.written == 4
+
+
+def test_writer_flushes_after_interval(tmp_path):
+    log = tmp_path / "log.jsonl"
+    with QSOWriter(str(log), flush_every=1000, flush_interval=0) as writer:
+        writer.write({"call_sign": "W1AW"})
+        assert read_qsos(log) == [{"call_sign": "W1AW"}]
+
+
+def test_append_qso_adds_one_line(tmp_path):
+    log = tmp_path / "log.jsonl"
+    append_qso(str(log), {"call_sign": "W1AW"})
+    append_qso(str(log), {"call_sign": "N8PPC"})
+
+    assert log.read_text() == '{"call_sign": "W1AW"}\n{"call_sign": "N8PPC"}\n'
+
+
+def test_torn_last_line_is_hidden_from_readers(tmp_path):
+    log = tmp_path / "log.jsonl"
+    log.write_text('{"call_sign": "W1AW"}\n{"call_sign": "N8', encoding="utf-8")
+
+    assert list(iter_qsos(str(log))) == [{"call_sign": "W1AW"}]
+    assert read_last_qsos(str(log), 5) == [{"call_sign": "W1AW"}]
+
+
+def test_repair_torn_tail_truncates_partial_line(tmp_path):
+    log = tmp_path / "log.jsonl"
+    log.write_text('{"call_sign": "W1AW"}\n{"call_sign": "N8', encoding="utf-8")
+
+    append_qso(str(log), {"call_sign": "VE3AT"})
+
+    assert read_qsos(log) == [{"call_sign": "W1AW"}, {"call_sign": "VE3AT"}]
+
+
+def test_repair_keeps_complete_line_missing_newline(tmp_path):
+    log = tmp_path / "log.jsonl"
+    log.write_text('{"call_sign": "W1AW"}', encoding="utf-8")
+
+    repair_torn_tail(str(log))
+
+    assert log.read_text() == '{"call_sign": "W1AW"}\n'
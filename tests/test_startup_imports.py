@@ -0,0 +1,51 @@
+import importlib.util
+import os
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LOGGER = os.path.join(REPO_ROOT, "ham-radio-logger.py")
+
+
+def load_logger():
+    spec = importlib.util.spec_from_file_location("ham_radio_logger", LOGGER)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_menu_starts_without_importing_requests(tmp_path):
+    code = (
+        "import importlib.util, sys\n"
+        f"spec = importlib.util.spec_from_file_location('logger', {LOGGER!r})\n"
+        "module = importlib.util.module_from_spec(spec)\n"
+        "spec.loader.exec_module(module)\n"
+        "module.main()\n"
+        "print('requests' in sys.modules, 'hamqth_api' in sys.modules)\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        input="6\n",
+        cwd=str(tmp_path),
+        env=dict(os.environ, PYTHONPATH=REPO_ROOT),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert result.stdout.splitlines()[-1] == "False False"
+
+
+def test_callbook_lookup_loads_callbook_on_first_use(tmp_path, monkeypatch, capsys):
+    import callbook_cache
+
+    logger = load_logger()
+    cache_file = str(tmp_path / "cache.sqlite3")
+    callbook_cache.get_cache(cache_file).put(
+        "W1AW", {"call_sign": "W1AW", "name": "ARRL"}
+    )
+    monkeypatch.setattr(logger, "CALLBOOK_CACHE_FILE", cache_file)
+    monkeypatch.setattr("builtins.input", lambda *args: "w1aw")
+
+    logger.handle_hamqth_callbook_lookup()
+
+    assert "Name: ARRL" in capsys.readouterr().out
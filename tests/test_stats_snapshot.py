@@ -0,0 +1,64 @@
+import os
+
+import qso_stats
+import stats_snapshot
+from conftest import write_log
+
+QSOS = [
+    {"call_sign": "W1AW", "band": "20M", "mode": "SSB"},
+    {"call_sign": "N8PPC", "band": "40M", "mode": "CW"},
+    {"call_sign": "W1AW", "band": "20M", "mode": "FT8"},
+]
+
+
+def test_first_run_counts_and_saves_snapshot(tmp_path):
+    log = str(tmp_path / "log.jsonl")
+    write_log(log, QSOS)
+
+    stats = stats_snapshot.load_stats(log)
+
+    assert stats.total == 3
+    assert stats.calls["W1AW"] == 2
+    assert os.path.exists(stats_snapshot.snapshot_filename(log))
+
+
+def test_appended_tail_is_folded_in(tmp_path, monkeypatch):
+    log = str(tmp_path / "log.jsonl")
+    write_log(log, QSOS[:2])
+    stats_snapshot.load_stats(log)
+
+    # The saved counters must be reused, not recounted.
+
+    def fail_rebuild(*args):
+        raise AssertionError("snapshot should not be rebuilt")
+
+    monkeypatch.setattr(stats_snapshot, "_rebuild", fail_rebuild)
+    write_log(log, QSOS[2:], mode="a")
+
+    stats = stats_snapshot.load_stats(log)
+
+    assert stats.total == 3
+    assert stats.to_dict() == qso_stats.compute_stats(log).to_dict()
+
+
+def test_rewritten_log_is_recounted(tmp_path):
+    log = str(tmp_path / "log.jsonl")
+    write_log(log, QSOS)
+    stats_snapshot.load_stats(log)
+
+    write_log(log, [{"call_sign": "VE3AT", "band": "30M", "mode": "AM"}] * 4)
+    stats = stats_snapshot.load_stats(log)
+
+    assert stats.total == 4
+    assert list(stats.calls) == ["VE3AT"]
+
+
+def test_truncated_log_is_recounted(tmp_path):
+    log = str(tmp_path / "log.jsonl")
+    write_log(log, QSOS)
+    stats_snapshot.load_stats(log)
+
+    write_log(log, QSOS[:1])
+    stats = stats_snapshot.load_stats(log)
+
+    assert stats.total == 1
@@ -0,0 +1,82 @@
+import datetime
+
+import pytest
+
+import time_index
+from conftest import write_log
+
+
+def hourly_qsos(count, first="2024-06-01T00:00:00Z"):
+    start = datetime.datetime.strptime(first, time_index.TIMESTAMP_FORMAT)
+    return [
+        {
+            "call_sign": f"K{n}",
+            "timestamp": time_index.utc_timestamp(
+                (start + datetime.timedelta(hours=n)).replace(
+                    tzinfo=datetime.timezone.utc
+                )
+            ),
+        }
+        for n in range(count)
+    ]
+
+
+@pytest.fixture
+def small_blocks(monkeypatch):
+    monkeypatch.setattr(time_index, "BLOCK_SIZE", 4)
+
+
+def test_parse_time_bound():
+    assert time_index.parse_time_bound("2024-06-22") == "2024-06-22T00:00:00Z"
+    assert time_index.parse_time_bound("2024-06-22", end=True) == "2024-06-23T00:00:00Z"
+    assert time_index.parse_time_bound(" 2024-06-22 18:30 ") == "2024-06-22T18:30:00Z"
+    with pytest.raises(ValueError):
+        time_index.parse_time_bound("last weekend")
+
+
+def test_range_reads_only_overlapping_blocks(tmp_path, small_blocks):
+    log = str(tmp_path / "log.jsonl")
+    qsos = hourly_qsos(40)
+    write_log(log, qsos)
+
+    start, end = "2024-06-01T10:00:00Z", "2024-06-01T13:00:00Z"
+    assert list(time_index.iter_range(log, start, end)) == qsos[10:13]
+
+    index = time_index.load_time_index(log)
+    assert index["sorted"]
+    assert time_index._blocks_in_range(index, start, end) == [2, 3]
+    assert list(time_index.iter_range(log, None, "2024-06-01T02:00:00Z")) == qsos[:2]
+    assert list(time_index.iter_range(log, "2024-06-02T14:00:00Z")) == qsos[38:]
+
+
+def test_appends_and_out_of_order_qsos(tmp_path, small_blocks):
+    log = str(tmp_path / "log.jsonl")
+    qsos = hourly_qsos(10, first="2024-06-10T00:00:00Z")
+    write_log(log, qsos)
+    time_index.load_time_index(log)
+
+    # An old QSO imported later, plus one with no timestamp.
+    late = [{"call_sign": "OLD1", "timestamp": "2024-06-10T03:30:00Z"}, {"x": 1}]
+    write_log(log, late, mode="a")
+
+    index = time_index.load_time_index(log)
+    assert not index["sorted"]
+    assert list(
+        time_index.iter_range(log, "2024-06-10T03:00:00Z", "2024-06-10T04:00:00Z")
+    ) == [
+        qsos[3],
+        late[0],
+    ]
+
+
+def test_read_block_stops_at_end_of_file(tmp_path):
+    log = tmp_path / "log.jsonl"
+    qsos = hourly_qsos(2)
+    write_log(log, qsos)
+    with open(log, "a", encoding="utf-8") as file:
+        file.write("\n\n")
+
+    # The block says 4 QSOs but the file ends (after blank lines) at 2.
+    index = {"blocks": [[0, 4, None, None]]}
+    with open(log, "rb") as file:
+        assert list(time_index._read_block(file, index, 0)) == qsos
@@ -0,0 +1,221 @@
+"""
+time_index.py
+
+Purpose:
+- Answer "what did I work between these times" without reading the whole log.
+- Keeps a sparse index next to the log ("<log file>.tidx"): the log is split
+  into blocks of BLOCK_SIZE QSOs and, for each block, we store where it starts
+  in the file and the earliest and latest timestamp in it.
+
+How a range query works:
+- Timestamps are "YYYY-MM-DDTHH:MM:SSZ" strings, so they sort as text.
+- A binary search over the blocks finds the first one that can hold the start
+  of the range; blocks whose min/max don't overlap the range are skipped.
+- Only the blocks that overlap are read and decoded.
+- QSOs are usually appended in time order. If some aren't (an ADIF import of
+  old QSOs, say), the index notices and stops assuming the blocks are sorted,
+  but it still skips every block whose min/max is outside the range.
+
+Rules:
+- Do NOT use input() or print() in this module.
+- The log file is the source of truth. The index can always be rebuilt.
+"""
+
+import datetime
+import json
+import os
+from bisect import bisect_left
+
+import qso_log
+import qso_stats
+
+TIME_INDEX_SUFFIX = ".tidx"
+TIME_INDEX_VERSION = 1
+TIMESTAMP_FIELD = qso_stats.TIMESTAMP_FIELD
+TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+# QSOs per block. Smaller blocks read less per query but make a bigger index.
+BLOCK_SIZE = 256
+
+# Block fields, stored as lists to keep the JSON small.
+OFFSET, COUNT, MIN_TIME, MAX_TIME = range(4)
+
+
+def time_index_filename(log_filename: str) -> str:
+    return log_filename + TIME_INDEX_SUFFIX
+
+
+def utc_timestamp(moment: datetime.datetime = None) -> str:
+    """Return moment (default: now) as a UTC timestamp string for a QSO."""
+    if moment is None:
+        moment = datetime.datetime.now(datetime.timezone.utc)
+    return moment.astimezone(datetime.timezone.utc).strftime(TIMESTAMP_FORMAT)
+
+
+def parse_time_bound(text: str, end: bool = False) -> str:
+    """
+    Turn what a user typed into a timestamp to compare against.
+
+    - "2024-06-22" is the start of that day; with end=True it is the start of
+      the next day, so the whole day is included
+    - "2024-06-22 18:30" (or with a "T") is that minute
+    - Raises ValueError if the text isn't one of those
+    """
+    text = text.strip().replace("T", " ")
+    try:
+        moment = datetime.datetime.strptime(text, "%Y-%m-%d %H:%M")
+    except ValueError:
+        moment = datetime.datetime.strptime(text, "%Y-%m-%d")
+        if end:
+            moment += datetime.timedelta(days=1)
+    return moment.strftime(TIMESTAMP_FORMAT)
+
+
+def load_time_index(log_filename: str) -> dict:
+    """
+    Return a time index that matches the current contents of the log.
+
+    Like qso_index.load_index(): appended QSOs are added to the saved index,
+    a shrunk or rewritten log is indexed from scratch, and the index is saved
+    again whenever it changed.
+    """
+    index = qso_log.read_sidecar(time_index_filename(log_filename), TIME_INDEX_VERSION)
+    if index is None:
+        index = _empty_index()
+    if not os.path.exists(log_filename):
+        return _empty_index()
+    if _refresh_index(index, log_filename):
+        qso_log.write_sidecar(time_index_filename(log_filename), index)
+    return index
+
+
+def iter_range(log_filename: str, start: str = None, end: str = None):
+    """
+    Yield QSOs with start <= timestamp < end, in log order.
+
+    start/end are timestamp strings (see utc_timestamp / parse_time_bound);
+    None means no limit on that side. QSOs without a timestamp never match.
+    """
+    index = load_time_index(log_filename)
+    with open(log_filename, "rb") as file:
+        for block_number in _blocks_in_range(index, start, end):
+            for qso in _read_block(file, index, block_number):
+                timestamp = qso.get(TIMESTAMP_FIELD)
+                if not isinstance(timestamp, str):
+                    continue
+                if start is not None and timestamp < start:
+                    continue
+                if end is not None and timestamp >= end:
+                    continue
+                yield qso
+
+
+# -----------------------------
+# Internal helpers (private)
+# -----------------------------
+def _blocks_in_range(index: dict, start: str | None, end: str | None) -> list[int]:
+    """Return the numbers of the blocks that may hold QSOs in [start, end)."""
+    blocks = index["blocks"]
+    first = 0
+    last = len(blocks)
+
+    # running_max never goes down, so the first block that can reach start is a
+    # binary search away. When the log is in time order, the blocks' minimums
+    # never go down either, and the end of the range is one too.
+
+    if start is not None:
+        first = bisect_left(index["running_max"], start)
+    if end is not None and index["sorted"]:
+
+        # A block with no timestamps at all sorts where the running max is.
+
+        minimums = [
+            block[MIN_TIME] if block[MIN_TIME] is not None else running_max
+            for block, running_max in zip(blocks, index["running_max"])
+        ]
+        last = bisect_left(minimums, end, lo=first)
+
+    selected = []
+    for number in range(first, last):
+        block = blocks[number]
+        if block[MIN_TIME] is None:
+            continue
+        if start is not None and block[MAX_TIME] < start:
+            continue
+        if end is not None and block[MIN_TIME] >= end:
+            continue
+        selected.append(number)
+    return selected
+
+
+def _read_block(file, index: dict, block_number: int):
+    """Yield the QSOs in one block (fewer if the file ends first)."""
+    blocks = index["blocks"]
+    file.seek(blocks[block_number][OFFSET])
+    for _ in range(blocks[block_number][COUNT]):
+        line = file.readline()
+        while line != b"" and line.strip() == b"":
+            line = file.readline()
+        if line == b"":
+            return
+        yield json.loads(line)
+
+
+def _empty_index() -> dict:
+    return {
+        "version": TIME_INDEX_VERSION,
+        "log_size": 0,
+        "log_mtime_ns": 0,
+        "tail_check": "",
+        "sorted": True,
+        "blocks": [],
+        "running_max": [],
+    }
+
+
+def _refresh_index(index: dict, log_filename: str) -> bool:
+    """Update index in place to match the log. Return True if anything changed."""
+    stat = os.stat(log_filename)
+    if stat.st_size == index["log_size"] and stat.st_mtime_ns == index["log_mtime_ns"]:
+        return False
+
+    if not qso_log.log_only_grew(
+        log_filename, index["log_size"], index["tail_check"], stat.st_size
+    ):
+        index.clear()
+        index.update(_empty_index())
+
+    covered = qso_log.fold_records(
+        log_filename,
+        index["log_size"],
+        stat.st_size,
+        lambda offset, qso: _add_record(index, offset, qso.get(TIMESTAMP_FIELD)),
+    )
+    index["log_size"] = covered
+    index["log_mtime_ns"] = stat.st_mtime_ns
+    index["tail_check"] = qso_log.tail_check(log_filename, covered)
+    return True
+
+
+def _add_record(index: dict, offset: int, timestamp) -> None:
+    """Add one QSO (at byte offset) to the last block, starting a new one if full."""
+    blocks = index["blocks"]
+    running_max = index["running_max"]
+    if not blocks or blocks[-1][COUNT] >= BLOCK_SIZE:
+        blocks.append([offset, 0, None, None])
+        running_max.append(running_max[-1] if running_max else "")
+    block = blocks[-1]
+    block[COUNT] += 1
+    if not isinstance(timestamp, str):
+        return
+
+    # Anything earlier than what came before means the log isn't in time order.
+
+    if running_max[-1] and timestamp < running_max[-1]:
+        index["sorted"] = False
+    if block[MIN_TIME] is None or timestamp < block[MIN_TIME]:
+        block[MIN_TIME] = timestamp
+    if block[MAX_TIME] is None or timestamp > block[MAX_TIME]:
+        block[MAX_TIME] = timestamp
+    if timestamp > running_max[-1]:
+        running_max[-1] = timestamp